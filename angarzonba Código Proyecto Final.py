@@ -1,157 +1,523 @@
+import argparse
+import asyncio
+import importlib.machinery
+import json
+import math
+import multiprocessing
+import os
+import platform
 import random
+import signal
+import struct
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from itertools import combinations, combinations_with_replacement, permutations
+from statistics import NormalDist, median
+
+try:
+    import numpy as np
+except ImportError:  # NumPy solo hace falta para SimuladorLotes
+    np = None
+
+# Orden fijo de los colores: la ficha "id" del color "c" ocupa el índice
+# COLORES.index(c) * FICHAS_POR_COLOR + id en el estado compacto
+COLORES = ["rojo", "azul", "verde", "amarillo"]
+# Colores de los asientos 5 a 8 en las variantes para más jugadores (ver Reglas.para_jugadores)
+COLORES_VARIANTES = COLORES + ["morado", "celeste", "blanco", "gris"]
+FICHAS_POR_COLOR = 4
+# Máscara con los bits de las fichas de un color y sus marcas de "última movida" en cero
+TODAS_LAS_FICHAS = (1 << FICHAS_POR_COLOR) - 1
+SIN_MOVIDAS = bytes(FICHAS_POR_COLOR)
+# Casillas del tablero principal clásico; las variantes usan Reglas.casillas
+CASILLAS = 68
+# Marca una ficha en la cárcel o un hueco libre dentro de una casilla
+VACIO = 255
+# Tipos de casilla precalculados
+NORMAL, SEGURO, SALIDA = 0, 1, 2
+
+def _claves_zobrist(filas, columnas, rng, vacio=None):
+    """Genera una tabla de claves aleatorias de 64 bits; la columna vacio vale 0."""
+    return [[0 if columna == vacio else rng.getrandbits(64) for columna in range(columnas)]
+            for _ in range(filas)]
+
+_NUM_FICHAS = len(COLORES) * FICHAS_POR_COLOR
+
+class EstadoTablero:
+    """
+    Estado compacto del tablero guardado en arreglos de bytes de tamaño fijo.
+    Ficha y Tablero son vistas sobre este estado, así que copiarlo es barato.
+    Por defecto tiene el tamaño del tablero clásico.
+    """
+    __slots__ = ("posiciones", "movidas", "cuentas", "ocupantes", "bloqueos", "hash", "carcel", "llegada")
+
+    def __init__(self, num_fichas=_NUM_FICHAS, casillas=CASILLAS):
+        # Posición de cada ficha (VACIO si está en la cárcel)
+        self.posiciones = bytearray([VACIO]) * num_fichas
+        # 1 si la ficha fue la última movida de su jugador
+        self.movidas = bytearray(num_fichas)
+        # Número de fichas en cada casilla del tablero principal
+        self.cuentas = bytearray(casillas)
+        # Dos huecos por casilla con el índice de la ficha que lo ocupa, en orden de llegada
+        self.ocupantes = bytearray([VACIO]) * (2 * casillas)
+        # Máscara de bits con las casillas bloqueadas (2 fichas del mismo color)
+        self.bloqueos = 0
+        # Hash Zobrist de las posiciones y los ocupantes, actualizado en cada cambio
+        self.hash = 0
+        # Máscaras de bits, por índice de ficha, de las fichas en la cárcel y en la zona interna
+        self.carcel = (1 << num_fichas) - 1
+        self.llegada = 0
+
+    def copiar(self):
+        """Devuelve una copia independiente del estado."""
+        copia = EstadoTablero.__new__(EstadoTablero)
+        copia.posiciones = self.posiciones[:]
+        copia.movidas = self.movidas[:]
+        copia.cuentas = self.cuentas[:]
+        copia.ocupantes = self.ocupantes[:]
+        copia.bloqueos = self.bloqueos
+        copia.hash = self.hash
+        copia.carcel = self.carcel
+        copia.llegada = self.llegada
+        return copia
+
+    def recalcular_grupos(self):
+        """Recalcula las máscaras de cárcel y llegada después de escribir las posiciones directamente."""
+        casillas = len(self.cuentas)
+        self.carcel = self.llegada = 0
+        for indice, posicion in enumerate(self.posiciones):
+            if posicion == VACIO:
+                self.carcel |= 1 << indice
+            elif posicion >= casillas:
+                self.llegada |= 1 << indice
+
+# Tablas de movimiento ya construidas, compartidas por los tableros con las mismas llegadas
+_TABLAS_MOVIMIENTO = {}
+
+def tablas_movimiento(llegadas, casillas=CASILLAS):
+    """
+    Construye (una sola vez por configuración) las tablas de movimiento.
+    destinos[color][posicion][avance] es la casilla de destino; la lista de cada
+    posición solo llega hasta el mayor avance válido, así que un índice fuera de
+    ella es un movimiento imposible. caminos[posicion][avance] son las casillas
+    que se revisan por bloqueos al avanzar, que no dependen del color, y
+    mascaras[posicion][avance] es el mismo camino como máscara de bits.
+    """
+    clave = (casillas,) + tuple((color, rango.start, rango.stop) for color, rango in llegadas.items())
+    if clave in _TABLAS_MOVIMIENTO:
+        return _TABLAS_MOVIMIENTO[clave]
+    num_posiciones = max(rango.stop for rango in llegadas.values())
+    destinos = {}
+    max_avance = [-1] * num_posiciones
+    for color, rango in llegadas.items():
+        por_posicion = [[] for _ in range(num_posiciones)]
+        for posicion in range(casillas):
+            # Desde el tablero principal se entra a la zona interna al pasar de la última casilla
+            for nueva_posicion in range(posicion, casillas + len(rango)):
+                if nueva_posicion < casillas:
+                    por_posicion[posicion].append(nueva_posicion)
+                else:
+                    por_posicion[posicion].append(rango[nueva_posicion - casillas])
+        for indice, posicion in enumerate(rango):
+            por_posicion[posicion] = list(rango[indice:])
+        for posicion, lista in enumerate(por_posicion):
+            max_avance[posicion] = max(max_avance[posicion], len(lista) - 1)
+        destinos[color] = por_posicion
+    # El camino revisa las casillas (posicion + i) % casillas, también desde la zona interna
+    caminos = [[tuple((posicion + i) % casillas for i in range(1, avance + 1))
+                for avance in range(max_avance[posicion] + 1)]
+               for posicion in range(num_posiciones)]
+    mascaras = [[sum(1 << casilla for casilla in set(camino)) for camino in por_avance]
+                for por_avance in caminos]
+    _TABLAS_MOVIMIENTO[clave] = destinos, caminos, mascaras
+    return destinos, caminos, mascaras
+
+class Reglas:
+    """
+    Configuración declarativa de las reglas: colores (en orden de asiento), casillas
+    del tablero principal, salida de cada color, casillas seguras, largo de la zona
+    interna, movimientos extra por captura y por llegada, pares seguidos que mandan
+    la última ficha movida a la cárcel y el dado (o suma) que saca una ficha.
+    compilar la convierte una sola vez en las tablas que consultan Tablero, Ficha y
+    Juego, así una variante no agrega trabajo por movimiento. Por defecto son las
+    reglas clásicas (REGLAS_CLASICAS).
+    """
+    def __init__(self, colores=None, casillas=CASILLAS, salidas=None, seguros=None, casillas_internas=8,
+                 extra_captura=20, extra_llegada=10, pares_castigo=3, valor_salida=5):
+        self.colores = list(COLORES if colores is None else colores)
+        self.casillas = casillas
+        if salidas is None:
+            salidas = {"rojo": 5, "azul": 19, "verde": 33, "amarillo": 47}
+        self.salidas = dict(salidas)
+        self.seguros = list([12, 26, 40, 54] if seguros is None else seguros)
+        self.casillas_internas = casillas_internas
+        self.extra_captura = extra_captura
+        self.extra_llegada = extra_llegada
+        self.pares_castigo = pares_castigo
+        self.valor_salida = valor_salida
+        self.compiladas = False
+
+    @classmethod
+    def para_jugadores(cls, jugadores, **cambios):
+        """
+        Reglas para un tablero de "jugadores" colores (de 2 a 8) con el trazado del
+        clásico: 17 casillas por color, salidas cada 14 casillas desde la 5 y un
+        seguro 7 casillas después de cada salida. Con 4 son las reglas clásicas.
+        """
+        if not 2 <= jugadores <= len(COLORES_VARIANTES):
+            raise ValueError(f"Las variantes son de 2 a {len(COLORES_VARIANTES)} jugadores.")
+        colores = COLORES_VARIANTES[:jugadores]
+        return cls(colores, 17 * jugadores, {color: 5 + 14 * k for k, color in enumerate(colores)},
+                   [12 + 14 * k for k in range(jugadores)], **cambios)
+
+    def configuracion(self):
+        """Los parámetros de las reglas, listos para JSON; Reglas(**configuracion) las recrea."""
+        return {
+            "colores": list(self.colores),
+            "casillas": self.casillas,
+            "salidas": dict(self.salidas),
+            "seguros": list(self.seguros),
+            "casillas_internas": self.casillas_internas,
+            "extra_captura": self.extra_captura,
+            "extra_llegada": self.extra_llegada,
+            "pares_castigo": self.pares_castigo,
+            "valor_salida": self.valor_salida,
+        }
+
+    def variante(self, **cambios):
+        """Devuelve otras reglas iguales a estas salvo por los parámetros indicados."""
+        return Reglas(**{**self.configuracion(), **cambios})
+
+    def compilar(self):
+        """
+        Valida la configuración y precalcula las llegadas de cada color, el tipo de
+        cada casilla, las tablas de movimiento y las claves Zobrist. Solo trabaja la
+        primera vez; retorna las mismas reglas. Lanza ValueError si no son válidas.
+        """
+        if self.compiladas:
+            return self
+        casillas = self.casillas
+        num_fichas = len(self.colores) * FICHAS_POR_COLOR
+        # Las posiciones y los ocupantes se guardan en bytes, con VACIO reservado
+        if casillas + 1 + len(self.colores) * self.casillas_internas > VACIO or num_fichas > VACIO:
+            raise ValueError("El tablero no cabe en el estado compacto.")
+        if sorted(self.salidas) != sorted(self.colores) or len(set(self.colores)) != len(self.colores):
+            raise ValueError("Cada color necesita exactamente una salida.")
+        if not all(0 <= casilla < casillas for casilla in list(self.salidas.values()) + self.seguros):
+            raise ValueError("Las salidas y los seguros deben estar en el tablero principal.")
+        if self.casillas_internas < 1 or not 1 <= self.pares_castigo <= 255:
+            raise ValueError("La zona interna debe ser de al menos 1 y los pares de castigo de 1 a 255.")
+        if not (0 <= self.extra_captura <= 0xFFFF and 0 <= self.extra_llegada <= 0xFFFF):
+            raise ValueError("Los movimientos extra deben estar entre 0 y 65535.")
+        self.num_fichas = num_fichas
+        # Las zonas internas van seguidas, después de una posición sin usar
+        inicio = casillas + 1
+        self.llegadas = {color: range(inicio + k * self.casillas_internas, inicio + (k + 1) * self.casillas_internas)
+                         for k, color in enumerate(self.colores)}
+        self.tipos = bytearray(casillas)
+        self.colores_salida = [None] * casillas
+        for casilla in self.seguros:
+            self.tipos[casilla] = SEGURO
+        for color, casilla in self.salidas.items():
+            self.tipos[casilla] = SALIDA
+            self.colores_salida[casilla] = color
+        self.destinos, self.caminos, self.mascaras = tablas_movimiento(self.llegadas, casillas)
+        # Claves Zobrist fijas (con semilla) para que el hash sea el mismo en todos los
+        # procesos. Una ficha en la cárcel o un hueco vacío no aportan nada, así el
+        # tablero inicial vale 0.
+        rng = random.Random(0x5A0B)
+        self.zobrist_posicion = _claves_zobrist(num_fichas, VACIO + 1, rng, VACIO)
+        self.zobrist_hueco = _claves_zobrist(2 * casillas, VACIO + 1, rng, VACIO)
+        self.zobrist_turno = _claves_zobrist(1, len(self.colores), rng)[0]
+        self.zobrist_pares = _claves_zobrist(len(self.colores), self.pares_castigo, rng, 0)
+        self.zobrist_extra = _claves_zobrist(len(self.colores), max(self.extra_captura, self.extra_llegada) + 1, rng, 0)
+        self.zobrist_ultima = _claves_zobrist(1, num_fichas, rng)[0]
+        # La configuración tal como se guarda en las instantáneas
+        self.configuracion_json = json.dumps(self.configuracion(), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        self.compiladas = True
+        return self
+
+REGLAS_CLASICAS = Reglas().compilar()
 
 class Tablero:
     """
     Clase que representa el tablero del juego de Parchís.
-    Contiene la información de las casillas, seguros, salidas y llegadas.
+    Contiene la información de las casillas, seguros, salidas y llegadas,
+    tomada de las Reglas compiladas (las clásicas si no se indican).
+    Las fichas de cada casilla se guardan en un EstadoTablero compacto.
     """
-    def __init__(self):
-        # Inicializa 68 casillas normales en el tablero principal
-        self.casillas = [{"tipo": "normal", "ocupantes": []} for _ in range(68)]
+    def __init__(self, estado=None, reglas=None):
+        self.reglas = reglas = (reglas if reglas is not None else REGLAS_CLASICAS).compilar()
+        # Número de casillas del tablero principal y vista de ellas como la lista de antes
+        self.num_casillas = reglas.casillas
+        self.casillas = CasillasTablero(self)
+        # Estado compacto con las posiciones y los ocupantes de las casillas
+        self.estado = estado if estado is not None else EstadoTablero(reglas.num_fichas, reglas.casillas)
+        # Fichas registradas por su índice en el estado
+        self.fichas = [None] * len(self.estado.posiciones)
         # Posiciones de las casillas seguras
-        self.seguros = [12, 26, 40, 54]
+        self.seguros = reglas.seguros
         # Posiciones de las casillas de salida para cada color
-        self.salidas = {"rojo": 5, "azul": 19, "verde": 33, "amarillo": 47}
+        self.salidas = reglas.salidas
         # Rangos de las casillas de llegada para cada color
-        self.llegadas = {"rojo": range(69, 77), "azul": range(77, 85), 
-                         "verde": range(85, 93), "amarillo": range(93, 101)}
-        # Configura las casillas especiales en el tablero
-        self.configurar_tablero()
-
-    def configurar_tablero(self):
-        """Configura las casillas de seguro y salida en el tablero."""
-        # Marca las casillas seguras
-        for i in self.seguros:
-            self.casillas[i]["tipo"] = "seguro"
-        # Marca las casillas de salida y su color
-        for color, pos in self.salidas.items():
-            self.casillas[pos]["tipo"] = "salida"
-            self.casillas[pos]["color"] = color
+        self.llegadas = reglas.llegadas
+        # Tipo de cada casilla y color de las salidas, precalculados
+        self.tipos = reglas.tipos
+        self.colores_salida = reglas.colores_salida
+        # Destinos, caminos y máscaras precalculados para cada (color, posición, avance)
+        self.destinos, self.caminos, self.mascaras = reglas.destinos, reglas.caminos, reglas.mascaras
+        self.zobrist_hueco = reglas.zobrist_hueco
+
+    def registrar_ficha(self, ficha):
+        """Registra una ficha para poder encontrarla a partir de su índice."""
+        self.fichas[ficha.indice] = ficha
     
     def seguro(self, posicion):
         """Verifica si una posición es una casilla segura."""
-        if posicion < 68:
-            return self.casillas[posicion]["tipo"] == "seguro"
+        if posicion < self.num_casillas:
+            return self.tipos[posicion] == SEGURO
         return False
     
     def salida(self, posicion):
         """Verifica si una posición es una casilla de salida."""
-        if posicion < 68:
-            return self.casillas[posicion]["tipo"] == "salida"
+        if posicion < self.num_casillas:
+            return self.tipos[posicion] == SALIDA
         return False
 
     def color_salida(self, posicion):
         """Devuelve el color de la casilla de salida, si aplica."""
-        if posicion < 68 and self.salida(posicion):
-            return self.casillas[posicion]["color"]
+        if posicion < self.num_casillas:
+            return self.colores_salida[posicion]
         return None
+
+    def ocupantes(self, posicion):
+        """Devuelve la lista de fichas que hay en una casilla, en orden de llegada."""
+        if posicion >= self.num_casillas:
+            return []
+        ocupantes = self.estado.ocupantes
+        return [self.fichas[i] for i in ocupantes[2 * posicion:2 * posicion + 2] if i != VACIO]
     
     def casilla_internas(self, color, avance):
         """
         Determina la posición en las casillas internas (llegada) 
         para un color y un avance específicos.
         """
-        for i, pos in enumerate(self.llegadas[color]):
-            if avance == i:
-                return pos
+        rango = self.llegadas[color]
+        if 0 <= avance < len(rango):
+            return rango[avance]
         return None
     
     def bloqueo(self, posicion):
         """
         Verifica si hay un bloqueo en la posición (2 fichas del mismo color).
         """
-        if posicion >= 68:
+        if posicion >= self.num_casillas:
             return False
-        ocupantes = self.casillas[posicion]["ocupantes"]
-        if len(ocupantes) < 2:
-            return False
-        if ocupantes[0].color == ocupantes[1].color:
-            return True
-        return False
+        return self.estado.bloqueos >> posicion & 1 == 1
 
     def agregar_ficha(self, ficha, posicion):
         """
         Agrega una ficha a una casilla y maneja la lógica de capturas.
         Retorna True si se capturó una ficha, False en caso contrario.
         """
-        if posicion >= 68:
+        if posicion >= self.num_casillas:
             return False
-        ocupantes = self.casillas[posicion]["ocupantes"]
+        estado = self.estado
+        ocupantes = estado.ocupantes
+        hueco = 2 * posicion
+        cuenta = estado.cuentas[posicion]
         
         # Si no hay ocupantes, simplemente agrega la ficha
-        if not ocupantes:
-            ocupantes.append(ficha)
+        if cuenta == 0:
+            ocupantes[hueco] = ficha.indice
+            estado.cuentas[posicion] = 1
+            estado.hash ^= self.zobrist_hueco[hueco][ficha.indice]
             return False
             
         # Si hay una ficha existente
-        if len(ocupantes) == 1:
-            ficha_existente = ocupantes[0]
+        if cuenta == 1:
+            existente = ocupantes[hueco]
+            mismo_color = existente // FICHAS_POR_COLOR == ficha.indice // FICHAS_POR_COLOR
+            tipo = self.tipos[posicion]
             
             # Caso especial: misma salida para fichas del mismo color
-            if self.salida(posicion) and ficha_existente.color == ficha.color:
-                ocupantes.remove(ficha_existente)
-                ocupantes.append(ficha)
+            if tipo == SALIDA and mismo_color:
+                ocupantes[hueco] = ficha.indice
+                estado.hash ^= self.zobrist_hueco[hueco][existente] ^ self.zobrist_hueco[hueco][ficha.indice]
                 return True
                 
-            # En casillas seguras o de salida se pueden apilar hasta 2 fichas
-            if self.seguro(posicion) or self.salida(posicion):
-                if len(ocupantes) < 2:
-                    ocupantes.append(ficha)
-                return False
-                
-            # Si son del mismo color, se pueden apilar hasta 2 fichas
-            if ficha_existente.color == ficha.color:
-                if len(ocupantes) < 2:
-                    ocupantes.append(ficha)
+            # En casillas seguras o de salida se pueden apilar hasta 2 fichas,
+            # y en las normales si son del mismo color
+            if tipo != NORMAL or mismo_color:
+                ocupantes[hueco + 1] = ficha.indice
+                estado.cuentas[posicion] = 2
+                estado.hash ^= self.zobrist_hueco[hueco + 1][ficha.indice]
+                if mismo_color:
+                    estado.bloqueos |= 1 << posicion
                 return False
                 
             # Si son de distinto color, se captura la ficha existente
-            ocupantes.remove(ficha_existente)
-            ficha_existente.reiniciar()
-            ocupantes.append(ficha)
+            ocupantes[hueco] = ficha.indice
+            estado.hash ^= self.zobrist_hueco[hueco][existente] ^ self.zobrist_hueco[hueco][ficha.indice]
+            self.fichas[existente].reiniciar()
             return True
             
         # Si ya hay dos ocupantes, no se puede agregar más fichas
-        if len(ocupantes) == 2:
-            return False  # CORRECCIÓN: Faltaba el return aquí
+        return False
             
     def quitar_ficha(self, ficha):
         """Elimina una ficha de su posición actual en el tablero."""
-        if ficha.posicion is None or ficha.carcel:
+        posicion = self.estado.posiciones[ficha.indice]
+        if posicion >= self.num_casillas:
+            # En la cárcel (VACIO) o en las casillas internas
             return
-        if ficha.posicion < 68:
-            if ficha in self.casillas[ficha.posicion]["ocupantes"]:
-                self.casillas[ficha.posicion]["ocupantes"].remove(ficha)
+        estado = self.estado
+        ocupantes = estado.ocupantes
+        hueco = 2 * posicion
+        segundo = ocupantes[hueco + 1]
+        if ocupantes[hueco] == ficha.indice:
+            # La segunda ficha pasa al primer hueco
+            ocupantes[hueco] = segundo
+            estado.hash ^= (self.zobrist_hueco[hueco][ficha.indice] ^ self.zobrist_hueco[hueco][segundo]
+                            ^ self.zobrist_hueco[hueco + 1][segundo])
+        elif segundo == ficha.indice:
+            estado.hash ^= self.zobrist_hueco[hueco + 1][segundo]
+        else:
+            return
+        ocupantes[hueco + 1] = VACIO
+        estado.cuentas[posicion] -= 1
+        # Con una sola ficha ya no puede haber bloqueo
+        estado.bloqueos &= ~(1 << posicion)
 
     def vertablero(self):
         """Muestra una representación visual del tablero en la consola."""
-        print("Tablero:")
-        for fila in range(7):
-            for col in range(10):
-                i = fila * 10 + col
-                if i >= len(self.casillas):
-                    break
-                casilla = self.casillas[i]
-                tipo = "S" if casilla["tipo"] == "seguro" else "N"
-                if casilla["tipo"] == "salida":
-                    tipo = f"{casilla.get('color', '')[0].upper()}"
-                ocupantes_str = " ".join([ficha.color[0].upper() for ficha in casilla["ocupantes"]])
-                if not ocupantes_str:
-                    ocupantes_str = " "
-                print(f"[{tipo}{ocupantes_str}]", end=" ")
-            print()
-        print("\nFin del Tablero\n")
+        sys.stdout.write(VistaTablero(self).dibujar())
+
+class CasillasTablero(Sequence):
+    """
+    Vista de solo lectura de las casillas del tablero principal con la forma de la
+    lista de antes: cada casilla es un diccionario con su "tipo" ("normal", "seguro"
+    o "salida"), sus "ocupantes" en orden de llegada y, en las salidas, su "color".
+    Los diccionarios se arman desde el EstadoTablero cada vez que se leen, así que
+    cambiarlos no cambia el tablero.
+    """
+    TIPOS = {NORMAL: "normal", SEGURO: "seguro", SALIDA: "salida"}
+
+    def __init__(self, tablero):
+        self.tablero = tablero
+
+    def __len__(self):
+        return self.tablero.num_casillas
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return [self[i] for i in range(*posicion.indices(len(self)))]
+        if posicion < 0:
+            posicion += len(self)
+        if not 0 <= posicion < len(self):
+            raise IndexError("La casilla no está en el tablero principal.")
+        tablero = self.tablero
+        tipo = tablero.tipos[posicion]
+        casilla = {"tipo": self.TIPOS[tipo], "ocupantes": tablero.ocupantes(posicion)}
+        if tipo == SALIDA:
+            casilla["color"] = tablero.colores_salida[posicion]
+        return casilla
+
+class VistaTablero:
+    """
+    Dibuja el tablero en un solo texto. Recuerda los ocupantes del último dibujo
+    para recalcular, y si se pide mostrar, solo las casillas que cambiaron.
+    """
+    COLUMNAS = 10
+
+    def __init__(self, tablero):
+        self.tablero = tablero
+        # Copia de estado.ocupantes al momento del último dibujo (None si no hay)
+        self.ocupantes = None
+        self.celdas = [None] * tablero.num_casillas
+
+    def celda(self, i):
+        """Texto de una casilla: su tipo seguido de la inicial del color de cada ficha."""
+        tablero = self.tablero
+        tipo = "S" if tablero.tipos[i] == SEGURO else "N"
+        if tablero.tipos[i] == SALIDA:
+            tipo = tablero.colores_salida[i][0].upper()
+        ocupantes_str = " ".join([ficha.color[0].upper() for ficha in tablero.ocupantes(i)])
+        if not ocupantes_str:
+            ocupantes_str = " "
+        return f"[{tipo}{ocupantes_str}]"
+
+    def actualizar(self):
+        """Recalcula las celdas cuyas casillas cambiaron desde el último dibujo y devuelve sus posiciones."""
+        actuales = self.tablero.estado.ocupantes
+        previos = self.ocupantes
+        if previos is None:
+            cambiadas = list(range(self.tablero.num_casillas))
+        else:
+            cambiadas = [i for i in range(self.tablero.num_casillas) if actuales[2 * i:2 * i + 2] != previos[2 * i:2 * i + 2]]
+        for i in cambiadas:
+            self.celdas[i] = self.celda(i)
+        self.ocupantes = bytes(actuales)
+        return cambiadas
+
+    def dibujar(self):
+        """Devuelve el tablero completo, con el mismo formato que vertablero."""
+        self.actualizar()
+        partes = ["Tablero:\n"]
+        for inicio in range(0, self.tablero.num_casillas, self.COLUMNAS):
+            partes.append("".join(celda + " " for celda in self.celdas[inicio:inicio + self.COLUMNAS]))
+            partes.append("\n")
+        partes.append("\nFin del Tablero\n\n")
+        return "".join(partes)
+
+    def dibujar_cambios(self):
+        """Devuelve solo las casillas que cambiaron desde el último dibujo, con su posición."""
+        if self.ocupantes is None:
+            return self.dibujar()
+        cambiadas = self.actualizar()
+        if not cambiadas:
+            return "Tablero sin cambios.\n\n"
+        return "Cambios en el tablero: " + " ".join(f"{i}{self.celdas[i]}" for i in cambiadas) + "\n\n"
         
 class Dados:
     """
     Clase para manejar los dados del juego.
     Permite lanzar dos dados o forzar valores específicos en modo desarrollador.
+    Las tiradas salen de un generador propio (con semilla o uno dado) y se
+    pregeneran por bloques; también se puede reproducir una secuencia grabada.
+    Sin semilla ni generador se usa el módulo random, como antes. Los mensajes
+    van al receptor de eventos dado (el del juego).
     """
-    def __init__(self, modo_desarrollador=False):
+    # Las 36 tiradas posibles, equiprobables
+    TIRADAS = [(d1, d2) for d1 in range(1, 7) for d2 in range(1, 7)]
+
+    def __init__(self, modo_desarrollador=False, semilla=None, generador=None,
+                 bloque=256, secuencia=None, grabar=False, eventos=None):
         self.d1 = 0
         self.d2 = 0
         self.modo_desarrollador = modo_desarrollador
         self.forzar_manual = False
+        if generador is None:
+            generador = random if semilla is None else random.Random(semilla)
+        self.rng = generador
+        self.bloque = bloque
+        # Tiradas pregeneradas, en orden inverso para sacarlas con pop()
+        self.pendientes = []
+        # Tiradas grabadas que se deben repetir en orden (None si no se reproduce nada)
+        self.secuencia = None
+        if secuencia is not None:
+            self.reproducir(secuencia)
+        # Todas las tiradas hechas, si se pidió grabarlas
+        self.historial = [] if grabar else None
+        self.eventos = eventos if eventos is not None else Eventos()
+
+    def reproducir(self, secuencia):
+        """Hace que los próximos lanzamientos devuelvan, en orden, las tiradas dadas."""
+        self.secuencia = list(secuencia)
+        self.secuencia.reverse()
 
     def lanzar(self):
         """
@@ -159,6 +525,8 @@ class Dados:
         permite al usuario ingresar los valores.
         """
         if self.modo_desarrollador and self.forzar_manual:
+            # Lo pendiente se escribe antes de pedir los valores, como en Juego.preguntar
+            self.eventos.vaciar()
             try:
                 self.d1 = int(input("Ingresa por favor el valor del primer dado (1-6): "))
                 while self.d1 < 1 or self.d1 > 6:
@@ -167,49 +535,85 @@ class Dados:
                 while self.d2 < 1 or self.d2 > 6:
                     self.d2 = int(input("Valor inválido. Intenta de nuevo: segundo dado (1-6): "))
             except ValueError:
-                print("Entrada inválida. Usando valores aleatorios.")
-                self.d1 = random.randint(1, 6)
-                self.d2 = random.randint(1, 6)
+                self.eventos.emitir("mensaje", ("Entrada inválida. Usando valores aleatorios.",))
+                self.d1, self.d2 = self.siguiente_tirada()
+        elif self.secuencia is not None:
+            if not self.secuencia:
+                raise IndexError("No quedan tiradas en la secuencia grabada.")
+            self.d1, self.d2 = self.secuencia.pop()
         else:
-            self.d1 = random.randint(1, 6)
-            self.d2 = random.randint(1, 6)
+            self.d1, self.d2 = self.siguiente_tirada()
+        if self.historial is not None:
+            self.historial.append((self.d1, self.d2))
         return self.d1, self.d2
+
+    def siguiente_tirada(self):
+        """Devuelve la siguiente tirada pregenerada, generando otro bloque si hace falta."""
+        if not self.pendientes:
+            self.pendientes = self.rng.choices(self.TIRADAS, k=self.bloque)
+        return self.pendientes.pop()
            
 class Ficha:
     """
     Clase que representa una ficha del juego.
     Cada ficha tiene un color, un ID, y un estado (en cárcel o en juego).
+    El estado se lee y escribe directamente en el EstadoTablero compartido.
     """
-    def __init__(self, color, id_ficha):
+    __slots__ = ("color", "id", "indice", "bit", "estado", "reglas", "casillas", "claves")
+
+    def __init__(self, color, id_ficha, estado=None, reglas=None):
         self.color = color
         self.id = id_ficha
-        self.carcel = True  # Todas las fichas empiezan en la cárcel
-        self.posicion = None
-        self.llegada = None
-        self.ultima_movida = None
+        self.reglas = reglas = (reglas if reglas is not None else REGLAS_CLASICAS).compilar()
+        self.casillas = reglas.casillas
+        # Índice de la ficha dentro de los arreglos del estado y sus claves Zobrist
+        self.indice = reglas.colores.index(color) * FICHAS_POR_COLOR + id_ficha
+        self.bit = 1 << self.indice
+        self.claves = reglas.zobrist_posicion[self.indice]
+        # Todas las fichas empiezan en la cárcel
+        self.estado = estado if estado is not None else EstadoTablero(reglas.num_fichas, reglas.casillas)
+
+    @property
+    def posicion(self):
+        posicion = self.estado.posiciones[self.indice]
+        return None if posicion == VACIO else posicion
+
+    @property
+    def carcel(self):
+        return self.estado.posiciones[self.indice] == VACIO
+
+    @property
+    def llegada(self):
+        # Las posiciones después del tablero principal solo pueden ser la zona final del propio color
+        return self.casillas <= self.estado.posiciones[self.indice] < VACIO
+
+    @property
+    def ultima_movida(self):
+        return self.estado.movidas[self.indice] == 1
+
+    @ultima_movida.setter
+    def ultima_movida(self, valor):
+        self.estado.movidas[self.indice] = 1 if valor else 0
 
     def mover(self, nueva_posicion):
-        """Mueve la ficha a una nueva posición y actualiza su estado."""
-        self.posicion = nueva_posicion
-        self.carcel = False
-        self.ultima_movida = True
-        
-        # Verifica si la ficha ha llegado a su zona final
-        if self.color == "rojo" and nueva_posicion >= 69 and nueva_posicion < 77:
-            self.llegada = True
-        elif self.color == "azul" and nueva_posicion >= 77 and nueva_posicion < 85:
-            self.llegada = True
-        elif self.color == "verde" and nueva_posicion >= 85 and nueva_posicion < 93:
-            self.llegada = True
-        elif self.color == "amarillo" and nueva_posicion >= 93 and nueva_posicion < 101:
-            self.llegada = True
+        """Mueve la ficha a una nueva posición y actualiza su estado y sus grupos."""
+        estado = self.estado
+        claves = self.claves
+        estado.hash ^= claves[estado.posiciones[self.indice]] ^ claves[nueva_posicion]
+        estado.posiciones[self.indice] = nueva_posicion
+        estado.movidas[self.indice] = 1
+        estado.carcel &= ~self.bit
+        if nueva_posicion >= self.casillas:
+            estado.llegada |= self.bit
 
     def reiniciar(self):
         """Devuelve la ficha a la cárcel."""
-        self.carcel = True
-        self.posicion = None
-        self.ultima_movida = False
-        self.llegada = False
+        estado = self.estado
+        estado.hash ^= self.claves[estado.posiciones[self.indice]]
+        estado.posiciones[self.indice] = VACIO
+        estado.movidas[self.indice] = 0
+        estado.carcel |= self.bit
+        estado.llegada &= ~self.bit
     
     def __str__(self):
         """Representación de texto de la ficha."""
@@ -226,119 +630,508 @@ class Jugador:
     Clase que representa a un jugador.
     Cada jugador tiene un nombre, un color, y 4 fichas.
     """
-    def __init__(self, nombre, color, tablero):
+    def __init__(self, nombre, color, tablero, politica=None):
         self.nombre = nombre
         self.color = color
         self.tablero = tablero
-        self.fichas = [Ficha(color, i) for i in range(4)]
+        self.fichas = [Ficha(color, i, tablero.estado, tablero.reglas) for i in range(FICHAS_POR_COLOR)]
+        for ficha in self.fichas:
+            tablero.registrar_ficha(ficha)
+        # Los grupos de fichas se leen de las máscaras del estado: los bits de este
+        # jugador empiezan en "inicio" y cada combinación ya tiene su tupla de fichas
+        self.inicio = self.fichas[0].indice
+        self.grupos = tuple(tuple(ficha for ficha in self.fichas if mascara >> ficha.id & 1)
+                            for mascara in range(1 << FICHAS_POR_COLOR))
+        # Referencias directas al estado y a las tablas de este color para los movimientos
+        self.estado = tablero.estado
+        self.destinos = tablero.destinos[color]
+        self.mascaras = tablero.mascaras
         self.pares_consecutivos = 0
         self.movimientos_extra = 0
         self.ultima_ficha_movida = None
+        # Si no hay política, las decisiones se piden por consola
+        self.politica = politica
+        # Instrumentacion del juego, si está activada
+        self.instrumentacion = None
 
     def fichas_carcel(self):
-        """Devuelve una lista de las fichas que están en la cárcel."""
-        return [ficha for ficha in self.fichas if ficha.carcel]
+        """Devuelve una tupla, ordenada por id, de las fichas que están en la cárcel."""
+        return self.grupos[self.estado.carcel >> self.inicio & TODAS_LAS_FICHAS]
 
     def fichasactivas(self):
-        """Devuelve una lista de las fichas que están en juego."""
-        return [ficha for ficha in self.fichas if not ficha.carcel]
+        """Devuelve una tupla, ordenada por id, de las fichas que están en juego."""
+        return self.grupos[~self.estado.carcel >> self.inicio & TODAS_LAS_FICHAS]
 
     def marcar_ultima_ficha(self, ficha_elegida):
         """Marca la última ficha movida por el jugador."""
-        for ficha in self.fichas:
-            ficha.ultima_movida = False
+        inicio = self.inicio
+        self.estado.movidas[inicio:inicio + FICHAS_POR_COLOR] = SIN_MOVIDAS
         if ficha_elegida:
-            ficha_elegida.ultima_movida = True
+            self.estado.movidas[ficha_elegida.indice] = 1
             self.ultima_ficha_movida = ficha_elegida
 
     def ganador(self):
         """Verifica si el jugador ha ganado (todas sus fichas en llegada)."""
-        return all(ficha.llegada for ficha in self.fichas)
+        return self.estado.llegada >> self.inicio & TODAS_LAS_FICHAS == TODAS_LAS_FICHAS
+
+    def distancia_restante(self):
+        """
+        Suma las casillas que le faltan a cada ficha para entrar a su zona interna.
+        Una ficha en la cárcel cuenta el recorrido completo desde su salida más una.
+        """
+        salida = self.tablero.salidas[self.color]
+        casillas = self.tablero.num_casillas
+        total = 0
+        for posicion in self.tablero.estado.posiciones[self.inicio:self.inicio + FICHAS_POR_COLOR]:
+            if posicion == VACIO:
+                total += casillas - salida + 1
+            elif posicion < casillas:
+                total += casillas - posicion
+        return total
 
     def puede_mover_ficha(self, ficha, avance):
         """
         Verifica si una ficha puede moverse un número determinado de casillas.
         Comprueba si hay bloqueos en el camino o si el movimiento es válido.
         """
-        if ficha.carcel:
+        estado = self.estado
+        posicionact = estado.posiciones[ficha.indice]
+        if posicionact == VACIO:
             return False
             
-        posicionact = ficha.posicion
-        
-        # Verifica si hay bloqueos en el camino
-        for i in range(1, avance + 1):
-            pos_intermedia = (posicionact + i) % 68
-            if self.tablero.bloqueo(pos_intermedia):
-                return False
-                
-        # Caso para fichas en el tablero principal
-        if posicionact < 68:
-            nueva_posicion = posicionact + avance
-            # Si la ficha pasaría a la zona interna
-            if nueva_posicion >= 68:
-                avance_interno = nueva_posicion - 68
-                # Solo puede avanzar hasta 7 casillas internas (0-7)
-                if avance_interno < 8:
-                    return True
-                else:
-                    return False
-            else:
-                return True
-        # Caso para fichas ya en zona interna
+        # La tabla solo tiene los avances que no se pasan del final de la zona interna
+        if not 0 <= avance < len(self.destinos[posicionact]):
+            return False
+            
+        # Verifica si hay bloqueos en el camino con una sola comparación de máscaras
+        if self.mascaras[posicionact][avance] & estado.bloqueos:
+            if self.instrumentacion is not None:
+                self.instrumentacion.contar("bloqueo_rechazado")
+            return False
+        return True
+
+# Tipos de decisión de un turno
+SALIR = "salir"        # sacar de la cárcel la primera ficha encarcelada
+MOVER = "mover"        # mover una ficha con uno de los dados
+PASAR = "pasar"        # no usar uno de los dados
+EXTRA = "extra"        # gastar un movimiento extra (de 1 casilla)
+TERMINAR = "terminar"  # renunciar a los movimientos extra restantes
+CASTIGO = "castigo"    # tercer par seguido: la última ficha movida vuelve a la cárcel
+
+# Decisión atómica de un turno; ficha es el id estable de la ficha dentro de su jugador
+Movimiento = namedtuple("Movimiento", ["tipo", "ficha", "avance"])
+
+class TablaTransposicion:
+    """
+    Caché acotada de evaluaciones indexada por el hash Zobrist de un estado.
+    Cada hash tiene un único hueco (hash % capacidad); cuando el hueco ya está
+    ocupado por otro estado, la política de reemplazo decide si se sobrescribe:
+    "siempre", "profundidad" (solo si la nueva evaluación es al menos igual de
+    profunda) o "edad" (como "profundidad", pero las entradas de búsquedas
+    anteriores siempre se reemplazan). También se acepta una función
+    reemplazo(profundidad_guardada, edad_guardada, profundidad_nueva, edad_actual).
+    """
+    POLITICAS = ("siempre", "profundidad", "edad")
+
+    def __init__(self, capacidad=1 << 16, reemplazo="edad"):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1.")
+        if not callable(reemplazo) and reemplazo not in self.POLITICAS:
+            raise ValueError(f"Política de reemplazo desconocida: {reemplazo}")
+        self.capacidad = capacidad
+        self.reemplazo = reemplazo
+        self.edad = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.limpiar()
+
+    def limpiar(self):
+        """Vacía la tabla."""
+        self.claves = [None] * self.capacidad
+        self.valores = [None] * self.capacidad
+        self.movimientos = [None] * self.capacidad
+        self.profundidades = [0] * self.capacidad
+        self.edades = [0] * self.capacidad
+        self.ocupadas = 0
+
+    def nueva_busqueda(self):
+        """Marca el inicio de una búsqueda; las entradas anteriores pasan a ser viejas."""
+        self.edad += 1
+
+    def buscar(self, clave, profundidad=0):
+        """
+        Retorna (valor, movimiento) guardados para la clave si se evaluaron con al menos
+        la profundidad pedida, o None en caso contrario.
+        """
+        hueco = clave % self.capacidad
+        if self.claves[hueco] == clave and self.profundidades[hueco] >= profundidad:
+            self.aciertos += 1
+            return self.valores[hueco], self.movimientos[hueco]
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, valor, profundidad=0, movimiento=None):
+        """Guarda una evaluación; retorna False si la política de reemplazo la descartó."""
+        hueco = clave % self.capacidad
+        guardada = self.claves[hueco]
+        if guardada is None:
+            self.ocupadas += 1
+        elif guardada != clave and not self.reemplazar(hueco, profundidad):
+            return False
+        self.claves[hueco] = clave
+        self.valores[hueco] = valor
+        self.movimientos[hueco] = movimiento
+        self.profundidades[hueco] = profundidad
+        self.edades[hueco] = self.edad
+        return True
+
+    def reemplazar(self, hueco, profundidad):
+        """Aplica la política de reemplazo a un hueco ocupado por otro estado."""
+        if callable(self.reemplazo):
+            return self.reemplazo(self.profundidades[hueco], self.edades[hueco], profundidad, self.edad)
+        if self.reemplazo == "siempre":
+            return True
+        if self.reemplazo == "edad" and self.edades[hueco] != self.edad:
+            return True
+        return profundidad >= self.profundidades[hueco]
+
+    def __len__(self):
+        return self.ocupadas
+
+class Politica:
+    """
+    Clase base para las políticas que toman decisiones en lugar de un humano.
+    Se usa en el modo sin consola para simular partidas completas.
+    """
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        """
+        Se llama con la tirada antes de pedir las fichas para los dos dados,
+        por si la política quiere planear la jugada completa.
+        """
+        pass
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        """
+        Elige una ficha de fichasact para moverla avance casillas.
+        Retorna el id de la ficha o None para pasar.
+        """
+        raise NotImplementedError
+
+    def sembrar(self, semilla):
+        """Reinicia el azar propio de la política, si tiene, para repetir una partida."""
+        pass
+
+class PoliticaAleatoria(Politica):
+    """Política que elige al azar entre las fichas que se pueden mover."""
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+
+    def sembrar(self, semilla):
+        self.rng = random.Random(semilla)
+
+    def __getstate__(self):
+        # El módulo random no se puede enviar a otro proceso; allá se usa el suyo
+        return {"rng": None if self.rng is random else self.rng}
+
+    def __setstate__(self, estado):
+        self.rng = estado["rng"] if estado["rng"] is not None else random
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        opciones = [ficha.id for ficha in fichasact if jugador.puede_mover_ficha(ficha, avance)]
+        if not opciones:
+            return None
+        return self.rng.choice(opciones)
+
+class PoliticaAvance(Politica):
+    """Política voraz que siempre mueve la ficha más adelantada que pueda moverse."""
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        mejor_id = None
+        mejor_posicion = -1
+        # Las fichas activas nunca están en la cárcel: se lee la posición del estado directamente
+        posiciones = jugador.estado.posiciones
+        for ficha in fichasact:
+            # Todas las fichas recorren el tablero hasta la casilla 67, así que
+            # la posición sirve como medida de avance (las internas son mayores)
+            posicion = posiciones[ficha.indice]
+            if posicion > mejor_posicion and jugador.puede_mover_ficha(ficha, avance):
+                mejor_id = ficha.id
+                mejor_posicion = posicion
+        return mejor_id
+
+class Instrumentacion:
+    """
+    Contadores de eventos de reglas y tiempos por fase de los turnos de un Juego.
+    Solo se usa si se activa con Juego.instrumentar; sin ella, el juego solo hace
+    una comprobación de None por fase. Los tiempos se acumulan en histogramas con
+    cubetas de potencias de 2 en nanosegundos.
+    Fases: turno (completo), pares, carcel, seleccion (elegir la ficha de cada
+    dado), mover_ficha (con los dados), extra (todo el ciclo de movimientos extra,
+    con su selección y sus movimientos) y tablero (mostrarlo).
+    Eventos: captura, llegada, castigo_triple_par y bloqueo_rechazado.
+    """
+    def __init__(self):
+        self.contadores = {}
+        self.llamadas = {}
+        self.total_ns = {}
+        self.histogramas = {}
+
+    def contar(self, evento, cantidad=1):
+        self.contadores[evento] = self.contadores.get(evento, 0) + cantidad
+
+    def medir(self, fase, inicio):
+        """
+        Registra la duración de una fase que empezó en inicio (de time.perf_counter_ns)
+        y retorna el momento actual para encadenar la siguiente fase.
+        """
+        ahora = time.perf_counter_ns()
+        ns = ahora - inicio
+        self.llamadas[fase] = self.llamadas.get(fase, 0) + 1
+        self.total_ns[fase] = self.total_ns.get(fase, 0) + ns
+        histograma = self.histogramas.get(fase)
+        if histograma is None:
+            histograma = self.histogramas[fase] = {}
+        cubeta = ns.bit_length()
+        histograma[cubeta] = histograma.get(cubeta, 0) + 1
+        return ahora
+
+    def combinar(self, otra):
+        """Suma a esta instrumentación los datos de otra (por ejemplo, de otra partida)."""
+        for evento, cantidad in otra.contadores.items():
+            self.contar(evento, cantidad)
+        for fase, llamadas in otra.llamadas.items():
+            self.llamadas[fase] = self.llamadas.get(fase, 0) + llamadas
+            self.total_ns[fase] = self.total_ns.get(fase, 0) + otra.total_ns[fase]
+            histograma = self.histogramas.setdefault(fase, {})
+            for cubeta, cantidad in otra.histogramas[fase].items():
+                histograma[cubeta] = histograma.get(cubeta, 0) + cantidad
+
+    def exportar(self):
+        """
+        Devuelve los datos como un diccionario listo para JSON. El histograma de cada
+        fase va de límite superior en ns (exclusivo) a número de mediciones.
+        """
+        fases = {}
+        for fase, llamadas in self.llamadas.items():
+            fases[fase] = {
+                "llamadas": llamadas,
+                "total_ns": self.total_ns[fase],
+                "media_ns": self.total_ns[fase] / llamadas,
+                "histograma_ns": {str(1 << cubeta): cantidad
+                                  for cubeta, cantidad in sorted(self.histogramas[fase].items())},
+            }
+        return {"contadores": dict(self.contadores), "fases": fases}
+
+class Eventos:
+    """
+    Receptor de los eventos del juego: turno, tirada, par, castigo, salida,
+    movimiento (con su captura o llegada), fichas, tablero, ganador y mensaje.
+    Esta base no hace nada; es la que usan las partidas silenciosas, así los
+    textos solo se arman cuando alguien los va a mostrar.
+    """
+    def emitir(self, evento, *datos):
+        """Recibe un evento con sus datos."""
+        pass
+
+    def vaciar(self):
+        """Escribe lo que esté pendiente; se llama antes de pedir algo al usuario."""
+        pass
+
+class ConsolaEventos(Eventos):
+    """
+    Escribe los eventos en la consola con los mismos textos de siempre, pero los
+    acumula y los escribe de una vez al mostrar el tablero o al pedir algo al
+    usuario. Con diferencial=True, después del primer tablero solo muestra las
+    casillas que cambiaron.
+    """
+    def __init__(self, salida=None, diferencial=False):
+        self.salida = salida if salida is not None else sys.stdout
+        self.diferencial = diferencial
+        self.pendiente = []
+        self.vista = None
+
+    def emitir(self, evento, *datos):
+        getattr(self, "evento_" + evento)(*datos)
+
+    def escribir(self, texto):
+        self.pendiente.append(texto)
+        self.pendiente.append("\n")
+
+    def vaciar(self):
+        if self.pendiente:
+            self.salida.write("".join(self.pendiente))
+            self.pendiente.clear()
+            self.salida.flush()
+
+    def evento_mensaje(self, args):
+        self.escribir(" ".join(str(arg) for arg in args))
+
+    def evento_turno(self, jugador):
+        self.escribir(f"\nTurno del jugador {jugador.nombre}, color {jugador.color}")
+        self.escribir("Estado de las fichas:")
+        for ficha in jugador.fichas:
+            self.escribir(f"Ficha {ficha.id}: {ficha}")
+
+    def evento_tirada(self, jugador, d1, d2):
+        self.escribir(f"Dados: {d1}, {d2}")
+
+    def evento_par(self, jugador):
+        self.escribir(f"¡Felicidades sacaste par!, recuerda que llevas {jugador.pares_consecutivos} pares consecutivos.")
+
+    def evento_castigo(self, jugador, ficha):
+        pares = jugador.tablero.reglas.pares_castigo
+        pares = "tres" if pares == 3 else pares
+        self.escribir(f"Sacaste {pares} pares seguidos :(, tu ultima ficha movida se irá a la cárcel.")
+
+    def evento_salida(self, ficha, captura):
+        self.escribir(f"Ficha {ficha.id} de color {ficha.color} salió de la cárcel a la posición {ficha.posicion}.")
+        if captura:
+            self.escribir(f"¡Capturaste una ficha enemiga, ahora tienes {ficha.reglas.extra_captura} movimientos extra!")
+
+    def evento_movimiento(self, ficha, origen, destino, captura):
+        if origen >= ficha.casillas:
+            self.escribir(f"Ficha {ficha.id} de color {ficha.color} movida a la casilla interna {destino}.")
+        elif destino >= ficha.casillas:
+            self.escribir(f"Ficha {ficha.id} de color {ficha.color} ha llegado a su casilla interna {destino}.")
+            self.escribir(f"¡Felicidades!, ahora tienes {ficha.reglas.extra_llegada} movimientos extra.")
         else:
-            # Encuentra el índice actual en la zona interna
-            for i, pos in enumerate(self.tablero.llegadas[self.color]):
-                if pos == posicionact:
-                    indice_actual = i
-                    break
-            nuevo_indice = indice_actual + avance
-            # Solo puede avanzar hasta el final de la zona interna
-            if nuevo_indice < 8:
-                return True
-            else:
-                return False
-        return False
+            self.escribir(f"Ficha {ficha.id} de color {ficha.color} se ha movido a la posición {destino}.")
+            if captura:
+                self.escribir(f"¡Capturaste una ficha enemiga, ahora tienes {ficha.reglas.extra_captura} movimientos extra!")
+
+    def evento_fichas(self, fichasact):
+        self.escribir("Fichas activas:")
+        for i, ficha in enumerate(fichasact):
+            self.escribir(f"{i + 1}: {ficha}")
+
+    def evento_tablero(self, tablero):
+        if self.vista is None or self.vista.tablero is not tablero:
+            self.vista = VistaTablero(tablero)
+        self.pendiente.append(self.vista.dibujar_cambios() if self.diferencial else self.vista.dibujar())
+        self.vaciar()
+
+    def evento_ganador(self, jugador):
+        self.escribir(f"¡El jugador {jugador.nombre}, color {jugador.color} es el ganador!")
+        self.vaciar()
+
+class ConteoEventos(Eventos):
+    """Cuenta, por color, las capturas y las llegadas a la zona interna de una partida."""
+    def __init__(self):
+        self.capturas = dict.fromkeys(COLORES_VARIANTES, 0)
+        self.llegadas = dict.fromkeys(COLORES_VARIANTES, 0)
+
+    def emitir(self, evento, *datos):
+        if evento == "movimiento":
+            ficha, origen, destino, captura = datos
+            if captura:
+                self.capturas[ficha.color] += 1
+            elif origen < ficha.casillas <= destino:
+                self.llegadas[ficha.color] += 1
+        elif evento == "salida" and datos[1]:
+            self.capturas[datos[0].color] += 1
 
 class Juego:
     """
     Clase principal que maneja la lógica del juego.
     Coordina turnos, jugadores, tablero y dados.
     """
-    def __init__(self, modo_desarrollador=False):
-        self.tablero = Tablero()
-        self.dados = Dados(modo_desarrollador)
+    # Formato de las instantáneas (ver instantanea): cabecera, reglas en JSON, 4 bytes
+    # por jugador, los arreglos del EstadoTablero, la máscara de bloqueos, el hash y los nombres
+    MAGICO_INSTANTANEA = b"PRCI"
+    VERSION_INSTANTANEA = 3
+    CABECERA_INSTANTANEA = struct.Struct("<4sBBIBBBBBH")
+    # Color, pares consecutivos, movimientos extra (hasta 65535) y última ficha movida
+    JUGADOR_INSTANTANEA = struct.Struct("<BBHB")
+
+    def __init__(self, modo_desarrollador=False, silencioso=False, semilla=None, eventos=None, reglas=None):
+        # Reglas compiladas de la partida (las clásicas si no se indican)
+        self.reglas = (reglas if reglas is not None else REGLAS_CLASICAS).compilar()
+        self.tablero = Tablero(reglas=self.reglas)
+        # Receptor de los eventos del juego; por defecto, la consola o nada si es silencioso
+        if eventos is None:
+            eventos = Eventos() if silencioso else ConsolaEventos()
+        self.eventos = eventos
+        self.dados = Dados(modo_desarrollador, semilla, eventos=eventos)
         self.jugadores = []
         self.turnoact = 0
         self.modo_desarrollador = modo_desarrollador
+        # Registros para revertir los movimientos aplicados con hacer()
+        self.pila_deshacer = []
+        # Turnos jugados y grabación binaria opcional de la partida (RegistroPartida)
+        self.turnos = 0
+        self.registro = None
+        # Instrumentacion opcional de las fases del turno (ver instrumentar)
+        self.instrumentacion = None
+        # Consejero opcional que precalcula las jugadas del turno (ver aconsejar)
+        self.consejero = None
+        # En modo silencioso no se escribe nada en la consola
+        self.silencioso = silencioso
+
+    def mostrar(self, *args):
+        """Envía un mensaje al receptor de eventos (la consola, salvo en modo silencioso)."""
+        self.eventos.emitir("mensaje", args)
+
+    def preguntar(self, mensaje):
+        """Escribe lo pendiente y pide un dato al usuario."""
+        self.eventos.vaciar()
+        return input(mensaje)
 
     def solicitar_ficha(self, mensaje, fichasact):
         """
-        Solicita al usuario que elija una ficha.
-        Retorna el índice de la ficha o None si no elige ninguna.
+        Solicita al usuario que elija una ficha por su número en fichasact.
+        Retorna el id de la ficha o None si no elige ninguna.
         """
         while True:
             try:
-                ficha_idx = int(input(mensaje)) - 1
+                ficha_idx = int(self.preguntar(mensaje)) - 1
                 if ficha_idx == -1:
                     return None  # El usuario decidió pasar
                 if 0 <= ficha_idx < len(fichasact):
-                    return ficha_idx
-                print("Número fuera de rango. Inténtalo de nuevo.")
+                    return fichasact[ficha_idx].id
+                self.mostrar("Número fuera de rango. Inténtalo de nuevo.")
             except ValueError:
-                print("Entrada inválida. Ingresa un número.")
+                self.mostrar("Entrada inválida. Ingresa un número.")
 
-    def agregarjugador(self, nombre, color):
+    def elegir_ficha(self, jugador, mensaje, fichasact, avance):
+        """
+        Pide la elección de una ficha a la política del jugador
+        o, si no tiene, al usuario por consola.
+        """
+        if jugador.politica is not None:
+            return jugador.politica.elegir_ficha(self, jugador, fichasact, avance)
+        return self.solicitar_ficha(mensaje, fichasact)
+
+    def agregarjugador(self, nombre, color, politica=None):
         """Agrega un nuevo jugador al juego."""
-        if color not in ["rojo", "azul", "verde", "amarillo"]:
-            print("Color inválido, por favor elige entre rojo, azul, verde o amarillo.")
+        colores = self.reglas.colores
+        if color not in colores:
+            self.mostrar(f"Color inválido, por favor elige entre {', '.join(colores[:-1])} o {colores[-1]}.")
             return False
         if any(jugador.color == color for jugador in self.jugadores):
-            print("Ya hay un jugador con ese color.")
+            self.mostrar("Ya hay un jugador con ese color.")
             return False
-        self.jugadores.append(Jugador(nombre, color, self.tablero))
-        print(f"Jugador {nombre} agregado con éxito con el color {color}.")
+        self.jugadores.append(Jugador(nombre, color, self.tablero, politica))
+        self.jugadores[-1].instrumentacion = self.instrumentacion
+        self.mostrar(f"Jugador {nombre} agregado con éxito con el color {color}.")
         return True
         
+    def instrumentar(self, instrumentacion):
+        """Activa una Instrumentacion para este juego y sus jugadores, o la desactiva con None."""
+        self.instrumentacion = instrumentacion
+        for jugador in self.jugadores:
+            jugador.instrumentacion = instrumentacion
+        return instrumentacion
+
+    def aconsejar(self, consejero):
+        """
+        Activa un Consejero para este juego, o lo desactiva con None. Desde entonces,
+        al empezar y al terminar cada turno se anticipan las jugadas del jugador que
+        tiene el turno, y a los jugadores por consola se les muestra una sugerencia.
+        """
+        self.consejero = consejero
+        if consejero is not None:
+            consejero.anticipar(self)
+        return consejero
+
     def cambiodeturno(self):
         """Cambia al siguiente jugador."""
         self.turnoact = (self.turnoact + 1) % len(self.jugadores)
@@ -346,13 +1139,16 @@ class Juego:
     def manejar_pares_consecutivos(self, jugador, d1, d2):
         """
         Maneja la lógica de los pares consecutivos.
-        Si un jugador saca 3 pares consecutivos, su última ficha movida vuelve a la cárcel.
+        Si un jugador saca 3 pares consecutivos (o los que digan las reglas),
+        su última ficha movida vuelve a la cárcel.
         """
         if d1 == d2:
             jugador.pares_consecutivos += 1
-            print(f"¡Felicidades sacaste par!, recuerda que llevas {jugador.pares_consecutivos} pares consecutivos.")
-            if jugador.pares_consecutivos == 3:
-                print("Sacaste tres pares seguidos :(, tu ultima ficha movida se irá a la cárcel.")
+            self.eventos.emitir("par", jugador)
+            if jugador.pares_consecutivos == self.reglas.pares_castigo:
+                self.eventos.emitir("castigo", jugador, jugador.ultima_ficha_movida)
+                if self.instrumentacion is not None:
+                    self.instrumentacion.contar("castigo_triple_par")
                 if jugador.ultima_ficha_movida:
                     self.tablero.quitar_ficha(jugador.ultima_ficha_movida)  # CORRECCIÓN: Quitar la ficha del tablero
                     jugador.ultima_ficha_movida.reiniciar()
@@ -370,198 +1166,592 @@ class Juego:
         """
         fichas_carcel = jugador.fichas_carcel()
         if not fichas_carcel:
-            print("No tienes fichas en la cárcel.")
+            self.mostrar("No tienes fichas en la cárcel.")
             return False
             
         # Se puede sacar una ficha si alguno de los dados es 5 o si su suma es 5
-        cinco = d1 == 5 or d2 == 5 or d1 + d2 == 5
+        valor = self.reglas.valor_salida
+        cinco = d1 == valor or d2 == valor or d1 + d2 == valor
         if not cinco:
             return False
             
         pos_salida = self.tablero.salidas[jugador.color]
-        ocupantes = self.tablero.casillas[pos_salida]["ocupantes"]
+        ocupantes = self.tablero.ocupantes(pos_salida)
         
         # Comprobar si la casilla de salida está bloqueada por fichas del mismo color
         if len(ocupantes) >= 2 and all(ficha.color == jugador.color for ficha in ocupantes):
-            print("No puedes sacar la ficha de la cárcel, ya hay dos fichas en la salida.")
+            self.mostrar("No puedes sacar la ficha de la cárcel, ya hay dos fichas en la salida.")
             return False
             
         ficha = fichas_carcel[0]
+        captura = self.aplicar_salida(jugador, ficha)
+        if self.registro is not None:
+            self.registro.salida(ficha)
+        self.eventos.emitir("salida", ficha, captura)
+        return True
+
+    def puede_sacar_ficha(self, jugador, d1, d2):
+        """Verifica, sin escribir en la consola, si con estos dados se saca una ficha de la cárcel."""
+        if not jugador.fichas_carcel():
+            return False
+        valor = self.reglas.valor_salida
+        if not (d1 == valor or d2 == valor or d1 + d2 == valor):
+            return False
+        ocupantes = self.tablero.ocupantes(self.tablero.salidas[jugador.color])
+        return not (len(ocupantes) >= 2 and all(ficha.color == jugador.color for ficha in ocupantes))
+
+    def aplicar_salida(self, jugador, ficha):
+        """
+        Pone una ficha de la cárcel en su salida sin escribir en la consola.
+        Retorna True si se capturó una ficha.
+        """
+        pos_salida = self.tablero.salidas[jugador.color]
         self.tablero.quitar_ficha(ficha)
         ficha.mover(pos_salida)
         captura = self.tablero.agregar_ficha(ficha, pos_salida)
-        print(f"Ficha {ficha.id} de color {ficha.color} salió de la cárcel a la posición {pos_salida}.")
-        
         if captura:
-            jugador.movimientos_extra = 20
-            print("¡Capturaste una ficha enemiga, ahora tienes 20 movimientos extra!")
-        return True
+            jugador.movimientos_extra = self.reglas.extra_captura
+            if self.instrumentacion is not None:
+                self.instrumentacion.contar("captura")
+        return captura
         
-    def mover_ficha(self, jugador, ficha_idx, avance):
+    def mover_ficha(self, jugador, ficha_id, avance):
         """
-        Mueve una ficha un número determinado de casillas.
+        Mueve la ficha con ese id un número determinado de casillas.
         Maneja la lógica de capturas y llegadas.
         """
-        fichasact = jugador.fichasactivas()
-        if ficha_idx < 0 or ficha_idx >= len(fichasact):
-            print("Ficha inválida.")
+        if not 0 <= ficha_id < FICHAS_POR_COLOR or jugador.estado.carcel & jugador.fichas[ficha_id].bit:
+            self.mostrar("Ficha inválida.")
             return False
             
-        ficha = fichasact[ficha_idx]
+        ficha = jugador.fichas[ficha_id]
         if not jugador.puede_mover_ficha(ficha, avance):
-            print(f"No puedes mover la ficha {ficha.id} {avance} casillas.")  # CORRECCIÓN: f-string
+            self.mostrar(f"No puedes mover la ficha {ficha.id} {avance} casillas.")  # CORRECCIÓN: f-string
             return False
             
-        self.tablero.quitar_ficha(ficha)
-        posicionact = ficha.posicion
-        
-        # Caso para fichas en el tablero principal
-        if posicionact < 68:
-            nueva_posicion = posicionact + avance
-            # Si la ficha pasa a la zona interna
-            if nueva_posicion >= 68:
-                avance_interno = nueva_posicion - 68
-                nueva_posicion = self.tablero.casilla_internas(jugador.color, avance_interno)
-                ficha.mover(nueva_posicion)
-                print(f"Ficha {ficha.id} de color {ficha.color} ha llegado a su casilla interna {nueva_posicion}.")
-                jugador.movimientos_extra = 10
-                print("¡Felicidades!, ahora tienes 10 movimientos extra.")
-            # Si se queda en el tablero principal
+        posicionact, captura = self.aplicar_movimiento(jugador, ficha, avance)
+        # El receptor distingue entre avance, captura y llegada a la zona interna
+        self.eventos.emitir("movimiento", ficha, posicionact, jugador.estado.posiciones[ficha.indice], captura)
+        return True
+
+    def aplicar_movimiento(self, jugador, ficha, avance):
+        """
+        Aplica un movimiento ya validado sin escribir en la consola.
+        Maneja capturas, llegadas y los movimientos extra que otorgan.
+        Retorna la posición de origen y si hubo captura.
+        """
+        tablero = self.tablero
+        posicionact = jugador.estado.posiciones[ficha.indice]
+        casillas = tablero.num_casillas
+        nueva_posicion = jugador.destinos[posicionact][avance]
+        captura = False
+        # En la zona interna la ficha no ocupa casillas del tablero principal
+        if posicionact < casillas:
+            tablero.quitar_ficha(ficha)
+        ficha.mover(nueva_posicion)
+        if posicionact < casillas:
+            # Llegar a la zona interna da 10 movimientos extra
+            if nueva_posicion >= casillas:
+                jugador.movimientos_extra = self.reglas.extra_llegada
+                if self.instrumentacion is not None:
+                    self.instrumentacion.contar("llegada")
+            # Capturar una ficha enemiga da 20 movimientos extra
             else:
-                ficha.mover(nueva_posicion)
-                captura = self.tablero.agregar_ficha(ficha, nueva_posicion)
-                print(f"Ficha {ficha.id} de color {ficha.color} se ha movido a la posición {nueva_posicion}.")
+                captura = tablero.agregar_ficha(ficha, nueva_posicion)
                 if captura:
-                    jugador.movimientos_extra = 20
-                    print("¡Capturaste una ficha enemiga, ahora tienes 20 movimientos extra!")
-        # Caso para fichas ya en zona interna
-        else:
-            # Encuentra el índice actual en la zona interna
-            for i, pos in enumerate(self.tablero.llegadas[jugador.color]):
-                if pos == posicionact:
-                    indice_actual = i
-                    break
-            nuevo_indice = indice_actual + avance
-            nueva_posicion = self.tablero.casilla_internas(jugador.color, nuevo_indice)
-            ficha.mover(nueva_posicion)
-            print(f"Ficha {ficha.id} de color {ficha.color} movida a la casilla interna {nueva_posicion}.")
-            
+                    jugador.movimientos_extra = self.reglas.extra_captura
+                    if self.instrumentacion is not None:
+                        self.instrumentacion.contar("captura")
         jugador.marcar_ultima_ficha(ficha)
+        return posicionact, captura
+
+    def hash_estado(self):
+        """
+        Devuelve el hash Zobrist de 64 bits del estado completo: el del tablero, que
+        se mantiene de forma incremental, combinado con el turno y, por cada jugador,
+        sus pares consecutivos, movimientos extra y última ficha movida.
+        """
+        h = self.tablero.estado.hash
+        reglas = self.reglas
+        if self.jugadores:
+            h ^= reglas.zobrist_turno[reglas.colores.index(self.jugadores[self.turnoact].color)]
+        for jugador in self.jugadores:
+            color = jugador.fichas[0].indice // FICHAS_POR_COLOR
+            h ^= reglas.zobrist_pares[color][jugador.pares_consecutivos] ^ reglas.zobrist_extra[color][jugador.movimientos_extra]
+            if jugador.ultima_ficha_movida is not None:
+                h ^= reglas.zobrist_ultima[jugador.ultima_ficha_movida.indice]
+        return h
+
+    def instantanea(self):
+        """
+        Devuelve el estado completo de la partida en bytes: turno, dados y su modo,
+        reglas, pares consecutivos, movimientos extra y última ficha movida de cada
+        jugador, posiciones y ocupantes de todas las fichas, y los nombres. No incluye
+        el estado del generador de los dados ni las políticas.
+        """
+        estado = self.tablero.estado
+        dados = self.dados
+        reglas = self.reglas.configuracion_json
+        partes = [self.CABECERA_INSTANTANEA.pack(
+            self.MAGICO_INSTANTANEA, self.VERSION_INSTANTANEA, len(self.jugadores), self.turnos,
+            self.turnoact, self.modo_desarrollador, dados.forzar_manual, dados.d1, dados.d2, len(reglas)), reglas]
+        for jugador in self.jugadores:
+            ultima = jugador.ultima_ficha_movida
+            partes.append(self.JUGADOR_INSTANTANEA.pack(
+                jugador.fichas[0].indice // FICHAS_POR_COLOR, jugador.pares_consecutivos,
+                jugador.movimientos_extra, VACIO if ultima is None else ultima.id))
+        partes += (estado.posiciones, estado.movidas, estado.cuentas, estado.ocupantes,
+                   estado.bloqueos.to_bytes((self.tablero.num_casillas + 7) // 8, "little"), estado.hash.to_bytes(8, "little"))
+        for jugador in self.jugadores:
+            nombre = jugador.nombre.encode("utf-8")[:255]
+            partes.append(bytes((len(nombre),)))
+            partes.append(nombre)
+        return b"".join(partes)
+
+    @classmethod
+    def _leer_cabecera(cls, datos):
+        """
+        Valida la cabecera de una instantánea y retorna sus campos, las reglas en JSON
+        y la posición donde siguen los jugadores. Lanza ValueError si no es válida.
+        """
+        cabecera = cls.CABECERA_INSTANTANEA
+        if len(datos) < cabecera.size:
+            raise ValueError("Los datos no son una instantánea de la partida.")
+        magico, version, *campos, largo = cabecera.unpack_from(datos)
+        if magico != cls.MAGICO_INSTANTANEA:
+            raise ValueError("Los datos no son una instantánea de la partida.")
+        if version != cls.VERSION_INSTANTANEA:
+            raise ValueError(f"Versión de instantánea no soportada: {version}")
+        if len(datos) < cabecera.size + largo:
+            raise ValueError("La instantánea está incompleta.")
+        return campos, bytes(datos[cabecera.size:cabecera.size + largo]), cabecera.size + largo
+
+    @classmethod
+    def reglas_de_instantanea(cls, datos):
+        """Las reglas (sin compilar) de la partida que guardó la instantánea."""
+        try:
+            return Reglas(**json.loads(cls._leer_cabecera(datos)[1]))
+        except (TypeError, UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError("La instantánea no tiene reglas válidas.") from None
+
+    def restaurar(self, datos):
+        """
+        Vuelve al estado guardado con instantanea. Si el juego no tiene jugadores los
+        crea, sin política; si los tiene, deben ser los mismos colores en el mismo orden.
+        El juego debe tener las mismas reglas que el que guardó la instantánea (ver
+        reglas_de_instantanea). Lanza ValueError si los datos no son una instantánea
+        válida, están cortados o son de otras reglas; en ese caso el juego no cambia.
+        """
+        (num_jugadores, turnos, turnoact, modo, manual, d1, d2), reglas, pos = self._leer_cabecera(datos)
+        if reglas != self.reglas.configuracion_json:
+            raise ValueError("La instantánea es de una partida con otras reglas.")
+        estado = self.tablero.estado
+        num_fichas = len(estado.posiciones)
+        casillas = self.tablero.num_casillas
+        largos = (num_fichas, num_fichas, casillas, 2 * casillas, (casillas + 7) // 8, 8)
+        # Todo lo que sigue a la cabecera, salvo los nombres, tiene largo fijo
+        if len(datos) < pos + num_jugadores * self.JUGADOR_INSTANTANEA.size + sum(largos):
+            raise ValueError("La instantánea está incompleta.")
+        jugadores = []
+        for _ in range(num_jugadores):
+            jugadores.append(self.JUGADOR_INSTANTANEA.unpack_from(datos, pos))
+            pos += self.JUGADOR_INSTANTANEA.size
+        tramos = []
+        for largo in largos:
+            tramos.append(datos[pos:pos + largo])
+            pos += largo
+        nombres = []
+        for _ in range(num_jugadores):
+            if pos >= len(datos) or pos + 1 + datos[pos] > len(datos):
+                raise ValueError("La instantánea está incompleta.")
+            nombres.append(bytes(datos[pos + 1:pos + 1 + datos[pos]]))
+            pos += 1 + datos[pos]
+        if pos != len(datos):
+            raise ValueError("La instantánea tiene datos de más.")
+
+        if not self.jugadores:
+            for (color, *_), nombre in zip(jugadores, nombres):
+                self.agregarjugador(nombre.decode("utf-8"), self.reglas.colores[color])
+        elif [self.reglas.colores.index(j.color) for j in self.jugadores] != [color for color, *_ in jugadores]:
+            raise ValueError("La instantánea es de otros jugadores.")
+
+        estado.posiciones[:], estado.movidas[:], estado.cuentas[:], estado.ocupantes[:] = tramos[:4]
+        estado.bloqueos = int.from_bytes(tramos[4], "little")
+        estado.hash = int.from_bytes(tramos[5], "little")
+        estado.recalcular_grupos()
+        for jugador, (_, pares, extra, ultima) in zip(self.jugadores, jugadores):
+            jugador.pares_consecutivos = pares
+            jugador.movimientos_extra = extra
+            jugador.ultima_ficha_movida = None if ultima == VACIO else jugador.fichas[ultima]
+        self.turnos = turnos
+        self.turnoact = turnoact
+        self.modo_desarrollador = self.dados.modo_desarrollador = bool(modo)
+        self.dados.forzar_manual = bool(manual)
+        self.dados.d1, self.dados.d2 = d1, d2
+        self.pila_deshacer.clear()
+
+    def bifurcar(self, semilla=None):
+        """
+        Devuelve una partida silenciosa e independiente en el mismo estado, con las
+        mismas políticas y dados propios (con la semilla dada). Nunca pide los dados
+        por consola, para poder explorar "qué pasaría si" desde la posición actual.
+        """
+        copia = Juego(self.modo_desarrollador, silencioso=True, semilla=semilla, reglas=self.reglas)
+        for jugador in self.jugadores:
+            copia.agregarjugador(jugador.nombre, jugador.color, jugador.politica)
+        copia.restaurar(self.instantanea())
+        copia.dados.forzar_manual = False
+        return copia
+
+    def opciones_dado(self, jugador, avance):
+        """Devuelve los movimientos posibles con un dado: pasar o mover una ficha que pueda moverse."""
+        opciones = [Movimiento(PASAR, None, avance)]
+        for ficha in jugador.fichasactivas():
+            if jugador.puede_mover_ficha(ficha, avance):
+                opciones.append(Movimiento(MOVER, ficha.id, avance))
+        return opciones
+
+    def generar_movimientos(self, jugador, d1, d2):
+        """
+        Genera todas las jugadas legales para una tirada, ya aplicada la regla de pares.
+        Cada jugada es una tupla de Movimiento: la salida de la cárcel cuando es
+        obligatoria, o la elección para el primer dado seguida de la del segundo.
+        Los movimientos extra que se ganen se eligen después, uno a uno, con
+        generar_movimientos_extra, porque cada uno puede otorgar más.
+        """
+        if self.puede_sacar_ficha(jugador, d1, d2):
+            return [(Movimiento(SALIR, jugador.fichas_carcel()[0].id, 0),)]
+        jugadas = []
+        for primero in self.opciones_dado(jugador, d1):
+            # La validez del segundo dado depende de cómo quedó el tablero tras el primero
+            self.hacer(jugador, primero)
+            for segundo in self.opciones_dado(jugador, d2):
+                jugadas.append((primero, segundo))
+            self.deshacer()
+        return jugadas
+
+    def generar_movimientos_extra(self, jugador):
+        """Devuelve las opciones para el siguiente movimiento extra (vacía si no quedan)."""
+        if jugador.movimientos_extra <= 0:
+            return []
+        opciones = [Movimiento(TERMINAR, None, 0)]
+        for ficha in jugador.fichasactivas():
+            if jugador.puede_mover_ficha(ficha, 1):
+                opciones.append(Movimiento(EXTRA, ficha.id, 1))
+        return opciones
+
+    def hacer(self, jugador, movimiento):
+        """
+        Aplica un movimiento sin escribir en la consola y guarda en la pila de
+        deshacer lo necesario para revertirlo: posiciones previas de las fichas
+        (incluidas las capturadas o reiniciadas), las casillas que cambian,
+        movimientos_extra, pares_consecutivos y ultima_ficha_movida, además
+        del hash y las máscaras de bloqueos, cárcel y llegada del tablero.
+        Retorna False, sin cambiar nada, si el movimiento no es legal.
+        """
+        tipo = movimiento.tipo
+        tablero = self.tablero
+        estado = tablero.estado
+        casillas = ()
+        if tipo == MOVER or tipo == EXTRA:
+            ficha = jugador.fichas[movimiento.ficha]
+            if not jugador.puede_mover_ficha(ficha, movimiento.avance):
+                return False
+            origen = estado.posiciones[ficha.indice]
+            casillas = (origen, tablero.destinos[jugador.color][origen][movimiento.avance])
+        elif tipo == SALIR:
+            ficha = jugador.fichas[movimiento.ficha]
+            if not ficha.carcel:
+                return False
+            casillas = (tablero.salidas[jugador.color],)
+        elif tipo == CASTIGO:
+            ficha = jugador.ultima_ficha_movida
+            if ficha is not None:
+                casillas = (estado.posiciones[ficha.indice],)
+        elif tipo != PASAR and tipo != TERMINAR:
+            raise ValueError(f"Tipo de movimiento desconocido: {tipo}")
+
+        ocupantes = estado.ocupantes
+        self.pila_deshacer.append((
+            jugador, jugador.movimientos_extra, jugador.pares_consecutivos, jugador.ultima_ficha_movida,
+            estado.posiciones[:], estado.movidas[:], estado.bloqueos, estado.hash, estado.carcel, estado.llegada,
+            [(c, estado.cuentas[c], ocupantes[2 * c], ocupantes[2 * c + 1]) for c in casillas if c < tablero.num_casillas],
+        ))
+
+        if tipo == MOVER:
+            self.aplicar_movimiento(jugador, ficha, movimiento.avance)
+        elif tipo == EXTRA:
+            self.aplicar_movimiento(jugador, ficha, 1)
+            jugador.movimientos_extra -= 1
+        elif tipo == SALIR:
+            self.aplicar_salida(jugador, ficha)
+        elif tipo == TERMINAR:
+            jugador.movimientos_extra = 0
+        elif tipo == CASTIGO:
+            if ficha is not None:
+                tablero.quitar_ficha(ficha)
+                ficha.reiniciar()
+            jugador.pares_consecutivos = 0
         return True
 
+    def deshacer(self):
+        """Revierte el último movimiento aplicado con hacer."""
+        (jugador, movimientos_extra, pares_consecutivos, ultima_ficha_movida,
+         posiciones, movidas, bloqueos, hash_tablero, carcel, llegada, casillas) = self.pila_deshacer.pop()
+        estado = self.tablero.estado
+        estado.posiciones[:] = posiciones
+        estado.movidas[:] = movidas
+        estado.bloqueos = bloqueos
+        estado.hash = hash_tablero
+        estado.carcel = carcel
+        estado.llegada = llegada
+        for casilla, cuenta, primero, segundo in casillas:
+            estado.cuentas[casilla] = cuenta
+            estado.ocupantes[2 * casilla] = primero
+            estado.ocupantes[2 * casilla + 1] = segundo
+        jugador.movimientos_extra = movimientos_extra
+        jugador.pares_consecutivos = pares_consecutivos
+        jugador.ultima_ficha_movida = ultima_ficha_movida
+
     def jugarturno(self):
         """
         Ejecuta un turno completo de un jugador.
         Retorna True si el jugador ha ganado, False en caso contrario.
         """
+        return self.conducir(self.pasos_turno())
+
+    def conducir(self, pasos):
+        """
+        Ejecuta un generador de pasos respondiendo cada pedido de ficha con
+        elegir_ficha (la política del jugador o la consola). Retorna su resultado.
+        """
+        try:
+            pedido = next(pasos)
+            while True:
+                pedido = pasos.send(self.elegir_ficha(*pedido))
+        except StopIteration as fin:
+            return fin.value
+
+    def pasos_turno(self, consola=True):
+        """
+        Generador con la lógica de un turno completo. Cada vez que hay que elegir
+        una ficha cede (jugador, mensaje, fichasact, avance) y recibe el id de la
+        ficha elegida o None para pasar; así el turno puede esperar a un jugador remoto.
+        Con consola=True, un jugador sin política usa sus movimientos extra por
+        consola. Retorna True si el jugador ha ganado.
+        """
         jugador = self.jugadores[self.turnoact]
-        print(f"\nTurno del jugador {jugador.nombre}, color {jugador.color}")
-        print("Estado de las fichas:")
-        for ficha in jugador.fichas:
-            print(f"Ficha {ficha.id}: {ficha}")
+        instrumentacion = self.instrumentacion
+        if instrumentacion is not None:
+            inicio_turno = instante = time.perf_counter_ns()
+        if self.consejero is not None:
+            self.consejero.anticipar(self)
+        self.turnos += 1
+        self.eventos.emitir("turno", jugador)
+        if self.dados.forzar_manual:
+            self.eventos.vaciar()
             
         d1, d2 = self.dados.lanzar()
-        print(f"Dados: {d1}, {d2}")
+        self.eventos.emitir("tirada", jugador, d1, d2)
+        if self.registro is not None:
+            self.registro.tirada(self.turnoact, d1, d2)
         
         # Maneja pares consecutivos
+        if instrumentacion is not None:
+            instante = time.perf_counter_ns()
         repetir_turno = self.manejar_pares_consecutivos(jugador, d1, d2)
+        if instrumentacion is not None:
+            instante = instrumentacion.medir("pares", instante)
         
         # Intenta sacar una ficha de la cárcel
         ficha_sacada = self.sacar_ficha_carcel(jugador, d1, d2)
+        if instrumentacion is not None:
+            instrumentacion.medir("carcel", instante)
         
         # Si no sacó una ficha, puede mover las fichas activas
         if not ficha_sacada:
-            fichasact = jugador.fichasactivas()
-            if not fichasact:
-                print("No tienes fichas para mover.")
-            else:
-                print("Fichas activas:")
-                for i, ficha in enumerate(fichasact):
-                    print(f"{i + 1}: {ficha}")
-                    
-                # Mover con el primer dado
-                ficha_idx = self.solicitar_ficha(f"Elige una ficha para mover {d1} casillas (1-{len(fichasact)}, 0 para pasar): ", fichasact)
-                if ficha_idx is not None:
-                    self.mover_ficha(jugador, ficha_idx, d1)
-                    
-                # Actualizar lista de fichas activas para el segundo dado
-                fichasact = jugador.fichasactivas()
-                
-                # Mover con el segundo dado
-                ficha_idx = self.solicitar_ficha(f"Elige una ficha para mover {d2} casillas (1-{len(fichasact)}, 0 para pasar): ", fichasact)
-                if ficha_idx is not None:
-                    self.mover_ficha(jugador, ficha_idx, d2)
+            yield from self.pasos_mover_con_dados(jugador, d1, d2)
         
         # Maneja los movimientos extra
+        if instrumentacion is not None:
+            instante = time.perf_counter_ns()
+        if consola and jugador.politica is None:
+            self.usar_movimientos_extra(jugador)
+        else:
+            yield from self.pasos_movimientos_extra(jugador)
+        if instrumentacion is not None:
+            instrumentacion.medir("extra", instante)
+        gano = self.finalizar_turno(jugador, repetir_turno)
+        if instrumentacion is not None:
+            instrumentacion.medir("turno", inicio_turno)
+        # La posición del siguiente turno ya se conoce: se empieza a calcular mientras se espera
+        if self.consejero is not None and not gano:
+            self.consejero.anticipar(self)
+        return gano
+
+    def pasos_mover_con_dados(self, jugador, d1, d2):
+        """Generador que pide una ficha para cada dado y la mueve."""
+        fichasact = jugador.fichasactivas()
+        if not fichasact:
+            self.mostrar("No tienes fichas para mover.")
+            return
+        self.eventos.emitir("fichas", fichasact)
+        if jugador.politica is not None:
+            jugador.politica.preparar_tirada(self, jugador, d1, d2)
+        elif self.consejero is not None:
+            self.sugerir(jugador, fichasact, self.consejero.consejo(self, jugador, d1, d2))
+            
+        # Mover con cada dado; las fichas activas se vuelven a leer (sin copiarlas) para el segundo
+        for avance in (d1, d2):
+            instrumentacion = self.instrumentacion
+            if instrumentacion is not None:
+                instante = time.perf_counter_ns()
+            ficha_id = yield jugador, f"Elige una ficha para mover {avance} casillas (1-{len(fichasact)}, 0 para pasar): ", fichasact, avance
+            if instrumentacion is not None:
+                instante = instrumentacion.medir("seleccion", instante)
+            if ficha_id is not None:
+                self.mover_ficha(jugador, ficha_id, avance)
+                if instrumentacion is not None:
+                    instrumentacion.medir("mover_ficha", instante)
+            if self.registro is not None:
+                self.registro.movimiento(jugador, ficha_id, avance)
+            fichasact = jugador.fichasactivas()
+
+    def sugerir(self, jugador, fichasact, jugada):
+        """Muestra la jugada de un Consejero con los números que escribiría el jugador."""
+        if jugada is None:
+            return
+        partes = []
+        for movimiento in jugada:
+            ficha_id = _id_de_ficha(fichasact, movimiento)
+            if ficha_id is None:
+                partes.append(f"pasa con el {movimiento.avance}")
+            else:
+                numero = next(i for i, ficha in enumerate(fichasact, 1) if ficha.id == ficha_id)
+                partes.append(f"mueve la ficha {numero} con el {movimiento.avance}")
+        self.mostrar("Sugerencia:", ", ".join(partes) + ".")
+
+    def usar_movimientos_extra(self, jugador):
+        """Pide y aplica, de 1 en 1, los movimientos extra que tenga el jugador."""
+        if jugador.politica is not None:
+            self.conducir(self.pasos_movimientos_extra(jugador))
+            return
         while jugador.movimientos_extra > 0:
             fichasact = jugador.fichasactivas()
             if not fichasact:
-                print("No tienes fichas para usar tus movimientos extra.")
-                jugador.movimientos_extra = 0
+                self.mostrar("No tienes fichas para usar tus movimientos extra.")
+                self.terminar_extra(jugador)
                 break
-                
-            print(f"Te quedan {jugador.movimientos_extra} movimientos extra.")
-            print("Fichas disponibles para mover:")
+
+            self.mostrar(f"Te quedan {jugador.movimientos_extra} movimientos extra.")
+            self.mostrar("Fichas disponibles para mover:")
             for i, ficha in enumerate(fichasact):
-                print(f"{i + 1}: {ficha}")
+                self.mostrar(f"{i + 1}: {ficha}")
                 
             try:
-                ficha_idx = int(input(f"Elige una ficha para mover (1-{len(fichasact)}, 0 para pasar): ")) - 1
+                ficha_idx = int(self.preguntar(f"Elige una ficha para mover (1-{len(fichasact)}, 0 para pasar): ")) - 1
                 if ficha_idx < 0:
-                    jugador.movimientos_extra = 0
+                    self.terminar_extra(jugador)
                     break
-                if self.mover_ficha(jugador, ficha_idx, 1):  # Los movimientos extra son de 1 en 1
+                # Un número fuera de rango se pasa como un id inválido
+                ficha_id = fichasact[ficha_idx].id if ficha_idx < len(fichasact) else -1
+                movida = self.mover_ficha(jugador, ficha_id, 1)  # Los movimientos extra son de 1 en 1
+                if self.registro is not None:
+                    self.registro.extra(jugador, ficha_id)
+                if movida:
                     jugador.movimientos_extra -= 1
             except ValueError:
-                print("Entrada inválida. Perdiste un movimiento extra.")
+                self.mostrar("Entrada inválida. Perdiste un movimiento extra.")
                 jugador.movimientos_extra -= 1
-                
-        self.tablero.vertablero()
-        
-        # Verifica si el jugador ha ganado
-        if jugador.ganador():
-            print(f"¡El jugador {jugador.nombre}, color {jugador.color} es el ganador!")
-            return True
-            
-        # Cambia de turno si no sacó par
+                if self.registro is not None:
+                    self.registro.perdido()
+
+    def pasos_movimientos_extra(self, jugador):
+        """
+        Generador que pide y aplica, de 1 en 1, los movimientos extra del jugador.
+        Si pasa o elige una ficha que no puede moverse, se acaban.
+        """
+        while jugador.movimientos_extra > 0:
+            fichasact = jugador.fichasactivas()
+            if not fichasact:
+                self.mostrar("No tienes fichas para usar tus movimientos extra.")
+                self.terminar_extra(jugador)
+                break
+            ficha_id = yield jugador, None, fichasact, 1
+            if ficha_id is None:
+                self.terminar_extra(jugador)
+                break
+            movida = self.mover_ficha(jugador, ficha_id, 1)
+            if self.registro is not None:
+                self.registro.extra(jugador, ficha_id)
+            if not movida:
+                self.terminar_extra(jugador)
+                break
+            jugador.movimientos_extra -= 1
+
+    def terminar_extra(self, jugador):
+        """El jugador pierde los movimientos extra que le queden."""
+        jugador.movimientos_extra = 0
+        if self.registro is not None:
+            self.registro.terminar()
+
+    def finalizar_turno(self, jugador, repetir_turno):
+        """
+        Muestra el tablero, comprueba si el jugador ganó y pasa el turno si no sacó par.
+        Retorna True si el jugador ha ganado.
+        """
+        if self.instrumentacion is None:
+            self.eventos.emitir("tablero", self.tablero)
+        else:
+            instante = time.perf_counter_ns()
+            self.eventos.emitir("tablero", self.tablero)
+            self.instrumentacion.medir("tablero", instante)
+        
+        # Verifica si el jugador ha ganado
+        if jugador.ganador():
+            self.eventos.emitir("ganador", jugador)
+            return True
+            
+        # Cambia de turno si no sacó par
         if not repetir_turno:
             self.cambiodeturno()
         return False
         
     def configurar_juego(self):
         """Configura el juego: modo, jugadores, colores, etc."""
-        print("Configuración del juego:")
+        self.mostrar("Configuración del juego:")
         
         # Configurar modo desarrollador
-        modo = input("¿Quieres activar el modo desarrollador? (si/no): ").lower()
+        modo = self.preguntar("¿Quieres activar el modo desarrollador? (si/no): ").lower()
         self.modo_desarrollador = modo == "si"
-        self.dados = Dados(self.modo_desarrollador)
+        self.dados = Dados(self.modo_desarrollador, generador=self.dados.rng, eventos=self.eventos)
         
         if self.modo_desarrollador:
-            manual = input("¿Quieres forzar los valores de los dados? (si/no): ").lower()
+            manual = self.preguntar("¿Quieres forzar los valores de los dados? (si/no): ").lower()
             self.dados.forzar_manual = manual == "si"
             
         # Configurar número de jugadores
+        maximo = len(self.reglas.colores)
         try:
-            num_jugadores = int(input("Número de jugadores (2-4): "))
-            while num_jugadores < 2 or num_jugadores > 4:
-                num_jugadores = int(input("Número inválido. Número de jugadores (2-4): "))
+            num_jugadores = int(self.preguntar(f"Número de jugadores (2-{maximo}): "))
+            while num_jugadores < 2 or num_jugadores > maximo:
+                num_jugadores = int(self.preguntar(f"Número inválido. Número de jugadores (2-{maximo}): "))
         except ValueError:
-            print("Entrada inválida. Se usarán 2 jugadores por defecto.")
+            self.mostrar("Entrada inválida. Se usarán 2 jugadores por defecto.")
             num_jugadores = 2
             
         # Configurar jugadores
-        colores_disponibles = ["rojo", "azul", "verde", "amarillo"]
+        colores_disponibles = list(self.reglas.colores)
         for i in range(num_jugadores):
-            nombre = input(f"Nombre del jugador {i + 1}: ")
-            print("Colores disponibles:", ", ".join(colores_disponibles))
-            color = input("Elige un color: ").lower()
+            nombre = self.preguntar(f"Nombre del jugador {i + 1}: ")
+            self.mostrar("Colores disponibles:", ", ".join(colores_disponibles))
+            color = self.preguntar("Elige un color: ").lower()
             while color not in colores_disponibles:
-                color = input(f"Color no válido. Por favor elige un color entre {', '.join(colores_disponibles)}: ").lower()
+                color = self.preguntar(f"Color no válido. Por favor elige un color entre {', '.join(colores_disponibles)}: ").lower()
             self.agregarjugador(nombre, color)
             colores_disponibles.remove(color)  # CORRECCIÓN: Eliminar el color elegido de la lista
             
-        print("\n¡Juego configurado! Comencemos...")
+        self.mostrar("\n¡Juego configurado! Comencemos...")
 
     def jugar(self):
         """Ejecuta el juego completo."""
@@ -573,18 +1763,2864 @@ class Juego:
             juego_terminado = self.jugarturno()
             
             if not juego_terminado:
-                continuar = input("¿Quieres continuar jugando? (si/no): ").lower()
+                continuar = self.preguntar("¿Quieres continuar jugando? (si/no): ").lower()
                 if continuar == "no":
                     juego_terminado = True
-                    print("Gracias por jugar, ¡hasta la próxima!")
+                    self.mostrar("Gracias por jugar, ¡hasta la próxima!")
+                    self.cerrar_registro(None)
                     break
                     
             if juego_terminado:
                 ganador = self.jugadores[self.turnoact]
-                print(f"¡Felicidades {ganador.nombre}, eres el ganador!")
+                self.mostrar(f"¡Felicidades {ganador.nombre}, eres el ganador!")
+                self.cerrar_registro(ganador)
+        self.eventos.vaciar()
+
+    def cerrar_registro(self, ganador):
+        """Escribe el resultado en la grabación de la partida, si hay una."""
+        if self.registro is not None:
+            self.registro.fin(self.jugadores.index(ganador) if ganador else None, self.turnos)
+
+    def simular(self, max_turnos=10000):
+        """
+        Juega la partida completa sin intervención humana.
+        Todos los jugadores deben tener una política asignada.
+        Retorna el número de turnos jugados y el ganador (None si se alcanzó max_turnos).
+        """
+        if any(jugador.politica is None for jugador in self.jugadores):
+            raise ValueError("Todos los jugadores necesitan una política para simular.")
+        for turno in range(1, max_turnos + 1):
+            if self.jugarturno():
+                ganador = self.jugadores[self.turnoact]
+                self.cerrar_registro(ganador)
+                self.eventos.vaciar()
+                return turno, ganador
+        self.cerrar_registro(None)
+        self.eventos.vaciar()
+        return max_turnos, None
+
+def simular_partida(politicas, colores=None, max_turnos=10000, semilla=None, grabar=False, contar=False,
+                    reglas=None):
+    """
+    Simula una partida silenciosa con una política por jugador, con las reglas
+    indicadas (por defecto, las clásicas). Con una semilla, los dados son reproducibles.
+    Retorna un diccionario con el ganador (índice del jugador o None), su color y los turnos jugados;
+    con grabar=True incluye también la grabación binaria de la partida en "registro", y con
+    contar=True las capturas y llegadas de cada jugador en "capturas" y "llegadas".
+    En un solo proceso el motor de objetos no llega a miles de partidas por segundo:
+    con PoliticaAvance juega unas 500 a 700 de dos jugadores y 330 a 500 de cuatro
+    (ver partidas.* en ejecutar_benchmarks), porque cada movimiento extra de 1
+    casilla es una decisión de la política, unas 400 por partida. Para miles,
+    simular_partidas reparte las partidas entre procesos y SimuladorLotes las juega
+    vectorizadas, pero solo con las políticas por nombre.
+    """
+    if colores is None:
+        colores = (reglas if reglas is not None else REGLAS_CLASICAS).colores[:len(politicas)]
+    conteo = ConteoEventos() if contar else None
+    juego = Juego(silencioso=True, semilla=semilla, eventos=conteo, reglas=reglas)
+    for i, (politica, color) in enumerate(zip(politicas, colores)):
+        juego.agregarjugador(f"Jugador {i + 1}", color, politica)
+    if grabar:
+        juego.registro = RegistroPartida(juego)
+    turnos, ganador = juego.simular(max_turnos)
+    resultado = {
+        "ganador": juego.jugadores.index(ganador) if ganador else None,
+        "color": ganador.color if ganador else None,
+        "turnos": turnos,
+    }
+    if grabar:
+        resultado["registro"] = juego.registro.datos()
+    if contar:
+        resultado["capturas"] = [conteo.capturas[color] for color in colores]
+        resultado["llegadas"] = [conteo.llegadas[color] for color in colores]
+    return resultado
+
+def _valor_z(confianza):
+    """Valor z de la normal para un intervalo de confianza bilateral."""
+    return NormalDist().inv_cdf(0.5 + confianza / 2)
+
+class EstadisticaEnLinea:
+    """
+    Media, varianza, mínimo y máximo de una serie de valores en memoria constante,
+    con el algoritmo de Welford; dos estadísticas se pueden combinar (por ejemplo,
+    las de distintos procesos) sin perder precisión.
+    """
+    __slots__ = ("n", "media", "m2", "minimo", "maximo")
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def agregar(self, valor):
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    def combinar(self, otra):
+        """Agrega los valores resumidos en otra EstadisticaEnLinea."""
+        if otra.n == 0:
+            return
+        n = self.n + otra.n
+        delta = otra.media - self.media
+        self.m2 += otra.m2 + delta * delta * self.n * otra.n / n
+        self.media += delta * otra.n / n
+        self.n = n
+        self.minimo = min(self.minimo, otra.minimo)
+        self.maximo = max(self.maximo, otra.maximo)
+
+    def agregar_lote(self, valores):
+        """Agrega muchos valores a la vez (una lista o un arreglo de NumPy)."""
+        lote = EstadisticaEnLinea()
+        if np is not None and isinstance(valores, np.ndarray):
+            if valores.size == 0:
+                return
+            lote.n = int(valores.size)
+            lote.media = float(valores.mean())
+            lote.m2 = float(((valores - lote.media) ** 2).sum())
+            lote.minimo = valores.min().item()
+            lote.maximo = valores.max().item()
+        else:
+            for valor in valores:
+                lote.agregar(valor)
+        self.combinar(lote)
+
+    @property
+    def varianza(self):
+        """Varianza muestral (0 con menos de dos valores)."""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def semiancho(self, confianza=0.95):
+        """Mitad del ancho del intervalo de confianza de la media."""
+        if self.n < 2:
+            return math.inf
+        return _valor_z(confianza) * math.sqrt(self.varianza / self.n)
+
+    def exportar(self, confianza=0.95):
+        semiancho = self.semiancho(confianza)
+        return {"n": self.n, "media": self.media, "desviacion": math.sqrt(self.varianza),
+                "minimo": self.minimo if self.n else None, "maximo": self.maximo if self.n else None,
+                "intervalo": [self.media - semiancho, self.media + semiancho]}
+
+class Proporcion:
+    """Proporción de éxitos con su intervalo de confianza de Wilson."""
+    __slots__ = ("exitos", "total")
+
+    def __init__(self):
+        self.exitos = 0
+        self.total = 0
+
+    def agregar(self, exito, total=1):
+        self.exitos += int(exito)
+        self.total += total
+
+    def combinar(self, otra):
+        self.agregar(otra.exitos, otra.total)
+
+    @property
+    def valor(self):
+        return self.exitos / self.total if self.total else 0.0
+
+    def intervalo(self, confianza=0.95):
+        """Intervalo de Wilson; es válido también con proporciones cercanas a 0 o 1."""
+        if not self.total:
+            return 0.0, 1.0
+        z = _valor_z(confianza)
+        n = self.total
+        p = self.exitos / n
+        centro = (p + z * z / (2 * n)) / (1 + z * z / n)
+        semiancho = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centro - semiancho), min(1.0, centro + semiancho)
+
+    def semiancho(self, confianza=0.95):
+        bajo, alto = self.intervalo(confianza)
+        return (alto - bajo) / 2
+
+    def exportar(self, confianza=0.95):
+        return {"exitos": self.exitos, "total": self.total, "valor": self.valor,
+                "intervalo": list(self.intervalo(confianza))}
+
+class AgregadorPartidas:
+    """
+    Acumula los resultados de muchas partidas en memoria constante: victorias por
+    asiento y por color, partidas sin ganador, turnos, capturas y llegadas por
+    partida, movimientos extra otorgados por los bonos y cuántas veces gana el
+    jugador que más captura. Acepta resultados de simular_partida (con contar=True)
+    o lotes de SimuladorLotes, y puede detener una corrida al alcanzar la precisión.
+    """
+    def __init__(self, colores, bono_captura=20, bono_llegada=10):
+        self.colores = list(colores)
+        self.bono_captura = bono_captura
+        self.bono_llegada = bono_llegada
+        self.victorias_asiento = [Proporcion() for _ in self.colores]
+        self.victorias_color = {color: Proporcion() for color in self.colores}
+        self.sin_ganador = Proporcion()
+        self.turnos = EstadisticaEnLinea()
+        self.capturas = EstadisticaEnLinea()
+        self.llegadas = EstadisticaEnLinea()
+        self.extra_otorgados = EstadisticaEnLinea()
+        # Entre las partidas con ganador y un único jugador con más capturas
+        self.gana_mas_capturas = Proporcion()
+
+    @property
+    def partidas(self):
+        return self.sin_ganador.total
+
+    def agregar(self, resultado, colores=None):
+        """
+        Agrega el resultado de una partida. colores indica el color de cada asiento
+        si cambia entre partidas (por defecto, los del agregador).
+        """
+        colores = self.colores if colores is None else colores
+        ganador = resultado["ganador"]
+        for asiento, proporcion in enumerate(self.victorias_asiento):
+            proporcion.agregar(asiento == ganador)
+        for asiento, color in enumerate(colores):
+            self.victorias_color[color].agregar(asiento == ganador)
+        self.sin_ganador.agregar(ganador is None)
+        self.turnos.agregar(resultado["turnos"])
+        capturas = resultado.get("capturas")
+        if capturas is not None:
+            llegadas = resultado["llegadas"]
+            self.capturas.agregar(sum(capturas))
+            self.llegadas.agregar(sum(llegadas))
+            self.extra_otorgados.agregar(self.bono_captura * sum(capturas) + self.bono_llegada * sum(llegadas))
+            mas = max(capturas)
+            if ganador is not None and capturas.count(mas) == 1:
+                self.gana_mas_capturas.agregar(capturas[ganador] == mas)
+
+    def agregar_lote(self, resultados):
+        """Agrega los resultados de SimuladorLotes.simular (ganador -1 si no hubo)."""
+        ganador = resultados["ganador"]
+        n = int(ganador.size)
+        for asiento, color in enumerate(self.colores):
+            victorias = int((ganador == asiento).sum())
+            self.victorias_asiento[asiento].agregar(victorias, n)
+            self.victorias_color[color].agregar(victorias, n)
+        self.sin_ganador.agregar(int((ganador < 0).sum()), n)
+        self.turnos.agregar_lote(resultados["turnos"])
+        capturas, llegadas = resultados["capturas"], resultados["llegadas"]
+        self.capturas.agregar_lote(capturas.sum(axis=1))
+        self.llegadas.agregar_lote(llegadas.sum(axis=1))
+        self.extra_otorgados.agregar_lote(self.bono_captura * capturas.sum(axis=1)
+                                          + self.bono_llegada * llegadas.sum(axis=1))
+        mas = capturas.max(axis=1)
+        unico = (capturas == mas[:, None]).sum(axis=1) == 1
+        validas = unico & (ganador >= 0)
+        filas = np.nonzero(validas)[0]
+        self.gana_mas_capturas.agregar(int((capturas[filas, ganador[filas]] == mas[filas]).sum()), int(filas.size))
+
+    def precision_alcanzada(self, precision, confianza=0.95):
+        """True si el intervalo de la tasa de victorias de cada asiento mide a lo sumo ±precision."""
+        return all(p.semiancho(confianza) <= precision for p in self.victorias_asiento)
+
+    def resumen(self, confianza=0.95):
+        """Devuelve todas las estadísticas con sus intervalos, listo para JSON."""
+        return {
+            "partidas": self.partidas,
+            "confianza": confianza,
+            "victorias_asiento": [p.exportar(confianza) for p in self.victorias_asiento],
+            "victorias_color": {color: p.exportar(confianza) for color, p in self.victorias_color.items()},
+            "sin_ganador": self.sin_ganador.exportar(confianza),
+            "turnos": self.turnos.exportar(confianza),
+            "capturas": self.capturas.exportar(confianza),
+            "llegadas": self.llegadas.exportar(confianza),
+            "extra_otorgados": self.extra_otorgados.exportar(confianza),
+            "gana_mas_capturas": self.gana_mas_capturas.exportar(confianza),
+        }
+
+def simular_hasta_precision(politicas, colores=None, precision=0.01, confianza=0.95, minimo=200,
+                            maximo=1000000, cada=200, max_turnos=10000, semilla=None, reglas=None):
+    """
+    Simula partidas por tandas de "cada" hasta que la tasa de victorias de cada asiento
+    se conoce con ±precision (o hasta maximo partidas) y retorna el AgregadorPartidas.
+    Si las políticas son nombres ("aleatoria" o "avance") se usa SimuladorLotes;
+    si son objetos Politica, se juega con simular_partida, una partida por semilla.
+    Con reglas, todas las partidas se juegan con esa variante.
+    """
+    reglas = reglas if reglas is not None else REGLAS_CLASICAS
+    if colores is None:
+        colores = reglas.colores[:len(politicas)]
+    agregador = AgregadorPartidas(colores, reglas.extra_captura, reglas.extra_llegada)
+    lotes = all(isinstance(politica, str) for politica in politicas)
+    simulador = SimuladorLotes(colores, list(politicas), semilla=semilla, reglas=reglas) if lotes else None
+    while agregador.partidas < maximo:
+        tanda = min(cada, maximo - agregador.partidas)
+        if lotes:
+            agregador.agregar_lote(simulador.simular(tanda, max_turnos))
+        else:
+            inicio = agregador.partidas
+            for i in range(inicio, inicio + tanda):
+                agregador.agregar(simular_partida(politicas, colores, max_turnos,
+                                                  None if semilla is None else f"{semilla}/{i}", contar=True,
+                                                  reglas=reglas))
+        if agregador.partidas >= minimo and agregador.precision_alcanzada(precision, confianza):
+            break
+    return agregador
+
+class RegistroPartida:
+    """
+    Graba una partida en un formato binario compacto. La cabecera guarda la versión
+    y los jugadores (color y nombre); después va un registro de 4 bytes por cada
+    tirada, salida de la cárcel, movimiento con un dado y movimiento extra, y uno de
+    8 bytes de fin de partida con los turnos en 32 bits. Cada movimiento guarda la
+    casilla en la que quedó la ficha para poder verificar la reproducción. Se pueden
+    concatenar varias partidas en un archivo.
+    """
+    MAGICO = b"PRCH"
+    VERSION = 1
+    CABECERA = struct.Struct("<4sBB")
+    REGISTRO = struct.Struct("<BBBB")
+    FIN_PARTIDA = struct.Struct("<BBxxI")
+    # Tipos de registro
+    TIRADA, SALIDA, MOVIMIENTO, EXTRA, TERMINAR, PERDIDO, FIN = range(1, 8)
+    # Valores especiales para la ficha y la casilla
+    PASA = 255
+    INVALIDA = 254
+    SIN_CASILLA = VACIO
+
+    def __init__(self, juego):
+        self.buffer = bytearray(self.CABECERA.pack(self.MAGICO, self.VERSION, len(juego.jugadores)))
+        for jugador in juego.jugadores:
+            nombre = jugador.nombre.encode("utf-8")[:255]
+            self.buffer += bytes([juego.reglas.colores.index(jugador.color), len(nombre)]) + nombre
+
+    def escribir(self, tipo, a=0, b=0, c=0):
+        self.buffer += self.REGISTRO.pack(tipo, a, b, c)
+
+    def tirada(self, asiento, d1, d2):
+        self.escribir(self.TIRADA, asiento, d1, d2)
+
+    def salida(self, ficha):
+        self.escribir(self.SALIDA, ficha.id, ficha.posicion)
+
+    def movimiento(self, jugador, ficha_id, avance):
+        self.escribir(self.MOVIMIENTO, *self.ficha_y_casilla(jugador, ficha_id), avance)
+
+    def extra(self, jugador, ficha_id):
+        self.escribir(self.EXTRA, *self.ficha_y_casilla(jugador, ficha_id))
+
+    def terminar(self):
+        self.escribir(self.TERMINAR)
+
+    def perdido(self):
+        self.escribir(self.PERDIDO)
+
+    def fin(self, ganador, turnos):
+        self.buffer += self.FIN_PARTIDA.pack(self.FIN, self.PASA if ganador is None else ganador, turnos)
+
+    def ficha_y_casilla(self, jugador, ficha_id):
+        """Id de la ficha elegida (o PASA/INVALIDA) y la casilla en la que quedó."""
+        if ficha_id is None:
+            return self.PASA, self.SIN_CASILLA
+        if not 0 <= ficha_id < FICHAS_POR_COLOR or jugador.fichas[ficha_id].carcel:
+            return self.INVALIDA, self.SIN_CASILLA
+        return ficha_id, jugador.fichas[ficha_id].posicion
+
+    def datos(self):
+        """Devuelve la grabación como bytes."""
+        return bytes(self.buffer)
+
+    def guardar(self, archivo):
+        """Agrega la grabación al final de un archivo binario."""
+        with open(archivo, "ab") as f:
+            f.write(self.buffer)
+
+class ReproductorPartida:
+    """
+    Lee una partida grabada con RegistroPartida y la reconstruye aplicando cada
+    registro con la lógica real de Juego (manejar_pares_consecutivos,
+    sacar_ficha_carcel, mover_ficha y finalizar_turno). Permite ir a cualquier
+    turno y verificar que las casillas y el resultado coinciden con lo grabado.
+    La grabación no guarda las reglas: se reproduce con las indicadas (por
+    defecto, las clásicas), que deben ser las de la partida grabada.
+    """
+    def __init__(self, datos, inicio=0, reglas=None):
+        self.reglas = reglas if reglas is not None else REGLAS_CLASICAS
+        datos = memoryview(datos)
+        magico, version, num_jugadores = RegistroPartida.CABECERA.unpack_from(datos, inicio)
+        if magico != RegistroPartida.MAGICO:
+            raise ValueError("Los datos no son una partida grabada.")
+        if version != RegistroPartida.VERSION:
+            raise ValueError(f"Versión de grabación no soportada: {version}")
+        pos = inicio + RegistroPartida.CABECERA.size
+        self.jugadores = []
+        for _ in range(num_jugadores):
+            color, largo = datos[pos], datos[pos + 1]
+            nombre = bytes(datos[pos + 2:pos + 2 + largo]).decode("utf-8")
+            self.jugadores.append((nombre, self.reglas.colores[color]))
+            pos += 2 + largo
+        # Registros de 4 bytes hasta el de fin (incluido) o el final de los datos
+        self.registros = []
+        self.inicios_turno = []
+        self.resultado = None
+        while pos + 4 <= len(datos):
+            tipo = datos[pos]
+            if tipo == RegistroPartida.FIN:
+                _, ganador, turnos = RegistroPartida.FIN_PARTIDA.unpack_from(datos, pos)
+                self.resultado = (None if ganador == RegistroPartida.PASA else ganador, turnos)
+                pos += RegistroPartida.FIN_PARTIDA.size
+                break
+            if tipo == RegistroPartida.TIRADA:
+                self.inicios_turno.append(len(self.registros))
+            self.registros.append(RegistroPartida.REGISTRO.unpack_from(datos, pos))
+            pos += 4
+        self.fin = pos
+
+    @classmethod
+    def leer_archivo(cls, archivo, reglas=None):
+        """Devuelve un reproductor por cada partida guardada en un archivo."""
+        with open(archivo, "rb") as f:
+            datos = f.read()
+        partidas = []
+        inicio = 0
+        while inicio < len(datos):
+            partida = cls(datos, inicio, reglas)
+            partidas.append(partida)
+            inicio = partida.fin
+        return partidas
+
+    def __len__(self):
+        """Número de turnos grabados."""
+        return len(self.inicios_turno)
+
+    def juego_en(self, turno=None):
+        """
+        Devuelve una partida silenciosa en el estado que tenía al terminar el turno
+        indicado (contando desde 1); sin turno, al final de la grabación.
+        Lanza ValueError si algún registro no coincide con lo que hace la lógica real.
+        """
+        juego = Juego(silencioso=True, reglas=self.reglas)
+        for nombre, color in self.jugadores:
+            juego.agregarjugador(nombre, color)
+        if turno is None or turno >= len(self.inicios_turno):
+            hasta = len(self.registros)
+        else:
+            hasta = self.inicios_turno[turno]
+        jugador = None
+        repetir = False
+        salida_pendiente = False
+        for numero, (tipo, a, b, c) in enumerate(self.registros[:hasta]):
+            if tipo == RegistroPartida.TIRADA:
+                if jugador is not None:
+                    self.cerrar_turno(juego, jugador, repetir, salida_pendiente)
+                if a != juego.turnoact:
+                    raise ValueError(f"Registro {numero}: le tocaba al asiento {juego.turnoact}, no al {a}.")
+                jugador = juego.jugadores[a]
+                juego.turnos += 1
+                juego.dados.d1, juego.dados.d2 = b, c
+                repetir = juego.manejar_pares_consecutivos(jugador, b, c)
+                salida_pendiente = juego.sacar_ficha_carcel(jugador, b, c)
+            elif tipo == RegistroPartida.SALIDA:
+                if not salida_pendiente:
+                    raise ValueError(f"Registro {numero}: la ficha no podía salir de la cárcel.")
+                salida_pendiente = False
+                self.comprobar_casilla(numero, jugador.fichas[a], b)
+            elif tipo == RegistroPartida.MOVIMIENTO:
+                self.mover(juego, jugador, a, c)
+                self.comprobar_casilla(numero, jugador.fichas[a] if a < FICHAS_POR_COLOR else None, b)
+            elif tipo == RegistroPartida.EXTRA:
+                if self.mover(juego, jugador, a, 1):
+                    jugador.movimientos_extra -= 1
+                self.comprobar_casilla(numero, jugador.fichas[a] if a < FICHAS_POR_COLOR else None, b)
+            elif tipo == RegistroPartida.TERMINAR:
+                jugador.movimientos_extra = 0
+            elif tipo == RegistroPartida.PERDIDO:
+                jugador.movimientos_extra -= 1
+            else:
+                raise ValueError(f"Registro {numero}: tipo desconocido {tipo}.")
+        if jugador is not None:
+            self.cerrar_turno(juego, jugador, repetir, salida_pendiente)
+        return juego
+
+    def mover(self, juego, jugador, ficha_id, avance):
+        """Repite la elección de una ficha con mover_ficha; retorna si se movió."""
+        if ficha_id == RegistroPartida.PASA:
+            return False
+        if ficha_id == RegistroPartida.INVALIDA:
+            return juego.mover_ficha(jugador, -1, avance)
+        if jugador.fichas[ficha_id].carcel:
+            raise ValueError(f"La ficha {ficha_id} de {jugador.color} no está en juego.")
+        return juego.mover_ficha(jugador, ficha_id, avance)
+
+    def comprobar_casilla(self, numero, ficha, casilla):
+        """Verifica que la ficha quedó en la casilla grabada."""
+        if ficha is None:
+            return
+        actual = RegistroPartida.SIN_CASILLA if ficha.carcel else ficha.posicion
+        if actual != casilla:
+            raise ValueError(f"Registro {numero}: la ficha {ficha.id} de {ficha.color} quedó en {actual}, no en {casilla}.")
+
+    def cerrar_turno(self, juego, jugador, repetir, salida_pendiente):
+        """Termina el turno reproducido con finalizar_turno."""
+        if salida_pendiente:
+            raise ValueError(f"Turno {juego.turnos}: falta el registro de la salida de la cárcel.")
+        if jugador.movimientos_extra > 0:
+            raise ValueError(f"Turno {juego.turnos}: quedaron {jugador.movimientos_extra} movimientos extra sin usar.")
+        juego.finalizar_turno(jugador, repetir)
+
+    def verificar(self):
+        """
+        Reproduce la partida completa y comprueba el resultado grabado.
+        Retorna la partida reconstruida o lanza ValueError si algo no coincide.
+        """
+        juego = self.juego_en()
+        if self.resultado is None:
+            raise ValueError("La grabación no tiene registro de fin.")
+        ganador = next((i for i, jugador in enumerate(juego.jugadores) if jugador.ganador()), None)
+        if self.resultado != (ganador, juego.turnos):
+            raise ValueError(f"Resultado grabado {self.resultado}, reproducido {(ganador, juego.turnos)}.")
+        return juego
+
+def _procesos_pueden_importar():
+    """
+    Indica si un grupo de procesos puede cargar este módulo en sus trabajadores. Con
+    fork lo heredan; con spawn o forkserver lo importan por su nombre, lo que falla
+    (BrokenProcessPool) si se cargó desde su ruta con importlib bajo un nombre que no
+    se encuentra en sys.path. El programa principal se vuelve a ejecutar por su ruta.
+    """
+    if multiprocessing.get_start_method() == "fork":
+        return True
+    if __name__ == "__main__":
+        return getattr(sys.modules["__main__"], "__file__", None) is not None
+    spec = importlib.machinery.PathFinder.find_spec(__name__)
+    return spec is not None and spec.origin is not None and os.path.exists(spec.origin) \
+        and os.path.samefile(spec.origin, __file__)
+
+# Reglas compiladas por su JSON en las instantáneas, para compilarlas una sola vez por proceso
+_REGLAS_ROLLOUTS = {}
+
+def _juego_para_rollouts(resumen):
+    """
+    Reconstruye una partida silenciosa a partir de una instantánea, con sus reglas y
+    PoliticaAvance en todos los asientos.
+    """
+    clave = Juego._leer_cabecera(resumen)[1]
+    if clave not in _REGLAS_ROLLOUTS:
+        _REGLAS_ROLLOUTS[clave] = Juego.reglas_de_instantanea(resumen).compilar()
+    juego = Juego(silencioso=True, reglas=_REGLAS_ROLLOUTS[clave])
+    juego.restaurar(resumen)
+    politica = PoliticaAvance()
+    for jugador in juego.jugadores:
+        jugador.politica = politica
+    return juego
+
+def _valor_para(juego, asiento, ganador):
+    """
+    Valor entre 0 y 1 de la partida para el jugador del asiento: 1 si ganó, 0 si ganó
+    otro y, si no terminó, su parte de la distancia restante frente al mejor rival.
+    """
+    if ganador is not None:
+        return 1.0 if ganador is juego.jugadores[asiento] else 0.0
+    propia = juego.jugadores[asiento].distancia_restante()
+    rival = min(jugador.distancia_restante() for i, jugador in enumerate(juego.jugadores) if i != asiento)
+    if propia + rival == 0:
+        return 0.5
+    return rival / (propia + rival)
+
+# Claves Zobrist de cada tirada, que separan los nodos de decisión de una misma posición
+_CLAVES_TIRADA = _claves_zobrist(7, 7, random.Random(0xD4D0))
+
+def _ucb1(conteos, visitas, sumas, exploracion):
+    """Elige con UCB1 la opción a simular; primero las que no tienen simulaciones."""
+    for i, conteo in enumerate(conteos):
+        if conteo == 0:
+            return i
+    logaritmo = math.log(sum(conteos))
+    return max(range(len(conteos)), key=lambda i: (sumas[i] / visitas[i] if visitas[i] else 0.5)
+               + exploracion * math.sqrt(logaritmo / conteos[i]))
+
+class _NodoDecision:
+    """Nodo del árbol de PoliticaMCTS: las jugadas de una posición con unos dados y sus estadísticas."""
+    __slots__ = ("opciones", "visitas", "sumas")
+
+    def __init__(self, opciones):
+        self.opciones = opciones
+        self.visitas = [0] * len(opciones)
+        self.sumas = [0.0] * len(opciones)
+
+class _PoliticaArbol(Politica):
+    """
+    Política de todos los asientos en las simulaciones de PoliticaMCTS. En cada
+    tirada busca en la tabla el nodo de la posición con esos dados: si está, elige la
+    jugada con UCB1 desde el punto de vista del jugador que tira; si no, crea el nodo
+    (uno por simulación) y prueba una de sus jugadas. Más allá del árbol, y en los
+    movimientos extra, juega como PoliticaAvance. Anota el camino para repartir el
+    resultado de la simulación.
+    """
+    def __init__(self, tabla, exploracion):
+        self.tabla = tabla
+        self.exploracion = exploracion
+        self.avance = PoliticaAvance()
+        self.camino = []
+        self.expandir = True
+        self.plan = []
+
+    def reiniciar(self):
+        self.camino = []
+        self.expandir = True
+        self.plan = []
+
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        self.plan = []
+        clave = juego.hash_estado() ^ _CLAVES_TIRADA[d1][d2]
+        guardado = self.tabla.buscar(clave)
+        if guardado is not None:
+            nodo = guardado[0]
+        elif self.expandir:
+            self.expandir = False
+            nodo = _NodoDecision(juego.generar_movimientos(jugador, d1, d2))
+            self.tabla.guardar(clave, nodo)
+        else:
+            return
+        if len(nodo.opciones) > 1:
+            i = _ucb1(nodo.visitas, nodo.visitas, nodo.sumas, self.exploracion)
+            self.camino.append((nodo, i, juego.jugadores.index(jugador)))
+        else:
+            i = 0
+        self.plan = list(nodo.opciones[i])
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        if self.plan:
+            return _id_de_ficha(fichasact, self.plan.pop(0))
+        return self.avance.elegir_ficha(juego, jugador, fichasact, avance)
+
+def _terminar_simulacion(juego, max_turnos, finales):
+    """
+    Sigue una simulación hasta que alguien gana o pasan max_turnos y retorna el valor
+    de cada asiento (ver _valor_para). Con una TablaFinales se detiene en el primer
+    turno cuya posición tiene valor exacto en ella: su probabilidad es el valor del
+    jugador que tira y el resto, el del rival.
+    """
+    if finales is None:
+        ganador = juego.simular(max_turnos)[1]
+    else:
+        ganador = None
+        for _ in range(max_turnos):
+            jugador = juego.jugadores[juego.turnoact]
+            valor = finales.valor(juego, jugador)
+            if valor is not None:
+                juego.eventos.vaciar()
+                return [valor if otro is jugador else 1.0 - valor for otro in juego.jugadores]
+            if juego.jugarturno():
+                ganador = jugador
+                break
+        juego.eventos.vaciar()
+    return [_valor_para(juego, asiento, ganador) for asiento in range(len(juego.jugadores))]
+
+def _buscar_arbol(resumen, asiento, opciones, visitas, sumas, limite, semilla, max_turnos, exploracion, tabla,
+                  finales=None):
+    """
+    Hace simulaciones desde la instantánea hasta el límite de tiempo (de
+    time.perf_counter). Cada una elige con UCB1 una opción (tupla de Movimiento) del
+    jugador del asiento, la aplica, termina su turno y sigue la partida con
+    _PoliticaArbol en todos los asientos, con dados al azar, hasta que alguien gana,
+    pasan max_turnos o llega a una posición de la TablaFinales (finales), si se da.
+    El valor final de cada jugador (ver _terminar_simulacion) se suma a las jugadas
+    del camino que él eligió y, el del asiento, a la opción de la raíz.
+    Actualiza visitas y sumas y los nodos de la tabla; retorna las simulaciones hechas.
+    """
+    dados = Dados(semilla=semilla)
+    juego = _juego_para_rollouts(resumen)
+    juego.dados = dados
+    arbol = _PoliticaArbol(tabla, exploracion)
+    for jugador in juego.jugadores:
+        jugador.politica = arbol
+    simulaciones = 0
+    while time.perf_counter() < limite:
+        # Cada simulación vuelve a la posición de partida restaurando la instantánea;
+        # los dados de las simulaciones nunca se piden por consola
+        juego.restaurar(resumen)
+        dados.forzar_manual = False
+        arbol.reiniciar()
+        i = _ucb1(visitas, visitas, sumas, exploracion)
+        jugador = juego.jugadores[asiento]
+        for movimiento in opciones[i]:
+            juego.hacer(jugador, movimiento)
+        juego.pila_deshacer.clear()
+        juego.usar_movimientos_extra(jugador)
+        if juego.finalizar_turno(jugador, jugador.pares_consecutivos > 0):
+            valores = [_valor_para(juego, otro, jugador) for otro in range(len(juego.jugadores))]
+        else:
+            valores = _terminar_simulacion(juego, max_turnos, finales)
+        visitas[i] += 1
+        sumas[i] += valores[asiento]
+        for nodo, j, otro in arbol.camino:
+            nodo.visitas[j] += 1
+            nodo.sumas[j] += valores[otro]
+        simulaciones += 1
+    return simulaciones
+
+def _buscar_arbol_en_proceso(resumen, asiento, opciones, visitas, sumas, segundos, semilla, max_turnos,
+                             exploracion, finales=None):
+    """
+    _buscar_arbol durante "segundos" en un proceso de trabajo, con su propio árbol.
+    Retorna las visitas y sumas que agregó a cada opción de la raíz.
+    """
+    nuevas_visitas, nuevas_sumas = list(visitas), list(sumas)
+    _buscar_arbol(resumen, asiento, opciones, nuevas_visitas, nuevas_sumas, time.perf_counter() + segundos,
+                  semilla, max_turnos, exploracion, TablaTransposicion(1 << 14), finales)
+    return ([nueva - vieja for nueva, vieja in zip(nuevas_visitas, visitas)],
+            [nueva - vieja for nueva, vieja in zip(nuevas_sumas, sumas)])
+
+def _id_de_ficha(fichasact, movimiento):
+    """Devuelve el id de la ficha que mueve un Movimiento (None si no mueve ninguna de fichasact)."""
+    if movimiento.tipo != MOVER and movimiento.tipo != EXTRA:
+        return None
+    for ficha in fichasact:
+        if ficha.id == movimiento.ficha:
+            return ficha.id
+    return None
+
+def _estados_carrera(horizonte):
+    """
+    Enumera los estados de carrera de un jugador: tuplas ordenadas con la distancia
+    (de 1 a horizonte) de cada ficha que aún no entra a la zona interna, de 0 a 4
+    fichas y a lo sumo 2 en la misma casilla. Van ordenados por distancia total; el
+    primero es () (no le queda ninguna en el tramo final).
+    """
+    estados = [()]
+    for cantidad in range(1, FICHAS_POR_COLOR + 1):
+        estados.extend(estado for estado in combinations_with_replacement(range(1, horizonte + 1), cantidad)
+                       if all(estado.count(distancia) <= 2 for distancia in set(estado)))
+    estados.sort(key=lambda estado: (sum(estado), len(estado), estado))
+    return estados
+
+def _mascaras_carrera(estado):
+    """Máscaras de bits (por distancia) de las casillas ocupadas y de las bloqueadas de un estado de carrera."""
+    ocupadas = bloqueos = 0
+    for distancia in estado:
+        bloqueos |= ocupadas & 1 << distancia
+        ocupadas |= 1 << distancia
+    return ocupadas, bloqueos
+
+def _avanzar_carrera(estado, avance):
+    """
+    Jugadas con un dado en un estado de carrera, sin contar el paso: mover una de las
+    fichas (una por casilla) que no pase ni caiga en un bloqueo propio. Cada jugada
+    es (estado, llegó, camino, destino): camino es la máscara de las distancias por
+    las que pasa o en la que cae y destino la de la casilla en la que cae (0 si entra
+    a la zona interna), para comprobar los bloqueos y las capturas del rival.
+    """
+    jugadas = []
+    for i, distancia in enumerate(estado):
+        if i and estado[i - 1] == distancia:
+            continue
+        resto = estado[:i] + estado[i + 1:]
+        pasos = range(max(distancia - avance, 1), distancia)
+        if any(resto.count(paso) == 2 for paso in pasos):
+            continue
+        camino = sum(1 << paso for paso in pasos)
+        if avance >= distancia:
+            jugadas.append((resto, True, camino, 0))
+        else:
+            jugadas.append((tuple(sorted(resto + (distancia - avance,))), False, camino,
+                            1 << distancia - avance))
+    return jugadas
+
+def _valor_jugada(continuacion, llegada, jugada, salida):
+    """
+    Valor de una jugada de TablaFinales.construir en todas las posiciones a la vez: el
+    de la posición siguiente en continuacion (en llegada si la ficha entra a la zona
+    interna), 1 si gana con su última ficha, "salida" si captura (la partida sale de
+    la tabla) y -1 si no es legal, para que pierda contra pasar.
+    """
+    siguiente, llega, codigo = jugada
+    if llega is None:
+        valor = continuacion[siguiente]
+    else:
+        valor = np.where(llega[:, None], llegada[siguiente], continuacion[siguiente])
+    return np.where(codigo == 1, valor, np.where(codigo == 2, 1.0, np.where(codigo == 3, salida, -1.0)))
+
+class TablaFinales:
+    """
+    Probabilidades exactas de ganar en las carreras finales de dos jugadores: las
+    posiciones en las que todas las fichas que les quedan a los dos están a lo sumo
+    a "horizonte" casillas de entrar a la zona interna, sin ninguna en la cárcel.
+    Todos los colores entran a su zona interna por las mismas últimas casillas, así
+    que la tabla juega las fichas de los dos en ese tramo: los bloqueos de ambos,
+    que no se pueden pasar ni pisar, los dados en su orden, los pasos, los pares que
+    repiten turno y los 10 movimientos extra por llegada. Una captura o el castigo
+    del tercer par mandan una ficha a la cárcel y la partida sale de la tabla, así
+    que cada posición se resuelve con dos cotas: lo que pasa después de una salida
+    vale 0 para el jugador que tira en la inferior y 1 en la superior. Solo se
+    guardan las posiciones en que las dos coinciden, cuyo valor no depende de cómo
+    siga la partida fuera de la tabla; las demás valen NaN y no están en la tabla.
+    Con el castigo del tercer par, eso deja las posiciones ganadas o perdidas con
+    seguridad. Solo se consulta con dos jugadores, los bonos y el castigo de la
+    tabla y casillas normales en el tramo.
+    valores[i, j, p] es la probabilidad de que gane el jugador que va a tirar con
+    estado i (índices de estados) y p pares seguidos, contra un rival con estado j.
+    Se construye una vez con TablaFinales.construir y se guarda como .npy; al
+    consultarla se abre mapeada en memoria la primera vez que hace falta.
+    """
+    EXTRA_LLEGADA = 10
+    PARES_CASTIGO = 3
+    # Diferencia máxima entre las dos cotas de una posición exacta (por redondeo)
+    EXACTITUD = 1e-9
+
+    def __init__(self, archivo, horizonte=8):
+        if np is None:
+            raise ImportError("TablaFinales necesita NumPy.")
+        if horizonte < 1:
+            raise ValueError("El horizonte debe ser positivo.")
+        self.archivo = archivo
+        self.horizonte = horizonte
+        self.estados = _estados_carrera(horizonte)
+        self.indices = {estado: i for i, estado in enumerate(self.estados)}
+        self.valores = None
+        # Si la tabla sirve para cada configuración de reglas ya vista
+        self.reglas_validas = {}
+
+    def __getstate__(self):
+        # Los procesos de trabajo vuelven a abrir el archivo en lugar de copiar la tabla
+        estado = self.__dict__.copy()
+        estado["valores"] = None
+        return estado
+
+    @classmethod
+    def abrir(cls, archivo):
+        """Abre una tabla ya construida, con el horizonte que corresponde a su tamaño."""
+        if np is None:
+            raise ImportError("TablaFinales necesita NumPy.")
+        filas = np.load(archivo, mmap_mode="r").shape[0]
+        horizonte = 1
+        while len(_estados_carrera(horizonte)) < filas:
+            horizonte += 1
+        tabla = cls(archivo, horizonte)
+        tabla.cargar()
+        return tabla
+
+    def _jugadas(self, avance, ocupadas, bloqueos, gano):
+        """
+        Las jugadas con un dado como arreglos para construir: por cada ficha que se
+        puede elegir, el estado siguiente de cada estado, si entra a la zona interna y
+        un código por posición (0 ilegal, 1 legal, 2 gana con su última ficha, 3
+        captura). La ficha k es la k-ésima jugada de _avanzar_carrera.
+        """
+        n = len(self.estados)
+        jugadas = []
+        for k in range(FICHAS_POR_COLOR):
+            siguiente = np.arange(n)
+            llega = np.zeros(n, dtype=bool)
+            valido = np.zeros(n, dtype=bool)
+            camino = np.zeros(n, dtype=np.int64)
+            destino = np.zeros(n, dtype=np.int64)
+            for i, propio in enumerate(self.estados):
+                opciones = _avanzar_carrera(propio, avance)
+                if k < len(opciones):
+                    nuevo, llega[i], camino[i], destino[i] = opciones[k]
+                    siguiente[i] = self.indices[nuevo]
+                    valido[i] = True
+            if not valido.any():
+                break
+            legal = valido[:, None] & (camino[:, None] & bloqueos[None, :] == 0)
+            captura = legal & (destino[:, None] & ocupadas[None, :] != 0)
+            codigo = legal.astype(np.int8) + (legal & gano[siguiente][:, None]) + 2 * captura
+            jugadas.append((siguiente, llega if llega.any() else None, codigo))
+        return jugadas
+
+    def _sumar_tiradas(self, jugadas, continuacion, nueve, tiradas, salida):
+        """
+        Suma, sobre las tiradas (d1, d2), el valor de la mejor jugada en todas las
+        posiciones: primer dado, segundo dado y movimientos extra, y después
+        continuacion; salida es el valor de una captura. nueve es una cota del valor
+        con 9 movimientos extra, los que quedan al entrar con uno de ellos; retorna la
+        suma y la nueva cota.
+        """
+        anterior = continuacion
+        for restantes in range(1, self.EXTRA_LLEGADA + 1):
+            actual = continuacion
+            for jugada in jugadas[0]:
+                actual = np.maximum(actual, _valor_jugada(anterior, nueve, jugada, salida))
+            if restantes == self.EXTRA_LLEGADA - 1:
+                nuevo_nueve = actual
+            anterior = actual
+        extra = anterior
+        total = 0.0
+        for d2 in sorted({d2 for _, d2 in tiradas}):
+            # Mejor jugada con el segundo dado, sin y con una llegada con el primero
+            sin_llegar, llegado = continuacion, extra
+            for jugada in jugadas[d2 - 1]:
+                sin_llegar = np.maximum(sin_llegar, _valor_jugada(continuacion, extra, jugada, salida))
+                llegado = np.maximum(llegado, _valor_jugada(extra, extra, jugada, salida))
+            for d1 in (d1 for d1, segundo in tiradas if segundo == d2):
+                mejor = sin_llegar
+                for jugada in jugadas[d1 - 1]:
+                    mejor = np.maximum(mejor, _valor_jugada(sin_llegar, llegado, jugada, salida))
+                total = total + mejor
+        return total, nuevo_nueve
+
+    @classmethod
+    def construir(cls, archivo, horizonte=8, tolerancia=1e-9, max_barridos=300):
+        """
+        Calcula la tabla por iteración de valores y la guarda en el archivo. Cada
+        barrido evalúa todas las posiciones a la vez con NumPy: para las 36 tiradas en
+        orden (el primer dado se juega antes) y cada número de pares seguidos, la
+        mejor jugada contra todos los rivales, con sus máscaras de bloqueos y capturas.
+        La cota inferior empieza en 0 y la superior en 1, y siguen siendo cotas en cada
+        barrido: cortar la iteración solo deja menos posiciones exactas.
+        """
+        tabla = cls(archivo, horizonte)
+        n = len(tabla.estados)
+        mascaras = [_mascaras_carrera(propio) for propio in tabla.estados]
+        ocupadas = np.array([ocupada for ocupada, _ in mascaras], dtype=np.int64)
+        bloqueos = np.array([bloqueo for _, bloqueo in mascaras], dtype=np.int64)
+        gano = np.array([not propio for propio in tabla.estados])
+        jugadas = [tabla._jugadas(avance, ocupadas, bloqueos, gano) for avance in range(1, 7)]
+        # Solo las posiciones sin fichas de los dos en una casilla
+        validas = ocupadas[:, None] & ocupadas[None, :] == 0
+        sin_par = [(d1, d2) for d1 in range(1, 7) for d2 in range(1, 7) if d1 != d2]
+        con_par = [(d, d) for d in range(1, 7)]
+        # Cota inferior y superior, cada una con lo que vale salir de la tabla y sus cotas con 9 extra
+        cotas = [np.zeros((n, n, cls.PARES_CASTIGO)), np.ones((n, n, cls.PARES_CASTIGO))]
+        salidas = (0.0, 1.0)
+        nueve = [[np.full((n, n), salida)] * cls.PARES_CASTIGO for salida in salidas]
+        for _ in range(max_barridos):
+            nuevas = []
+            for cota, salida in enumerate(salidas):
+                valores = cotas[cota]
+                nuevos = np.empty_like(valores)
+                # Sin par le toca al rival, sin pares seguidos: la otra cota del rival da esta
+                continuacion = 1.0 - cotas[1 - cota][:, :, 0].T
+                base, nueve[cota][0] = tabla._sumar_tiradas(jugadas, continuacion, nueve[cota][0], sin_par, salida)
+                for pares in range(cls.PARES_CASTIGO):
+                    if pares + 1 < cls.PARES_CASTIGO:
+                        continuacion = np.ascontiguousarray(valores[:, :, pares + 1])
+                        suma, nueve[cota][pares + 1] = tabla._sumar_tiradas(
+                            jugadas, continuacion, nueve[cota][pares + 1], con_par, salida)
+                        nuevos[:, :, pares] = (base + suma) / 36
+                    else:
+                        # El tercer par manda una ficha a la cárcel antes de mover
+                        nuevos[:, :, pares] = (base + len(con_par) * salida) / 36
+                nuevos[:, gano] = 0.0
+                nuevos[gano] = 1.0
+                nuevas.append(nuevos)
+            cambio = max(float(np.abs(nuevos - valores).max(axis=2)[validas].max())
+                         for nuevos, valores in zip(nuevas, cotas))
+            cotas = nuevas
+            if cambio < tolerancia:
+                break
+        inferior, superior = cotas
+        exactas = (superior - inferior <= cls.EXACTITUD) & validas[:, :, None]
+        guardado = np.lib.format.open_memmap(archivo, mode="w+", dtype=np.float64, shape=inferior.shape)
+        # Las sumas de probabilidades pueden pasarse de 1 por redondeo
+        guardado[:] = np.where(exactas, np.clip((inferior + superior) / 2, 0.0, 1.0), np.nan)
+        guardado.flush()
+        del guardado
+        return tabla
+
+    def cargar(self):
+        """Abre la tabla mapeada en memoria si aún no está abierta."""
+        if self.valores is None:
+            valores = np.load(self.archivo, mmap_mode="r")
+            if valores.shape != (len(self.estados), len(self.estados), self.PARES_CASTIGO):
+                raise ValueError(f"{self.archivo} no es una tabla de finales con horizonte {self.horizonte}.")
+            self.valores = valores
+        return self.valores
+
+    def estado(self, juego, jugador):
+        """
+        Distancias ordenadas de las fichas del jugador que no han entrado a la zona
+        interna, o None si tiene alguna en la cárcel o a más del horizonte.
+        """
+        inicio = jugador.fichas[0].indice
+        casillas = juego.tablero.num_casillas
+        distancias = []
+        for posicion in juego.tablero.estado.posiciones[inicio:inicio + FICHAS_POR_COLOR]:
+            if posicion == VACIO or posicion < casillas and casillas - posicion > self.horizonte:
+                return None
+            if posicion < casillas:
+                distancias.append(casillas - posicion)
+        return tuple(sorted(distancias))
+
+    def _sirve_para(self, reglas):
+        """Si las reglas tienen los bonos y el castigo de la tabla y un tramo final de casillas normales."""
+        clave = reglas.configuracion_json
+        if clave not in self.reglas_validas:
+            casillas = reglas.casillas
+            # Entrar con un 6 desde la distancia 1 llega a la sexta casilla de la zona interna
+            self.reglas_validas[clave] = (
+                reglas.extra_llegada == self.EXTRA_LLEGADA and reglas.pares_castigo == self.PARES_CASTIGO
+                and reglas.casillas_internas >= 6 and self.horizonte < casillas
+                and all(reglas.tipos[casillas - distancia] == NORMAL for distancia in range(1, self.horizonte + 1)))
+        return self.reglas_validas[clave]
+
+    def _estados(self, juego, jugador):
+        if len(juego.jugadores) != 2 or not self._sirve_para(juego.reglas):
+            return None
+        rival = juego.jugadores[1] if juego.jugadores[0] is jugador else juego.jugadores[0]
+        propio, otro = self.estado(juego, jugador), self.estado(juego, rival)
+        if propio is None or otro is None:
+            return None
+        return propio, otro
+
+    def valor(self, juego, jugador):
+        """
+        Probabilidad exacta de que gane el jugador si está por tirar, o None si la
+        posición no está en la tabla o su valor no es exacto.
+        """
+        estados = self._estados(juego, jugador)
+        if estados is None:
+            return None
+        valor = float(self.cargar()[self.indices[estados[0]], self.indices[estados[1]], jugador.pares_consecutivos])
+        return None if math.isnan(valor) else valor
+
+    def _valor_extra(self, propio, rival, extra, pares, memo):
+        """
+        Valor exacto del estado propio con "extra" movimientos extra por gastar de la
+        mejor forma, o None si no se conoce; después le toca al rival o, con pares, al
+        mismo jugador otra vez. Una jugada sin valor exacto (o que captura) solo deja
+        de importar si otra gana seguro.
+        """
+        clave = (propio, extra)
+        if clave in memo:
+            return memo[clave]
+        valores = self.cargar()
+        valor = float(valores[propio, rival, pares] if pares else 1.0 - valores[rival, propio, 0])
+        candidatos = [None if math.isnan(valor) else valor]
+        if extra > 0:
+            ocupadas, bloqueos = _mascaras_carrera(self.estados[rival])
+            for nuevo, llego, camino, destino in _avanzar_carrera(self.estados[propio], 1):
+                if camino & bloqueos:
+                    continue
+                if not nuevo:
+                    candidatos.append(1.0)
+                elif destino & ocupadas:
+                    candidatos.append(None)
+                else:
+                    restantes = self.EXTRA_LLEGADA - 1 if llego else extra - 1
+                    candidatos.append(self._valor_extra(self.indices[nuevo], rival, restantes, pares, memo))
+        conocidos = [candidato for candidato in candidatos if candidato is not None]
+        if conocidos and (max(conocidos) == 1.0 or len(conocidos) == len(candidatos)):
+            mejor = max(conocidos)
+        else:
+            mejor = None
+        memo[clave] = mejor
+        return mejor
+
+    def mejor_opcion(self, juego, jugador, opciones):
+        """
+        La opción (tupla de Movimiento) con mayor probabilidad exacta de ganar según la
+        tabla, con los movimientos extra que deje por gastar de la mejor forma, o None
+        si la posición no está en ella o no se sabe cuál es la mejor: una opción que
+        captura o que lleva a una posición sin valor exacto solo se descarta si otra
+        gana seguro. Entre opciones que valen lo mismo elige la que deja menos
+        distancia restante.
+        """
+        estados = self._estados(juego, jugador)
+        if estados is None:
+            return None
+        rival = self.indices[estados[1]]
+        carcel = juego.tablero.estado.carcel
+        memo = {}
+        mejor = None
+        mejor_clave = None
+        desconocida = False
+        for opcion in opciones:
+            for movimiento in opcion:
+                juego.hacer(jugador, movimiento)
+            if jugador.ganador():
+                valor = 1.0
+            elif juego.tablero.estado.carcel != carcel:
+                valor = None
+            else:
+                propio = self.indices[self.estado(juego, jugador)]
+                valor = self._valor_extra(propio, rival, jugador.movimientos_extra, jugador.pares_consecutivos, memo)
+            clave = (valor, -jugador.distancia_restante())
+            for _ in opcion:
+                juego.deshacer()
+            if valor is None:
+                desconocida = True
+            elif mejor is None or clave > mejor_clave:
+                mejor, mejor_clave = opcion, clave
+        if mejor is None or desconocida and mejor_clave[0] < 1.0:
+            return None
+        return mejor
+
+class PoliticaFinales(Politica):
+    """
+    Juega con una TablaFinales las posiciones en que la tabla sabe cuál es la mejor
+    jugada y el resto de la partida con otra política (PoliticaAvance si no se indica).
+    """
+    def __init__(self, finales, respaldo=None):
+        self.finales = finales
+        self.respaldo = respaldo if respaldo is not None else PoliticaAvance()
+        self.plan = []
+
+    def sembrar(self, semilla):
+        self.respaldo.sembrar(semilla)
+
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        mejor = self.finales.mejor_opcion(juego, jugador, juego.generar_movimientos(jugador, d1, d2))
+        self.plan = list(mejor) if mejor is not None else []
+        if mejor is None:
+            self.respaldo.preparar_tirada(juego, jugador, d1, d2)
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        if self.plan:
+            return _id_de_ficha(fichasact, self.plan.pop(0))
+        if jugador.movimientos_extra > 0:
+            opciones = [(opcion,) for opcion in juego.generar_movimientos_extra(jugador)]
+            mejor = self.finales.mejor_opcion(juego, jugador, opciones)
+            if mejor is not None:
+                return _id_de_ficha(fichasact, mejor[0])
+        return self.respaldo.elegir_ficha(juego, jugador, fichasact, avance)
+
+class PoliticaMCTS(Politica):
+    """
+    Jugador por computadora que decide con búsqueda Monte Carlo en árbol (MCTS) con
+    nodos de azar. Los nodos de decisión son una posición con unos dados, guardados
+    en una TablaTransposicion por su hash Zobrist y la tirada, así las posiciones que
+    se repiten comparten estadísticas y se reutilizan en las búsquedas siguientes.
+    Los nodos de azar son las tiradas: cada simulación saca dados al azar, así que
+    cada tirada se explora en proporción a su probabilidad. En cada nodo el jugador
+    que tira elige con UCB1 la jugada que más le conviene a él. Cada simulación
+    agrega un nodo y sigue con PoliticaAvance, que también decide los movimientos
+    extra dentro de las simulaciones, hasta que alguien gana o pasan max_turnos; en
+    ese caso se evalúa por distancia restante. Cada jugada de la raíz empieza con
+    "previas" visitas virtuales valoradas con la distancia restante tras aplicarla,
+    para que pocas simulaciones no dominen la decisión; al final se juega la más
+    visitada.
+    tiempo_ms es el presupuesto de todo un turno: cada decisión usa la mitad de lo que
+    queda, y la última (el último movimiento extra) todo lo que queda.
+    Con una TablaFinales (finales), las simulaciones que llegan a una posición con
+    valor exacto en ella se cortan ahí y valen lo que dice la tabla; las decisiones
+    se siguen tomando con la búsqueda.
+    Con procesos > 1 cada proceso hace su propia búsqueda durante el mismo tiempo y
+    se suman las estadísticas de la raíz; el grupo de procesos se libera con cerrar
+    o usando la política como administrador de contexto (with).
+    """
+    def __init__(self, tiempo_ms=200, procesos=1, max_turnos=30, exploracion=1.4, previas=4,
+                 semilla=None, tabla=None, finales=None):
+        self.tiempo_ms = tiempo_ms
+        self.procesos = procesos
+        self.max_turnos = max_turnos
+        self.exploracion = exploracion
+        self.previas = previas
+        self.rng = random.Random(semilla)
+        self.tabla = tabla if tabla is not None else TablaTransposicion(1 << 14)
+        self.finales = finales
+        # Movimientos ya decididos para los dados de la tirada actual
+        self.plan = []
+        self.grupo = None
+        # Turno del presupuesto en curso (juego y número de turno) y su límite
+        self.turno = None
+        self.limite_turno = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def sembrar(self, semilla):
+        self.rng = random.Random(semilla)
+
+    def limite_decision(self, juego, ultima=False):
+        """
+        Límite de tiempo (de time.perf_counter) de la siguiente decisión del turno en
+        curso: la mitad de lo que queda del presupuesto del turno, o todo si es la última.
+        """
+        ahora = time.perf_counter()
+        turno = (id(juego), juego.turnos)
+        if turno != self.turno:
+            self.turno = turno
+            self.limite_turno = ahora + self.tiempo_ms / 1000
+        restante = max(0.0, self.limite_turno - ahora)
+        return ahora + (restante if ultima else restante / 2)
+
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        opciones = juego.generar_movimientos(jugador, d1, d2)
+        self.plan = list(self.buscar(juego, jugador, opciones, self.limite_decision(juego)))
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        if self.plan:
+            movimiento = self.plan.pop(0)
+        else:
+            if jugador.movimientos_extra > 0:
+                opciones = juego.generar_movimientos_extra(jugador)
+            else:
+                opciones = juego.opciones_dado(jugador, avance)
+            opciones = [(opcion,) for opcion in opciones]
+            movimiento = self.buscar(juego, jugador, opciones,
+                                     self.limite_decision(juego, ultima=jugador.movimientos_extra <= 1))[0]
+        return _id_de_ficha(fichasact, movimiento)
+
+    def buscar(self, juego, jugador, opciones, limite=None):
+        """
+        Retorna la mejor opción encontrada antes del límite de tiempo (de
+        time.perf_counter; por defecto, dentro de tiempo_ms).
+        """
+        if len(opciones) == 1:
+            return opciones[0]
+        if limite is None:
+            limite = time.perf_counter() + self.tiempo_ms / 1000
+        resumen = juego.instantanea()
+        asiento = juego.jugadores.index(jugador)
+        visitas = [0] * len(opciones)
+        sumas = [0.0] * len(opciones)
+        claves = []
+        for i, opcion in enumerate(opciones):
+            for movimiento in opcion:
+                juego.hacer(jugador, movimiento)
+            claves.append(juego.hash_estado())
+            # Visitas virtuales con la evaluación estática de la posición resultante
+            if self.previas:
+                visitas[i] = self.previas
+                sumas[i] = self.previas * _valor_para(juego, asiento, None)
+            for _ in opcion:
+                juego.deshacer()
+            # Recupera lo aprendido si la posición ya se había buscado
+            guardado = self.tabla.buscar(claves[i])
+            if guardado is not None:
+                sumas[i], visitas[i] = guardado[0]
+
+        if self.procesos <= 1 or not _procesos_pueden_importar():
+            _buscar_arbol(resumen, asiento, opciones, visitas, sumas, limite, self.rng.getrandbits(64),
+                          self.max_turnos, self.exploracion, self.tabla, self.finales)
+        else:
+            self.buscar_en_paralelo(resumen, asiento, opciones, visitas, sumas, limite)
 
-def main():
+        self.tabla.nueva_busqueda()
+        for i, clave in enumerate(claves):
+            if visitas[i]:
+                self.tabla.guardar(clave, (sumas[i], visitas[i]), visitas[i])
+        if not any(visitas):
+            return opciones[0]
+        return opciones[max(range(len(opciones)), key=lambda i: (visitas[i], sumas[i]))]
+
+    def buscar_en_paralelo(self, resumen, asiento, opciones, visitas, sumas, limite):
+        """Hace una búsqueda por proceso hasta el límite de tiempo y suma sus estadísticas de la raíz."""
+        if self.grupo is None:
+            self.grupo = ProcessPoolExecutor(self.procesos)
+        # Los relojes de los procesos no se comparan: cada uno recibe los segundos que quedan
+        segundos = max(0.0, limite - time.perf_counter())
+        futuros = [self.grupo.submit(_buscar_arbol_en_proceso, resumen, asiento, opciones, visitas, sumas,
+                                     segundos, self.rng.getrandbits(64), self.max_turnos, self.exploracion,
+                                     self.finales)
+                   for _ in range(self.procesos)]
+        for futuro in futuros:
+            nuevas_visitas, nuevas_sumas = futuro.result()
+            for i in range(len(opciones)):
+                visitas[i] += nuevas_visitas[i]
+                sumas[i] += nuevas_sumas[i]
+
+    def cerrar(self):
+        """Detiene el grupo de procesos, si se creó."""
+        if self.grupo is not None:
+            self.grupo.shutdown(cancel_futures=True)
+            self.grupo = None
+
+def _invertir_jugada(juego, jugador, jugada):
+    """
+    La jugada con los dados en el orden contrario si lleva a la misma posición
+    (salvo la última ficha movida); None si no es legal o cambia el resultado.
+    """
+    for movimiento in jugada:
+        juego.hacer(jugador, movimiento)
+    estado = juego.tablero.estado
+    objetivo = (estado.hash, jugador.movimientos_extra)
+    for _ in jugada:
+        juego.deshacer()
+    invertida = tuple(reversed(jugada))
+    hechos = 0
+    for movimiento in invertida:
+        if not juego.hacer(jugador, movimiento):
+            break
+        hechos += 1
+    igual = hechos == len(invertida) and (estado.hash, jugador.movimientos_extra) == objetivo
+    for _ in range(hechos):
+        juego.deshacer()
+    return invertida if igual else None
+
+def _aconsejar(resumen, asiento, d1, d2, tiempo_ms, max_turnos, semilla):
+    """
+    Decide con PoliticaMCTS la jugada del asiento para la tirada d1, d2 desde una
+    instantánea tomada antes de tirar, y también para la tirada d2, d1. Retorna
+    {(d1, d2): (hash_estado al decidir, jugada)}, con jugada None si con esa tirada
+    no hay nada que elegir (sale de la cárcel o no tiene fichas activas).
+    """
+    juego = _juego_para_rollouts(resumen)
+    jugador = juego.jugadores[asiento]
+    # Igual que en pasos_turno: la regla de pares se aplica antes de elegir
+    juego.manejar_pares_consecutivos(jugador, d1, d2)
+    clave = juego.hash_estado()
+    if juego.puede_sacar_ficha(jugador, d1, d2) or not jugador.fichasactivas():
+        return {(d1, d2): (clave, None), (d2, d1): (clave, None)}
+    buscador = PoliticaMCTS(tiempo_ms, max_turnos=max_turnos, semilla=semilla)
+    jugada = buscador.buscar(juego, jugador, juego.generar_movimientos(jugador, d1, d2))
+    consejos = {(d1, d2): (clave, jugada)}
+    if d1 != d2:
+        invertida = _invertir_jugada(juego, jugador, jugada)
+        if invertida is None:
+            invertida = buscador.buscar(juego, jugador, juego.generar_movimientos(jugador, d2, d1))
+        consejos[(d2, d1)] = (clave, invertida)
+    return consejos
+
+class Consejero:
+    """
+    Aprovecha el tiempo muerto (mientras un humano piensa o juegan los demás) para
+    calcular en segundo plano, con PoliticaMCTS en un grupo de procesos, la mejor
+    jugada del jugador que tiene el turno para las 21 tiradas distintas. Cuando sale
+    la tirada real, el consejo ya está listo: sirve como sugerencia para un humano o
+    como jugada inmediata de PoliticaConsejada. Solo cubre la jugada con los dados;
+    los movimientos extra se deciden aparte.
+    Se activa con Juego.aconsejar, que llama a anticipar al empezar y al terminar
+    cada turno. Si los procesos no pueden cargar este módulo, calcula en un hilo de
+    este proceso, que también sigue mientras se espera al jugador.
+    """
+    def __init__(self, tiempo_ms=200, procesos=None, max_turnos=30, semilla=None):
+        self.tiempo_ms = tiempo_ms
+        self.procesos = (os.cpu_count() or 1) if procesos is None else procesos
+        self.max_turnos = max_turnos
+        self.rng = random.Random(semilla)
+        self.grupo = None
+        # Posición anticipada (hash_estado antes de tirar) y sus cálculos por tirada ordenada
+        self.clave = None
+        self.futuros = {}
+
+    def anticipar(self, juego):
+        """Empieza a calcular los consejos para el jugador que tiene el turno, si no se hizo ya."""
+        clave = juego.hash_estado()
+        if clave == self.clave or not juego.jugadores:
+            return
+        for futuro in self.futuros.values():
+            futuro.cancel()
+        if self.grupo is None:
+            if _procesos_pueden_importar():
+                self.grupo = ProcessPoolExecutor(self.procesos)
+            else:
+                self.grupo = ThreadPoolExecutor(1)
+        self.clave = clave
+        resumen = juego.instantanea()
+        self.futuros = {(d1, d2): self.grupo.submit(_aconsejar, resumen, juego.turnoact, d1, d2, self.tiempo_ms,
+                                                    self.max_turnos, self.rng.getrandbits(64))
+                        for d1 in range(1, 7) for d2 in range(d1, 7)}
+
+    def consejo(self, juego, jugador, d1, d2, esperar=False):
+        """
+        La jugada calculada para esta tirada, o None si no está lista (sin esperar),
+        no se anticipó esta posición o no hay nada que elegir. Se llama con la regla
+        de pares ya aplicada, como preparar_tirada.
+        """
+        futuro = self.futuros.get((min(d1, d2), max(d1, d2)))
+        if futuro is None or futuro.cancelled() or not (esperar or futuro.done()):
+            return None
+        clave, jugada = futuro.result()[(d1, d2)]
+        if clave != juego.hash_estado():
+            return None
+        return jugada
+
+    def cerrar(self):
+        """Detiene el grupo de procesos, si se creó."""
+        if self.grupo is not None:
+            self.grupo.shutdown(cancel_futures=True)
+            self.grupo = None
+        self.clave = None
+        self.futuros = {}
+
+class PoliticaConsejada(Politica):
+    """
+    Juega al instante la jugada que un Consejero calculó de antemano y, si no está
+    lista, decide con otra política (PoliticaMCTS con el mismo tiempo, si no se
+    indica). Con esperar=True espera a que termine el cálculo en curso.
+    """
+    def __init__(self, consejero, respaldo=None, esperar=False):
+        self.consejero = consejero
+        self.respaldo = respaldo if respaldo is not None else PoliticaMCTS(consejero.tiempo_ms)
+        self.esperar = esperar
+        self.plan = []
+
+    def sembrar(self, semilla):
+        self.respaldo.sembrar(semilla)
+
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        jugada = self.consejero.consejo(juego, jugador, d1, d2, self.esperar)
+        self.plan = list(jugada) if jugada is not None else []
+        if jugada is None:
+            self.respaldo.preparar_tirada(juego, jugador, d1, d2)
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        if self.plan:
+            return _id_de_ficha(fichasact, self.plan.pop(0))
+        return self.respaldo.elegir_ficha(juego, jugador, fichasact, avance)
+
+def _jugar_tanda(politicas, colores, semilla, desde, hasta, max_turnos):
+    """
+    Juega las partidas desde..hasta-1 de una mesa del torneo, con una política (y su
+    nombre) por asiento. Cada partida usa la semilla "semilla/i" para los dados y las
+    políticas, así el resultado no depende del proceso que la juegue.
+    Retorna un resultado que se suma con Torneo.combinar.
+    """
+    nombres = [nombre for nombre, _ in politicas]
+    resultado = Torneo.resultado_vacio()
+    for i in range(desde, hasta):
+        semilla_partida = f"{semilla}/{i}"
+        for asiento, (_, politica) in enumerate(politicas):
+            politica.sembrar(f"{semilla_partida}/{asiento}")
+        partida = simular_partida([politica for _, politica in politicas], colores, max_turnos, semilla_partida)
+        ganador = partida["ganador"]
+        resultado["partidas"] += 1
+        resultado["turnos"] += partida["turnos"]
+        for asiento, nombre in enumerate(nombres):
+            resultado["jugadas"][nombre] = resultado["jugadas"].get(nombre, 0) + 1
+            if asiento == ganador:
+                resultado["victorias"][nombre] = resultado["victorias"].get(nombre, 0) + 1
+        # Resultado por parejas: el ganador le gana a cada rival; sin ganador, todos empatan
+        for a, b in permutations(range(len(nombres)), 2):
+            puntos = 0.5 if ganador is None else (1.0 if a == ganador else 0.0)
+            fila = resultado["puntos"].setdefault(nombres[a], {})
+            fila[nombres[b]] = fila.get(nombres[b], 0.0) + puntos
+    return resultado
+
+class Torneo:
+    """
+    Torneo de todos contra todos entre políticas. Para cada tamaño de mesa (de 2 a 4
+    jugadores) prueba todas las formas de sentar a las políticas: cada orden de
+    políticas distintas con cada combinación de colores, y juega partidas_por_mesa
+    partidas con semilla en cada mesa. Las partidas se reparten por tandas en un grupo
+    de procesos y los resultados de las tandas se combinan en una clasificación con
+    tasa de victorias y Elo. Con archivo, cada tanda terminada se anota en un archivo
+    JSON por línea, y un torneo interrumpido continúa donde quedó.
+    Las políticas deben poder enviarse a otros procesos (pickle). Con un solo proceso,
+    o si los procesos no pueden cargar este módulo, las tandas se juegan aquí mismo.
+    Sin tamanos se juegan todos los posibles; lanza ValueError si alguno de los
+    indicados no se puede llenar con las políticas.
+    """
+    def __init__(self, politicas, tamanos=None, partidas_por_mesa=20, tanda=10,
+                 procesos=None, semilla=0, max_turnos=10000, archivo=None):
+        self.politicas = dict(politicas)
+        maximo = min(len(COLORES), len(self.politicas))
+        if tamanos is None:
+            tamanos = range(2, maximo + 1)
+        for tamano in tamanos:
+            if not 2 <= tamano <= maximo:
+                raise ValueError(f"Mesa de {tamano} inválida: con {len(self.politicas)} políticas "
+                                 f"las mesas son de 2 a {maximo} jugadores.")
+        self.tamanos = list(tamanos)
+        self.partidas_por_mesa = partidas_por_mesa
+        self.tanda = tanda
+        self.procesos = (os.cpu_count() or 1) if procesos is None else procesos
+        self.semilla = semilla
+        self.max_turnos = max_turnos
+        self.archivo = archivo
+        self.resultado = self.resultado_vacio()
+
+    @staticmethod
+    def resultado_vacio():
+        return {"partidas": 0, "turnos": 0, "jugadas": {}, "victorias": {}, "puntos": {}}
+
+    @staticmethod
+    def combinar(total, parcial):
+        """Suma al resultado total el de una tanda."""
+        total["partidas"] += parcial["partidas"]
+        total["turnos"] += parcial["turnos"]
+        for clave in ("jugadas", "victorias"):
+            for nombre, cantidad in parcial[clave].items():
+                total[clave][nombre] = total[clave].get(nombre, 0) + cantidad
+        for nombre, fila in parcial["puntos"].items():
+            destino = total["puntos"].setdefault(nombre, {})
+            for rival, puntos in fila.items():
+                destino[rival] = destino.get(rival, 0.0) + puntos
+
+    def mesas(self):
+        """Todas las mesas del torneo: tuplas de (nombre de la política, color) en orden de turno."""
+        mesas = []
+        for tamano in self.tamanos:
+            for nombres in permutations(sorted(self.politicas), tamano):
+                for colores in combinations(COLORES, tamano):
+                    mesas.append(tuple(zip(nombres, colores)))
+        return mesas
+
+    def tandas(self):
+        """Lista de (nombre de la mesa, mesa, desde, hasta) con el trabajo del torneo."""
+        tandas = []
+        for mesa in self.mesas():
+            nombre_mesa = ",".join(f"{nombre}:{color}" for nombre, color in mesa)
+            for desde in range(0, self.partidas_por_mesa, self.tanda):
+                tandas.append((nombre_mesa, mesa, desde, min(desde + self.tanda, self.partidas_por_mesa)))
+        return tandas
+
+    def configuracion(self):
+        return {"politicas": sorted(self.politicas), "tamanos": self.tamanos,
+                "partidas_por_mesa": self.partidas_por_mesa, "tanda": self.tanda,
+                "semilla": self.semilla, "max_turnos": self.max_turnos}
+
+    def cargar_avance(self):
+        """
+        Lee las tandas ya terminadas del archivo y las suma al resultado; retorna sus
+        claves. Lanza ValueError si la primera línea no es la configuración de este
+        torneo.
+        """
+        hechas = set()
+        if not self.archivo or not os.path.exists(self.archivo):
+            return hechas
+        with open(self.archivo) as f:
+            for numero, linea in enumerate(f):
+                try:
+                    datos = json.loads(linea)
+                except ValueError:
+                    if numero == 0:
+                        raise ValueError(f"{self.archivo} no empieza con la configuración de un torneo.") from None
+                    continue  # Línea cortada por una interrupción
+                if numero == 0:
+                    if not isinstance(datos, dict) or datos.get("torneo") != self.configuracion():
+                        raise ValueError(f"{self.archivo} es de otro torneo.")
+                elif datos["tanda"] not in hechas:
+                    hechas.add(datos["tanda"])
+                    self.combinar(self.resultado, datos["resultado"])
+        return hechas
+
+    def jugar(self):
+        """Juega el torneo, o lo que le falte, y retorna la clasificación."""
+        self.resultado = self.resultado_vacio()
+        hechas = self.cargar_avance()
+        registro = None
+        if self.archivo:
+            nuevo = not os.path.exists(self.archivo) or os.path.getsize(self.archivo) == 0
+            cortada = False
+            if not nuevo:
+                # Una interrupción puede dejar la última línea sin terminar
+                with open(self.archivo, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    cortada = f.read(1) != b"\n"
+            registro = open(self.archivo, "a")
+            if nuevo:
+                registro.write(json.dumps({"torneo": self.configuracion()}) + "\n")
+            elif cortada:
+                registro.write("\n")
+            registro.flush()
+        try:
+            for clave, parcial in self.jugar_tandas(hechas):
+                self.combinar(self.resultado, parcial)
+                if registro is not None:
+                    registro.write(json.dumps({"tanda": clave, "resultado": parcial}) + "\n")
+                    registro.flush()
+        finally:
+            if registro is not None:
+                registro.close()
+        return self.clasificacion()
+
+    def jugar_tandas(self, hechas=()):
+        """Genera (clave, resultado) de cada tanda que no esté en hechas, a medida que terminan."""
+        pendientes = []
+        for nombre_mesa, mesa, desde, hasta in self.tandas():
+            clave = f"{nombre_mesa}/{desde}"
+            if clave in hechas:
+                continue
+            politicas = [(nombre, self.politicas[nombre]) for nombre, _ in mesa]
+            colores = [color for _, color in mesa]
+            pendientes.append((clave, (politicas, colores, f"{self.semilla}/{nombre_mesa}",
+                                       desde, hasta, self.max_turnos)))
+        if self.procesos <= 1 or not _procesos_pueden_importar():
+            for clave, argumentos in pendientes:
+                yield clave, _jugar_tanda(*argumentos)
+            return
+        with ProcessPoolExecutor(self.procesos) as grupo:
+            futuros = {grupo.submit(_jugar_tanda, *argumentos): clave for clave, argumentos in pendientes}
+            for futuro in as_completed(futuros):
+                yield futuros[futuro], futuro.result()
+
+    def clasificacion(self, iteraciones=200):
+        """
+        Devuelve la clasificación ordenada por Elo: nombre, partidas, victorias, tasa y elo.
+        El Elo se ajusta con el modelo de Bradley-Terry sobre los resultados por parejas,
+        con un empate virtual contra cada rival para que ningún valor sea infinito; así
+        no depende del orden en que terminaron las tandas.
+        """
+        nombres = sorted(self.politicas)
+        puntos = self.resultado["puntos"]
+        ganados = {a: {b: puntos.get(a, {}).get(b, 0.0) + 0.5 for b in nombres if b != a} for a in nombres}
+        fuerza = dict.fromkeys(nombres, 1.0)
+        for _ in range(iteraciones):
+            nueva = {}
+            for a in nombres:
+                denominador = sum((ganados[a][b] + ganados[b][a]) / (fuerza[a] + fuerza[b])
+                                  for b in nombres if b != a)
+                nueva[a] = sum(ganados[a].values()) / denominador if denominador else 1.0
+            media = math.exp(sum(math.log(valor) for valor in nueva.values()) / len(nueva))
+            fuerza = {a: valor / media for a, valor in nueva.items()}
+        tabla = []
+        for nombre in nombres:
+            jugadas = self.resultado["jugadas"].get(nombre, 0)
+            victorias = self.resultado["victorias"].get(nombre, 0)
+            tabla.append({"nombre": nombre, "partidas": jugadas, "victorias": victorias,
+                          "tasa": victorias / jugadas if jugadas else 0.0,
+                          "elo": 1500 + 400 * math.log10(fuerza[nombre])})
+        tabla.sort(key=lambda fila: fila["elo"], reverse=True)
+        return tabla
+
+# Casillas seguras y de salida, cuya ocupación se incluye en las características
+_TABLERO_BASE = Tablero()
+_CASILLAS_PROTEGIDAS = sorted(set(_TABLERO_BASE.seguros) | set(_TABLERO_BASE.salidas.values()))
+# Por asiento: 4 fichas × (posición relativa, en cárcel, en llegada), pares y extra;
+# después los bloqueos de las 68 casillas y dos huecos por casilla protegida
+NUM_CARACTERISTICAS = len(COLORES) * (FICHAS_POR_COLOR * 3 + 2) + CASILLAS + 2 * len(_CASILLAS_PROTEGIDAS)
+
+def caracteristicas(juego, jugador):
+    """
+    Codifica la posición vista por el jugador como NUM_CARACTERISTICAS enteros.
+    Los asientos se ordenan empezando por el jugador y las casillas se cuentan desde
+    su salida, así todas las posiciones se ven igual sin importar el color.
+    Por asiento (ceros si no hay jugador): para cada ficha su recorrido desde la salida
+    de su color (0-67, 68-75 en la zona interna, -1 en la cárcel), si está en la cárcel
+    y si llegó; sus pares consecutivos y movimientos extra. Luego, 1 por cada casilla
+    bloqueada y, en las casillas seguras y de salida, el asiento relativo de cada
+    ocupante (-1 si el hueco está libre). Solo sirve para partidas con las reglas clásicas.
+    """
+    tablero = juego.tablero
+    estado = tablero.estado
+    posiciones = estado.posiciones
+    fila = []
+    inicio = juego.jugadores.index(jugador)
+    asientos = {}
+    for k in range(len(COLORES)):
+        if k >= len(juego.jugadores):
+            fila.extend([0] * (FICHAS_POR_COLOR * 3 + 2))
+            continue
+        otro = juego.jugadores[(inicio + k) % len(juego.jugadores)]
+        salida = tablero.salidas[otro.color]
+        llegada = tablero.llegadas[otro.color].start
+        for ficha in otro.fichas:
+            asientos[ficha.indice] = k
+            posicion = posiciones[ficha.indice]
+            if posicion == VACIO:
+                fila.extend((-1, 1, 0))
+            elif posicion >= CASILLAS:
+                fila.extend((CASILLAS + posicion - llegada, 0, 1))
+            else:
+                fila.extend(((posicion - salida) % CASILLAS, 0, 0))
+        fila.append(otro.pares_consecutivos)
+        fila.append(otro.movimientos_extra)
+    salida = tablero.salidas[jugador.color]
+    bloqueos = estado.bloqueos
+    fila.extend(bloqueos >> ((i + salida) % CASILLAS) & 1 for i in range(CASILLAS))
+    ocupantes = estado.ocupantes
+    for casilla in _CASILLAS_PROTEGIDAS:
+        for hueco in (2 * casilla, 2 * casilla + 1):
+            fila.append(-1 if ocupantes[hueco] == VACIO else asientos.get(ocupantes[hueco], -1))
+    return fila
+
+class PoliticaGrabadora(Politica):
+    """
+    Envuelve otra política y anota cada decisión: las características de la posición
+    antes de decidir, los dados, el avance y la ficha elegida (-1 si pasa).
+    """
+    def __init__(self, politica):
+        self.politica = politica
+        self.decisiones = []
+
+    def sembrar(self, semilla):
+        self.politica.sembrar(semilla)
+
+    def preparar_tirada(self, juego, jugador, d1, d2):
+        self.politica.preparar_tirada(juego, jugador, d1, d2)
+
+    def elegir_ficha(self, juego, jugador, fichasact, avance):
+        fila = caracteristicas(juego, jugador)
+        ficha_id = self.politica.elegir_ficha(juego, jugador, fichasact, avance)
+        self.decisiones.append((fila, juego.dados.d1, juego.dados.d2, avance, -1 if ficha_id is None else ficha_id))
+        return ficha_id
+
+class EscritorEjemplos:
+    """
+    Escribe ejemplos de entrenamiento en fragmentos de archivos .npy mapeados en
+    memoria, de hasta "capacidad" filas cada uno: x (características, int16), dados
+    (int8), movimiento (avance y ficha, int8) y resultado (1 si ganó quien decidió,
+    0 si perdió, -1 sin ganador; int8). Al cerrar cada fragmento se recortan sus
+    archivos a las filas escritas y se escribe un .json con ese número. Cada proceso debe usar su propio prefijo, así varios
+    escriben a la vez en el mismo directorio sin coordinarse.
+    """
+    def __init__(self, directorio, prefijo, capacidad=65536):
+        if np is None:
+            raise ImportError("EscritorEjemplos necesita NumPy.")
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.capacidad = capacidad
+        self.numero = 0
+        self.filas = 0
+        self.arreglos = None
+        # Nombres de los fragmentos terminados por este escritor
+        self.fragmentos = []
+
+    def abrir(self):
+        nombre = os.path.join(self.directorio, f"{self.prefijo}-{self.numero:05d}")
+        formas = {"x": ((self.capacidad, NUM_CARACTERISTICAS), np.int16), "dados": ((self.capacidad, 2), np.int8),
+                  "movimiento": ((self.capacidad, 2), np.int8), "resultado": ((self.capacidad,), np.int8)}
+        self.arreglos = {clave: np.lib.format.open_memmap(f"{nombre}.{clave}.npy", mode="w+", dtype=tipo, shape=forma)
+                         for clave, (forma, tipo) in formas.items()}
+        self.filas = 0
+
+    def agregar_partida(self, decisiones, ganador):
+        """
+        Agrega las decisiones de una partida; cada una es (asiento, (fila, d1, d2, avance,
+        ficha)) y ganador es el asiento ganador o None.
+        """
+        for asiento, (fila, d1, d2, avance, ficha) in decisiones:
+            if self.arreglos is None:
+                self.abrir()
+            i = self.filas
+            self.arreglos["x"][i] = fila
+            self.arreglos["dados"][i] = (d1, d2)
+            self.arreglos["movimiento"][i] = (avance, ficha)
+            self.arreglos["resultado"][i] = -1 if ganador is None else int(asiento == ganador)
+            self.filas += 1
+            if self.filas == self.capacidad:
+                self.cerrar_fragmento()
+
+    def cerrar_fragmento(self):
+        if self.arreglos is None:
+            return
+        nombre = f"{self.prefijo}-{self.numero:05d}"
+        if self.filas < self.capacidad:
+            escritas = {clave: np.array(arreglo[:self.filas]) for clave, arreglo in self.arreglos.items()}
+            self.arreglos = None
+            for clave, arreglo in escritas.items():
+                np.save(os.path.join(self.directorio, f"{nombre}.{clave}.npy"), arreglo)
+        else:
+            for arreglo in self.arreglos.values():
+                arreglo.flush()
+        with open(os.path.join(self.directorio, f"{nombre}.json"), "w") as f:
+            json.dump({"fragmento": nombre, "filas": self.filas, "columnas": NUM_CARACTERISTICAS}, f)
+        self.arreglos = None
+        self.fragmentos.append(nombre)
+        self.numero += 1
+
+    def cerrar(self):
+        self.cerrar_fragmento()
+
+def construir_indice(directorio, nombres=None):
+    """
+    Junta los .json de los fragmentos terminados en indice.json, con el inicio
+    de cada fragmento en el total de filas. Con nombres solo se incluyen esos
+    fragmentos; sin ellos, todos los del directorio. Retorna el índice.
+    """
+    if nombres is None:
+        nombres = [nombre[:-len(".json")] for nombre in os.listdir(directorio)
+                   if nombre.endswith(".json") and nombre != "indice.json"]
+    fragmentos = []
+    total = 0
+    for nombre in sorted(nombres):
+        with open(os.path.join(directorio, f"{nombre}.json")) as f:
+            datos = json.load(f)
+        datos["inicio"] = total
+        total += datos["filas"]
+        fragmentos.append(datos)
+    indice = {"version": 1, "columnas": NUM_CARACTERISTICAS, "filas": total, "fragmentos": fragmentos}
+    with open(os.path.join(directorio, "indice.json"), "w") as f:
+        json.dump(indice, f, indent=1)
+    return indice
+
+class LectorEjemplos:
+    """
+    Lee los ejemplos exportados sin cargarlos en memoria: cada fragmento se abre
+    mapeado en memoria y solo se leen las filas que se piden.
+    """
+    def __init__(self, directorio):
+        if np is None:
+            raise ImportError("LectorEjemplos necesita NumPy.")
+        self.directorio = directorio
+        with open(os.path.join(directorio, "indice.json")) as f:
+            self.indice = json.load(f)
+
+    def __len__(self):
+        return self.indice["filas"]
+
+    def fragmento(self, datos):
+        """Arreglos mapeados en memoria de un fragmento, recortados a sus filas."""
+        base = os.path.join(self.directorio, datos["fragmento"])
+        return {clave: np.load(f"{base}.{clave}.npy", mmap_mode="r")[:datos["filas"]]
+                for clave in ("x", "dados", "movimiento", "resultado")}
+
+    def lotes(self, tamano=4096):
+        """Genera diccionarios de arreglos con hasta "tamano" filas, recorriendo los fragmentos en orden."""
+        for datos in self.indice["fragmentos"]:
+            arreglos = self.fragmento(datos)
+            for inicio in range(0, datos["filas"], tamano):
+                yield {clave: np.asarray(arreglo[inicio:inicio + tamano]) for clave, arreglo in arreglos.items()}
+
+def _exportar_tanda(directorio, prefijo, politicas, colores, semillas, capacidad, max_turnos):
+    """
+    Juega las partidas de las semillas dadas y escribe sus decisiones en fragmentos
+    propios. Retorna los nombres de los fragmentos.
+    """
+    escritor = EscritorEjemplos(directorio, prefijo, capacidad)
+    grabadoras = [PoliticaGrabadora(politica) for politica in politicas]
+    for semilla in semillas:
+        for asiento, grabadora in enumerate(grabadoras):
+            grabadora.decisiones = []
+            grabadora.sembrar(f"{semilla}/{asiento}")
+        ganador = simular_partida(grabadoras, colores, max_turnos, semilla)["ganador"]
+        decisiones = [(asiento, decision) for asiento, grabadora in enumerate(grabadoras)
+                      for decision in grabadora.decisiones]
+        escritor.agregar_partida(decisiones, ganador)
+    escritor.cerrar()
+    return escritor.fragmentos
+
+def exportar_ejemplos(directorio, politicas, partidas, colores=None, procesos=None, tanda=100,
+                      capacidad=65536, max_turnos=10000, semilla=0):
+    """
+    Simula partidas con semilla y exporta cada decisión como ejemplo de entrenamiento
+    (ver EscritorEjemplos). Las partidas se reparten por tandas entre procesos y cada
+    tanda escribe sus propios fragmentos; al final se construye indice.json solo con
+    los fragmentos de esta exportación, aunque el directorio tenga otros de antes. Las
+    características solo sirven con las reglas clásicas, así que los colores son de esas.
+    Retorna el índice.
+    """
+    if colores is None:
+        colores = REGLAS_CLASICAS.colores[:len(politicas)]
+    if len(colores) != len(politicas):
+        raise ValueError("Se necesita un color por jugador.")
+    if len(set(colores)) != len(colores) or not set(colores) <= set(REGLAS_CLASICAS.colores):
+        raise ValueError(f"Los colores deben ser distintos y de entre: {', '.join(REGLAS_CLASICAS.colores)}")
+    procesos = (os.cpu_count() or 1) if procesos is None else procesos
+    tandas = [(f"tanda{desde:08d}", [f"{semilla}/{i}" for i in range(desde, min(desde + tanda, partidas))])
+              for desde in range(0, partidas, tanda)]
+    fragmentos = []
+    if procesos <= 1 or not _procesos_pueden_importar():
+        for prefijo, semillas in tandas:
+            fragmentos += _exportar_tanda(directorio, prefijo, politicas, colores, semillas, capacidad, max_turnos)
+        return construir_indice(directorio, fragmentos)
+    with ProcessPoolExecutor(procesos) as grupo:
+        futuros = [grupo.submit(_exportar_tanda, directorio, prefijo, politicas, colores, semillas,
+                                capacidad, max_turnos)
+                   for prefijo, semillas in tandas]
+        for futuro in futuros:
+            fragmentos += futuro.result()
+    return construir_indice(directorio, fragmentos)
+
+# Políticas que se pueden pedir por nombre (por ejemplo desde la línea de comandos);
+# mcts decide con un presupuesto de tiempo, así que sus partidas no son reproducibles
+POLITICAS_POR_NOMBRE = {
+    "aleatoria": PoliticaAleatoria,
+    "avance": PoliticaAvance,
+    "mcts": lambda: PoliticaMCTS(tiempo_ms=20),
+}
+
+def _con_finales(politica, finales):
+    """
+    La política jugando los finales con una TablaFinales: PoliticaMCTS la usa en su
+    búsqueda y las demás quedan como respaldo de una PoliticaFinales.
+    """
+    if isinstance(politica, PoliticaMCTS):
+        politica.finales = finales
+        return politica
+    return PoliticaFinales(finales, politica)
+
+def _ignorar_interrupciones():
+    """Inicializa un proceso de trabajo: Ctrl+C lo maneja solo el proceso principal."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _simular_tanda(nombres, colores, semilla, desde, hasta, max_turnos, reglas, finales=None):
+    """
+    Juega las partidas desde..hasta-1 con las políticas nombradas (una por asiento) y
+    las reglas dadas como configuración; con el archivo de una TablaFinales, todas
+    juegan los finales con ella (ver _con_finales). La partida i usa la semilla
+    "semilla/i" para los dados y "semilla/i/asiento" para cada política. Retorna un
+    resultado por partida.
+    """
+    politicas = [POLITICAS_POR_NOMBRE[nombre]() for nombre in nombres]
+    if finales is not None:
+        tabla = TablaFinales.abrir(finales)
+        politicas = [_con_finales(politica, tabla) for politica in politicas]
+    reglas = Reglas(**reglas) if reglas is not None else None
+    resultados = []
+    for i in range(desde, hasta):
+        semilla_partida = f"{semilla}/{i}"
+        for asiento, politica in enumerate(politicas):
+            politica.sembrar(f"{semilla_partida}/{asiento}")
+        partida = simular_partida(politicas, colores, max_turnos, semilla_partida, contar=True, reglas=reglas)
+        resultados.append({"partida": i, "semilla": semilla_partida, **partida})
+    return resultados
+
+def simular_partidas(partidas, politicas, colores=None, procesos=None, tanda=50, semilla=0,
+                     max_turnos=10000, reglas=None, finales=None):
+    """
+    Retorna un generador que juega partidas con semilla, repartidas por tandas entre
+    procesos, y produce el resultado de cada una (ver _simular_tanda) a medida que
+    terminan, no en orden. politicas son nombres de POLITICAS_POR_NOMBRE, uno por
+    asiento, y finales el archivo opcional de una TablaFinales para todas. Nunca hay
+    más de dos tandas por proceso en curso, así la memoria no crece con el número de
+    partidas. Si se cierra el generador o se interrumpe, las tandas que no empezaron
+    se cancelan y se espera solo a las que están en curso.
+    Los parámetros se validan al llamarla, antes de jugar nada: lanza ValueError si
+    no son válidos.
+    """
+    reglas = reglas if reglas is not None else REGLAS_CLASICAS
+    if partidas < 0 or tanda < 1:
+        raise ValueError("El número de partidas no puede ser negativo y las tandas deben tener al menos una.")
+    if len(politicas) < 2:
+        raise ValueError("Se necesitan al menos dos jugadores.")
+    if colores is None:
+        colores = reglas.colores[:len(politicas)]
+    for nombre in politicas:
+        if nombre not in POLITICAS_POR_NOMBRE:
+            raise ValueError(f"Política desconocida: {nombre}")
+    if len(colores) != len(politicas):
+        raise ValueError("Se necesita un color por jugador.")
+    if len(set(colores)) != len(colores) or not set(colores) <= set(reglas.colores):
+        raise ValueError(f"Los colores deben ser distintos y de entre: {', '.join(reglas.colores)}")
+    if finales is not None:
+        try:
+            TablaFinales.abrir(finales)
+        except OSError as error:
+            raise ValueError(f"No se pudo abrir la tabla de finales: {error}") from error
+    procesos = (os.cpu_count() or 1) if procesos is None else procesos
+    return _jugar_partidas(partidas, politicas, colores, procesos, tanda, semilla, max_turnos,
+                           reglas.configuracion(), finales)
+
+def _jugar_partidas(partidas, politicas, colores, procesos, tanda, semilla, max_turnos, configuracion, finales):
+    """Generador de simular_partidas, con los parámetros ya validados."""
+    tandas = ((desde, min(desde + tanda, partidas)) for desde in range(0, partidas, tanda))
+    if procesos <= 1 or not _procesos_pueden_importar():
+        for desde, hasta in tandas:
+            yield from _simular_tanda(politicas, colores, semilla, desde, hasta, max_turnos, configuracion, finales)
+        return
+    grupo = ProcessPoolExecutor(procesos, initializer=_ignorar_interrupciones)
+    pendientes = set()
+    try:
+        while True:
+            for desde, hasta in tandas:
+                pendientes.add(grupo.submit(_simular_tanda, politicas, colores, semilla, desde, hasta,
+                                            max_turnos, configuracion, finales))
+                if len(pendientes) >= 2 * procesos:
+                    break
+            if not pendientes:
+                break
+            hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                yield from futuro.result()
+    finally:
+        grupo.shutdown(wait=True, cancel_futures=True)
+
+class SimuladorLotes:
+    """
+    Simula muchas partidas a la vez guardándolas en arreglos de NumPy y avanzándolas
+    en paralelo: en cada paso todas las partidas activas juegan un turno, los dados
+    de todo el lote se lanzan con una sola llamada y las políticas se aplican como
+    operaciones vectorizadas. Las reglas son las mismas que en Juego (capturas,
+    bloqueos, salida con 5, pares, movimientos extra), tomadas de unas Reglas (las
+    clásicas si no se indican) y con los bonos configurables.
+    Las políticas disponibles son "aleatoria" y "avance", como PoliticaAleatoria y
+    PoliticaAvance.
+    """
+    POLITICAS = ("aleatoria", "avance")
+
+    def __init__(self, colores=("rojo", "azul"), politicas="avance",
+                 bono_captura=None, bono_llegada=None, semilla=None, reglas=None):
+        if np is None:
+            raise ImportError("SimuladorLotes necesita NumPy.")
+        self.colores = list(colores)
+        if isinstance(politicas, str):
+            politicas = [politicas] * len(self.colores)
+        self.politicas = list(politicas)
+        if len(self.politicas) != len(self.colores):
+            raise ValueError("Se necesita una política por jugador.")
+        for politica in self.politicas:
+            if politica not in self.POLITICAS:
+                raise ValueError(f"Política desconocida: {politica}")
+        self.reglas = reglas = (reglas if reglas is not None else REGLAS_CLASICAS).compilar()
+        self.casillas = reglas.casillas
+        self.bono_captura = reglas.extra_captura if bono_captura is None else bono_captura
+        self.bono_llegada = reglas.extra_llegada if bono_llegada is None else bono_llegada
+        self.rng = np.random.default_rng(semilla)
+
+        tablero = Tablero(reglas=reglas)
+        num_jugadores = len(self.colores)
+        num_posiciones = len(tablero.caminos)
+        # destinos[asiento, posicion, avance] con -1 si el movimiento se pasa del final
+        self.destinos = np.full((num_jugadores, num_posiciones, 7), -1, np.int16)
+        for asiento, color in enumerate(self.colores):
+            for posicion, lista in enumerate(tablero.destinos[color]):
+                for avance, destino in enumerate(lista[:7]):
+                    self.destinos[asiento, posicion, avance] = destino
+        self.tipos = np.frombuffer(bytes(tablero.tipos), np.uint8)
+        self.salidas = np.array([tablero.salidas[color] for color in self.colores], np.int16)
+        self.color_asiento = np.array([reglas.colores.index(color) for color in self.colores], np.int16)
+        # Código de cada ficha (el mismo índice que en EstadoTablero) y su asiento
+        self.codigos = self.color_asiento[:, None] * FICHAS_POR_COLOR + np.arange(FICHAS_POR_COLOR, dtype=np.int16)
+        self.asiento_codigo = np.full(reglas.num_fichas, -1, np.int16)
+        self.asiento_codigo[self.codigos.ravel()] = np.repeat(np.arange(num_jugadores, dtype=np.int16), FICHAS_POR_COLOR)
+
+    def simular(self, num_partidas, max_turnos=10000):
+        """
+        Juega num_partidas partidas completas. Retorna un diccionario de arreglos con,
+        por partida, el asiento ganador (-1 si se llegó a max_turnos), los turnos jugados,
+        y por asiento las capturas y las llegadas a la zona interna.
+        """
+        n = num_partidas
+        num_jugadores = len(self.colores)
+        self.posiciones = np.full((n, num_jugadores, FICHAS_POR_COLOR), -1, np.int16)
+        self.huecos = np.full((n, self.casillas, 2), -1, np.int16)
+        self.cuentas = np.zeros((n, self.casillas), np.int8)
+        # Casillas con 2 fichas del mismo color, mantenidas al agregar y quitar
+        self.bloqueadas = np.zeros((n, self.casillas), bool)
+        self.turno = np.zeros(n, np.int16)
+        self.pares = np.zeros((n, num_jugadores), np.int8)
+        self.extra = np.zeros(n, np.int16)
+        self.ultima = np.full((n, num_jugadores), -1, np.int16)
+        self.capturas = np.zeros((n, num_jugadores), np.int32)
+        self.llegadas = np.zeros((n, num_jugadores), np.int32)
+        ganador = np.full(n, -1, np.int16)
+        turnos = np.zeros(n, np.int32)
+
+        activas = np.arange(n)
+        while activas.size:
+            asientos = self.turno[activas]
+            gano = self.jugar_turnos(activas)
+            turnos[activas] += 1
+            ganador[activas[gano]] = asientos[gano]
+            # Las partidas terminadas o que llegaron al límite salen del lote
+            activas = activas[~gano & (turnos[activas] < max_turnos)]
+        return {"ganador": ganador, "turnos": turnos, "capturas": self.capturas, "llegadas": self.llegadas}
+
+    def jugar_turnos(self, g):
+        """
+        Juega un turno en cada partida de g con las mismas fases que Juego.jugarturno.
+        Retorna qué partidas ganó el jugador que tenía el turno.
+        """
+        p = self.turno[g]
+        dados = self.rng.integers(1, 7, size=(g.size, 2), dtype=np.int16)
+        d1, d2 = dados[:, 0], dados[:, 1]
+
+        # Pares consecutivos: al tercero la última ficha movida vuelve a la cárcel
+        par = d1 == d2
+        pares = np.where(par, self.pares[g, p] + 1, 0)
+        tercero = pares == self.reglas.pares_castigo
+        pares[tercero] = 0
+        self.pares[g, p] = pares
+        repetir = par & ~tercero
+        castigo = tercero & (self.ultima[g, p] >= 0)
+        if castigo.any():
+            self.encarcelar(g[castigo], p[castigo], self.ultima[g[castigo], p[castigo]])
+
+        # Salida de la cárcel con un 5 (en un dado o en la suma)
+        valor = self.reglas.valor_salida
+        cinco = (d1 == valor) | (d2 == valor) | (d1 + d2 == valor)
+        en_carcel = self.posiciones[g, p] < 0
+        salida = self.salidas[p]
+        color = self.color_asiento[p]
+        bloqueada = ((self.cuentas[g, salida] == 2) & (self.huecos[g, salida, 0] // FICHAS_POR_COLOR == color)
+                     & (self.huecos[g, salida, 1] // FICHAS_POR_COLOR == color))
+        sacar = cinco & en_carcel.any(axis=1) & ~bloqueada
+        if sacar.any():
+            gs, ps = g[sacar], p[sacar]
+            ks = en_carcel[sacar].argmax(axis=1)
+            self.posiciones[gs, ps, ks] = self.salidas[ps]
+            captura = self.agregar(gs, ps, ks, self.salidas[ps])
+            self.extra[gs[captura]] = self.bono_captura
+
+        # Si no sacó ficha, elige una ficha para cada dado
+        for dado in (d1, d2):
+            gs, ps = g[~sacar], p[~sacar]
+            ks = self.elegir(gs, ps, dado[~sacar])
+            mueve = ks >= 0
+            self.mover(gs[mueve], ps[mueve], ks[mueve], dado[~sacar][mueve])
+
+        # Movimientos extra, de 1 en 1; si la política pasa se pierden los que queden
+        pendientes = self.extra[g] > 0
+        gs, ps = g[pendientes], p[pendientes]
+        while gs.size:
+            ks = self.elegir(gs, ps, np.ones(gs.size, np.int16))
+            self.extra[gs[ks < 0]] = 0
+            mueve = ks >= 0
+            gs, ps, ks = gs[mueve], ps[mueve], ks[mueve]
+            self.mover(gs, ps, ks, np.ones(gs.size, np.int16))
+            self.extra[gs] -= 1
+            pendientes = self.extra[gs] > 0
+            gs, ps = gs[pendientes], ps[pendientes]
+
+        # Gana quien tiene todas sus fichas en la zona interna; si no sacó par, pasa el turno
+        gano = (self.posiciones[g, p] >= self.casillas).all(axis=1)
+        self.turno[g] = np.where(repetir | gano, p, (p + 1) % len(self.colores))
+        return gano
+
+    def legales(self, g, p, avance):
+        """Matriz (partida, ficha) con las fichas del asiento p que pueden avanzar."""
+        posiciones = self.posiciones[g, p]
+        activa = posiciones >= 0
+        base = np.where(activa, posiciones, 0)
+        avance = avance[:, None]
+        legal = activa & (np.take(self.destinos, (p[:, None] * self.destinos.shape[1] + base) * 7 + avance) >= 0)
+        # Solo se revisan las casillas del camino (posicion + i) % casillas, con i hasta el avance
+        pasos = np.arange(1, 7)
+        camino = g[:, None, None] * self.casillas + (base[:, :, None] + pasos) % self.casillas
+        bloqueada = np.take(self.bloqueadas, camino)
+        legal &= ~(bloqueada & (pasos <= avance[:, :, None])).any(axis=2)
+        return legal
+
+    def elegir(self, g, p, avance):
+        """Aplica la política de cada asiento; retorna el id de ficha elegido o -1 para pasar."""
+        legal = self.legales(g, p, avance)
+        puntaje = np.empty(legal.shape)
+        for asiento, politica in enumerate(self.politicas):
+            filas = p == asiento
+            if politica == "avance":
+                # La ficha más adelantada; en empate, la de menor id
+                puntaje[filas] = self.posiciones[g[filas], asiento]
+            else:
+                puntaje[filas] = self.rng.random((int(filas.sum()), FICHAS_POR_COLOR))
+        puntaje[~legal] = -2
+        elegida = puntaje.argmax(axis=1)
+        return np.where(legal.any(axis=1), elegida, -1)
+
+    def quitar(self, g, codigo, posicion):
+        """Quita las fichas de sus casillas del tablero principal (como Tablero.quitar_ficha)."""
+        en_tablero = (posicion >= 0) & (posicion < self.casillas)
+        g, codigo, posicion = g[en_tablero], codigo[en_tablero], posicion[en_tablero]
+        primero = self.huecos[g, posicion, 0] == codigo
+        segundo = ~primero & (self.huecos[g, posicion, 1] == codigo)
+        self.huecos[g[primero], posicion[primero], 0] = self.huecos[g[primero], posicion[primero], 1]
+        quitada = primero | segundo
+        self.huecos[g[quitada], posicion[quitada], 1] = -1
+        self.cuentas[g[quitada], posicion[quitada]] -= 1
+        self.bloqueadas[g[quitada], posicion[quitada]] = False
+
+    def agregar(self, g, p, k, posicion):
+        """Pone las fichas en una casilla principal (como Tablero.agregar_ficha); retorna las capturas."""
+        codigo = self.codigos[p, k]
+        cuenta = self.cuentas[g, posicion]
+        vacia = cuenta == 0
+        self.huecos[g[vacia], posicion[vacia], 0] = codigo[vacia]
+        self.cuentas[g[vacia], posicion[vacia]] = 1
+
+        existente = self.huecos[g, posicion, 0]
+        mismo_color = existente // FICHAS_POR_COLOR == codigo // FICHAS_POR_COLOR
+        tipo = self.tipos[posicion]
+        una = cuenta == 1
+        # Misma salida y mismo color: la nueva ocupa el lugar de la existente
+        reemplazo = una & (tipo == SALIDA) & mismo_color
+        apilar = una & ~reemplazo & ((tipo != NORMAL) | mismo_color)
+        captura = una & ~reemplazo & ~apilar
+        self.huecos[g[apilar], posicion[apilar], 1] = codigo[apilar]
+        self.cuentas[g[apilar], posicion[apilar]] = 2
+        self.bloqueadas[g[apilar], posicion[apilar]] = mismo_color[apilar]
+        cambia = reemplazo | captura
+        self.huecos[g[cambia], posicion[cambia], 0] = codigo[cambia]
+        capturada = existente[captura]
+        self.posiciones[g[captura], self.asiento_codigo[capturada], capturada % FICHAS_POR_COLOR] = -1
+        capturas = reemplazo | captura
+        # Cada partida aparece una sola vez en g, así que no hay índices repetidos
+        self.capturas[g[capturas], p[capturas]] += 1
+        return capturas
+
+    def encarcelar(self, g, p, k):
+        """Devuelve fichas a la cárcel quitándolas del tablero."""
+        self.quitar(g, self.codigos[p, k], self.posiciones[g, p, k])
+        self.posiciones[g, p, k] = -1
+
+    def mover(self, g, p, k, avance):
+        """Mueve fichas ya validadas (como Juego.aplicar_movimiento)."""
+        origen = self.posiciones[g, p, k]
+        destino = self.destinos[p, origen, avance]
+        self.quitar(g, self.codigos[p, k], origen)
+        self.posiciones[g, p, k] = destino
+        self.ultima[g, p] = k
+        principal = origen < self.casillas
+        llega = principal & (destino >= self.casillas)
+        self.extra[g[llega]] = self.bono_llegada
+        self.llegadas[g[llega], p[llega]] += 1
+        queda = principal & (destino < self.casillas)
+        captura = self.agregar(g[queda], p[queda], k[queda], destino[queda])
+        self.extra[g[queda][captura]] = self.bono_captura
+
+class AsientoRemoto:
+    """
+    Asiento de una mesa del servidor cuyo jugador decide por mensajes. Los pedidos
+    salen con la función escribir y las respuestas llegan con responder; cada pedido
+    lleva un número para descartar las respuestas que lleguen tarde.
+    """
+    # Respuesta especial cuando el jugador se desconecta mientras se le espera
+    DESCONECTADO = object()
+
+    def __init__(self, nombre, escribir, drenar=None):
+        self.nombre = nombre
+        self.escribir = escribir
+        self.drenar = drenar
+        self.respuestas = asyncio.Queue()
+        self.pedido = 0
+        self.conectado = True
+
+    def responder(self, pedido, ficha):
+        """Entrega la ficha elegida (su id, o None para pasar) para un pedido."""
+        self.respuestas.put_nowait((pedido, ficha))
+
+    def desconectar(self):
+        self.conectado = False
+        self.respuestas.put_nowait((self.pedido, self.DESCONECTADO))
+
+    async def elegir(self, datos, tiempo):
+        """
+        Envía un pedido y espera la ficha elegida; el tiempo incluye el envío.
+        Lanza asyncio.TimeoutError si no llega a tiempo y ConnectionError si se
+        cortó la conexión al enviar.
+        """
+        self.pedido += 1
+        datos["pedido"] = self.pedido
+        self.escribir(datos)
+        return await asyncio.wait_for(self.enviar_y_esperar(self.pedido), max(0.0, tiempo))
+
+    async def enviar_y_esperar(self, pedido):
+        if self.drenar is not None:
+            await self.drenar()
+        return await self.esperar(pedido)
+
+    async def esperar(self, pedido):
+        while True:
+            numero, ficha = await self.respuestas.get()
+            if numero == pedido:
+                return ficha
+
+class EventosMesa(Eventos):
+    """Envía a los asientos conectados de una mesa las tiradas, movimientos y el ganador."""
+    def __init__(self, mesa):
+        self.mesa = mesa
+
+    def emitir(self, evento, *datos):
+        if evento == "tirada":
+            jugador, d1, d2 = datos
+            self.mesa.difundir({"evento": "tirada", "color": jugador.color, "dados": [d1, d2]})
+        elif evento == "salida":
+            ficha, captura = datos
+            self.mesa.difundir({"evento": "salida", "color": ficha.color, "ficha": ficha.id,
+                                "hasta": ficha.posicion, "captura": captura})
+        elif evento == "movimiento":
+            ficha, origen, destino, captura = datos
+            self.mesa.difundir({"evento": "movimiento", "color": ficha.color, "ficha": ficha.id,
+                                "desde": origen, "hasta": destino, "captura": captura})
+        elif evento == "castigo":
+            jugador, ficha = datos
+            self.mesa.difundir({"evento": "castigo", "color": jugador.color,
+                                "ficha": ficha.id if ficha else None})
+        elif evento == "ganador":
+            self.mesa.difundir({"evento": "ganador", "color": datos[0].color})
+
+class MesaAsincrona:
+    """
+    Una partida del servidor. Juega los turnos con Juego.pasos_turno y, cuando le toca
+    elegir a un asiento remoto, espera su respuesta sin bloquear a las demás mesas.
+    Los asientos vacíos los ocupa el bot; también decide por un asiento remoto que no
+    responde a tiempo o que se desconectó. tiempo_turno es el tiempo de todo un turno
+    (incluidos los movimientos extra): pasado ese límite, el bot decide lo que falte
+    del turno. Guarda la duración de cada turno.
+    """
+    def __init__(self, nombre, colores=("rojo", "azul", "verde", "amarillo"), tiempo_turno=30.0,
+                 bot=None, semilla=None, max_turnos=10000):
+        self.nombre = nombre
+        self.colores = list(colores)
+        self.tiempo_turno = tiempo_turno
+        self.bot = bot if bot is not None else PoliticaAvance()
+        self.max_turnos = max_turnos
+        self.juego = Juego(silencioso=True, semilla=None if semilla is None else f"{semilla}/{nombre}",
+                           eventos=EventosMesa(self))
+        # Asientos remotos por color
+        self.asientos = {}
+        self.empezada = False
+        # Duración de cada turno en segundos
+        self.latencias = []
+        # Límite (de time.perf_counter) para las decisiones del turno en curso
+        self.limite_turno = 0.0
+
+    def sentar(self, asiento, color=None):
+        """Sienta un jugador remoto en el color pedido o en el primero libre. Retorna el color o None."""
+        if self.empezada:
+            return None
+        libres = [c for c in self.colores if c not in self.asientos]
+        if color is None and libres:
+            color = libres[0]
+        if color not in libres:
+            return None
+        self.asientos[color] = asiento
+        return color
+
+    def llena(self):
+        return len(self.asientos) == len(self.colores)
+
+    def difundir(self, datos):
+        datos["mesa"] = self.nombre
+        for asiento in self.asientos.values():
+            if asiento.conectado:
+                asiento.escribir(datos)
+
+    async def jugar(self):
+        """Juega la partida completa. Retorna el color ganador o None si se llegó a max_turnos."""
+        self.empezada = True
+        juego = self.juego
+        for color in self.colores:
+            asiento = self.asientos.get(color)
+            if asiento is None:
+                juego.agregarjugador(f"bot {color}", color, self.bot)
+            else:
+                juego.agregarjugador(asiento.nombre, color)
+        ganador = None
+        for _ in range(self.max_turnos):
+            inicio = time.perf_counter()
+            self.limite_turno = inicio + self.tiempo_turno
+            pasos = juego.pasos_turno(consola=False)
+            try:
+                pedido = next(pasos)
+                while True:
+                    pedido = pasos.send(await self.decidir(*pedido))
+            except StopIteration as fin:
+                gano = fin.value
+            self.latencias.append(time.perf_counter() - inicio)
+            if gano:
+                ganador = juego.jugadores[juego.turnoact].color
+                break
+            # Deja correr a las demás mesas entre turno y turno
+            await asyncio.sleep(0)
+        self.difundir({"evento": "fin", "ganador": ganador, "turnos": len(self.latencias)})
+        return ganador
+
+    async def decidir(self, jugador, mensaje, fichasact, avance):
+        """Pide la ficha al asiento remoto o, si no hay o no responde, al bot."""
+        asiento = self.asientos.get(jugador.color)
+        if asiento is not None and asiento.conectado:
+            ids = [ficha.id for ficha in fichasact]
+            datos = {"evento": "elegir", "mesa": self.nombre, "avance": avance, "fichas": ids,
+                     "dados": [self.juego.dados.d1, self.juego.dados.d2]}
+            try:
+                ficha = await asiento.elegir(datos, self.limite_turno - time.perf_counter())
+            except asyncio.TimeoutError:
+                ficha = AsientoRemoto.DESCONECTADO
+            except ConnectionError:
+                # Se cortó la conexión al enviar el pedido: el bot sigue por este asiento
+                asiento.conectado = False
+                ficha = AsientoRemoto.DESCONECTADO
+            if ficha is not AsientoRemoto.DESCONECTADO:
+                return ficha if ficha in ids else None
+        politica = jugador.politica if jugador.politica is not None else self.bot
+        return politica.elegir_ficha(self.juego, jugador, fichasact, avance)
+
+class ServidorMesas:
+    """
+    Servidor asyncio que juega muchas mesas a la vez en un solo proceso y un solo
+    bucle de eventos. Cada conexión TCP manda y recibe un objeto JSON por línea:
+      cliente:  {"accion": "unirse", "mesa": "m1", "nombre": "Ana", "color": "rojo"}
+      servidor: {"evento": "asiento", "mesa": "m1", "color": "rojo"}
+      cliente:  {"accion": "empezar"}  (los asientos vacíos los ocupan bots)
+      servidor: {"evento": "elegir", "pedido": 3, "avance": 4, "fichas": [0, 2], "dados": [4, 1], ...}
+      cliente:  {"accion": "mover", "pedido": 3, "ficha": 2}  (ficha null para pasar)
+    Además el servidor envía las tiradas, los movimientos y el fin de la partida.
+    Una mesa empieza sola cuando se llenan todos sus asientos.
+    """
+    def __init__(self, colores=("rojo", "azul", "verde", "amarillo"), tiempo_turno=30.0,
+                 bot=None, semilla=None, max_turnos=10000):
+        self.colores = colores
+        self.tiempo_turno = tiempo_turno
+        self.bot = bot
+        self.semilla = semilla
+        self.max_turnos = max_turnos
+        # Mesas abiertas o en juego por nombre, y las tareas que las juegan
+        self.mesas = {}
+        self.tareas = set()
+        self.servidor = None
+
+    async def iniciar(self, host="127.0.0.1", puerto=0):
+        """Empieza a aceptar conexiones; con puerto 0 el sistema elige uno libre."""
+        self.servidor = await asyncio.start_server(self.atender, host, puerto)
+        return self.servidor
+
+    def mesa(self, nombre):
+        """Devuelve la mesa con ese nombre, creándola si no existe."""
+        if nombre not in self.mesas:
+            self.mesas[nombre] = MesaAsincrona(nombre, self.colores, self.tiempo_turno, self.bot,
+                                               self.semilla, self.max_turnos)
+        return self.mesas[nombre]
+
+    def empezar(self, mesa):
+        if mesa.empezada:
+            return
+        tarea = asyncio.ensure_future(mesa.jugar())
+        mesa.empezada = True
+        self.tareas.add(tarea)
+        tarea.add_done_callback(lambda t: self.terminar(mesa, t))
+
+    def terminar(self, mesa, tarea):
+        self.tareas.discard(tarea)
+        if self.mesas.get(mesa.nombre) is mesa:
+            del self.mesas[mesa.nombre]
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión: un jugador que se sienta en una mesa y responde sus pedidos."""
+        def escribir(datos):
+            if not escritor.is_closing():
+                escritor.write((json.dumps(datos) + "\n").encode("utf-8"))
+
+        mesa = asiento = None
+        try:
+            async for linea in lector:
+                try:
+                    datos = json.loads(linea)
+                    accion = datos.get("accion")
+                except (ValueError, AttributeError):
+                    escribir({"evento": "error", "mensaje": "Se esperaba un objeto JSON por línea."})
+                    continue
+                if accion == "unirse" and asiento is None:
+                    mesa = self.mesa(str(datos.get("mesa", "")))
+                    asiento = AsientoRemoto(str(datos.get("nombre", "jugador")), escribir, escritor.drain)
+                    color = mesa.sentar(asiento, datos.get("color"))
+                    if color is None:
+                        # Una mesa que se acaba de crear para este pedido no queda abierta vacía
+                        if not mesa.empezada and not mesa.asientos and self.mesas.get(mesa.nombre) is mesa:
+                            del self.mesas[mesa.nombre]
+                        mesa = asiento = None
+                        escribir({"evento": "error", "mensaje": "No hay lugar para ese color en la mesa."})
+                        continue
+                    escribir({"evento": "asiento", "mesa": mesa.nombre, "color": color})
+                    if mesa.llena():
+                        self.empezar(mesa)
+                elif accion == "empezar" and mesa is not None:
+                    self.empezar(mesa)
+                elif accion == "mover" and asiento is not None:
+                    asiento.responder(datos.get("pedido"), datos.get("ficha"))
+                else:
+                    escribir({"evento": "error", "mensaje": f"Acción inválida: {accion}"})
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if asiento is not None:
+                asiento.desconectar()
+                if not mesa.empezada:
+                    mesa.asientos = {c: a for c, a in mesa.asientos.items() if a is not asiento}
+                    # Una mesa sin empezar que se quedó sin jugadores se cierra
+                    if not mesa.asientos and self.mesas.get(mesa.nombre) is mesa:
+                        del self.mesas[mesa.nombre]
+            escritor.close()
+
+def servir(host="127.0.0.1", puerto=8765, **opciones):
+    """Ejecuta un ServidorMesas hasta que se interrumpa el proceso."""
+    async def correr():
+        servidor = await ServidorMesas(**opciones).iniciar(host, puerto)
+        async with servidor:
+            await servidor.serve_forever()
+    asyncio.run(correr())
+
+async def _jugar_mesas_locales(num_mesas, colores, max_turnos, semilla):
+    """
+    Juega mesas cuyos asientos son clientes en el mismo proceso: cada uno recibe los
+    pedidos por una cola y responde en su propia tarea, como haría por la red.
+    Retorna la duración de todos los turnos.
+    """
+    async def cliente(asiento, pedidos, rng):
+        while True:
+            datos = await pedidos.get()
+            asiento.responder(datos["pedido"], rng.choice(datos["fichas"]))
+
+    rng = random.Random(semilla)
+    mesas, clientes = [], []
+    for i in range(num_mesas):
+        mesa = MesaAsincrona(f"m{i}", colores, semilla=semilla, max_turnos=max_turnos)
+        for color in colores:
+            pedidos = asyncio.Queue()
+            # Solo los pedidos de ficha necesitan respuesta; el resto de eventos se descarta
+            asiento = AsientoRemoto(color, lambda datos, p=pedidos: datos["evento"] == "elegir" and p.put_nowait(datos))
+            mesa.sentar(asiento, color)
+            clientes.append(asyncio.ensure_future(cliente(asiento, pedidos, random.Random(rng.random()))))
+        mesas.append(mesa)
+    await asyncio.gather(*(mesa.jugar() for mesa in mesas))
+    for tarea in clientes:
+        tarea.cancel()
+    return [latencia for mesa in mesas for latencia in mesa.latencias]
+
+def medir_capacidad(objetivo_p99_ms=50.0, colores=("rojo", "azul"), max_turnos=200,
+                    maximo=4096, semilla=0):
+    """
+    Estima cuántas mesas puede sostener un núcleo sin que el percentil 99 de la
+    duración de un turno supere el objetivo. Duplica el número de mesas simultáneas
+    hasta pasarse y retorna (mejor número de mesas, mediciones), donde cada medición
+    es (mesas, p99 en ms, turnos por segundo).
+    """
+    mediciones = []
+    mejor = 0
+    mesas = 1
+    while mesas <= maximo:
+        inicio = time.perf_counter()
+        latencias = asyncio.run(_jugar_mesas_locales(mesas, colores, max_turnos, semilla))
+        duracion = time.perf_counter() - inicio
+        latencias.sort()
+        p99 = latencias[int(0.99 * (len(latencias) - 1))] * 1000
+        mediciones.append((mesas, p99, len(latencias) / duracion))
+        if p99 > objetivo_p99_ms:
+            break
+        mejor = mesas
+        mesas *= 2
+    return mejor, mediciones
+
+def _tiempos_por_operacion(funcion, operaciones, repeticiones, descontar=None):
+    """
+    Ejecuta funcion() varias veces y retorna el tiempo por operación en ns de cada
+    repetición. Con descontar, cada repetición mide también descontar() justo después
+    y resta su tiempo, así las dos mediciones comparten el mismo ruido.
+    """
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempo = time.perf_counter() - inicio
+        if descontar is not None:
+            inicio = time.perf_counter()
+            descontar()
+            tiempo -= time.perf_counter() - inicio
+        muestras.append(tiempo / operaciones * 1e9)
+    return muestras
+
+def _ruido_relativo(muestras, valor):
+    """Dispersión robusta de las muestras (MAD escalada a desviación típica) relativa al valor."""
+    if len(muestras) < 2 or not valor:
+        return 0.0
+    return 1.4826 * median(abs(muestra - valor) for muestra in muestras) / abs(valor)
+
+def _juego_de_prueba(semilla, turnos=40):
+    """Partida silenciosa de cuatro jugadores voraces avanzada algunos turnos."""
+    juego = Juego(silencioso=True, semilla=semilla)
+    for color in COLORES:
+        juego.agregarjugador(color, color, PoliticaAvance())
+    for _ in range(turnos):
+        if juego.jugarturno():
+            break
+    return juego
+
+def ejecutar_benchmarks(partidas=200, repeticiones=5, vueltas=2000, semilla=0):
+    """
+    Mide el rendimiento del motor en tres niveles y retorna un diccionario listo
+    para guardar en JSON. Cada resultado tiene su valor, su unidad y si un valor
+    mayor es mejor:
+      - micro: ns por llamada de las operaciones básicas sobre una partida fija;
+      - partidas: partidas completas con semilla por segundo, de cuatro jugadores
+        con políticas aleatoria y voraz, y de dos jugadores voraces;
+      - memoria: bytes de una partida de cuatro jugadores y de un EstadoTablero.
+    Cada medida guarda las muestras de todas las repeticiones, su mediana como
+    valor y su ruido relativo, que comparar_benchmarks usa como umbral.
+    """
+    resultados = {}
+
+    def agregar(nombre, muestras, unidad, mayor_es_mejor=False):
+        valor = median(muestras)
+        resultados[nombre] = {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor,
+                              "muestras": muestras, "ruido": _ruido_relativo(muestras, valor)}
+
+    juego = _juego_de_prueba(semilla)
+    tablero = juego.tablero
+    estado = tablero.estado
+    jugador = juego.jugadores[juego.turnoact]
+    fichas = jugador.fichasactivas() or jugador.fichas
+
+    # Tablero.agregar_ficha: en una partida nueva se pone una ficha en un seguro y se
+    # vuelve a quitar; se descuenta lo que cuesta quitarla
+    vacio = _juego_de_prueba(semilla, 0)
+    ficha_libre = vacio.jugadores[0].fichas[0]
+    casilla = vacio.tablero.seguros[0]
+    def agregar_y_quitar():
+        for _ in range(vueltas):
+            ficha_libre.mover(casilla)
+            vacio.tablero.agregar_ficha(ficha_libre, casilla)
+            vacio.tablero.quitar_ficha(ficha_libre)
+            ficha_libre.reiniciar()
+    def solo_quitar():
+        for _ in range(vueltas):
+            ficha_libre.mover(casilla)
+            vacio.tablero.quitar_ficha(ficha_libre)
+            ficha_libre.reiniciar()
+    agregar("micro.Tablero.agregar_ficha",
+            _tiempos_por_operacion(agregar_y_quitar, vueltas, repeticiones, solo_quitar), "ns/op")
+
+    def bloqueos():
+        bloqueo = tablero.bloqueo
+        for _ in range(vueltas // CASILLAS + 1):
+            for posicion in range(CASILLAS):
+                bloqueo(posicion)
+    agregar("micro.Tablero.bloqueo",
+            _tiempos_por_operacion(bloqueos, (vueltas // CASILLAS + 1) * CASILLAS, repeticiones), "ns/op")
+
+    def puede_mover():
+        for _ in range(vueltas // (6 * len(fichas)) + 1):
+            for ficha in fichas:
+                for avance in range(1, 7):
+                    jugador.puede_mover_ficha(ficha, avance)
+    agregar("micro.Jugador.puede_mover_ficha",
+            _tiempos_por_operacion(puede_mover, (vueltas // (6 * len(fichas)) + 1) * 6 * len(fichas),
+                                  repeticiones), "ns/op")
+
+    def activas():
+        for _ in range(vueltas):
+            jugador.fichasactivas()
+    agregar("micro.Jugador.fichasactivas", _tiempos_por_operacion(activas, vueltas, repeticiones), "ns/op")
+
+    # Juego.mover_ficha: se mueve la primera ficha que pueda y se restaura el estado
+    # copiando los arreglos; se descuenta el costo de la restauración
+    movible = [(ficha.id, avance) for avance in range(1, 7) for ficha in jugador.fichasactivas()
+               if jugador.puede_mover_ficha(ficha, avance)]
+    if movible:
+        ficha_id, avance = movible[0]
+        copia = estado.copiar()
+        extra, ultima = jugador.movimientos_extra, jugador.ultima_ficha_movida
+        def restaurar():
+            estado.posiciones[:] = copia.posiciones
+            estado.movidas[:] = copia.movidas
+            estado.cuentas[:] = copia.cuentas
+            estado.ocupantes[:] = copia.ocupantes
+            estado.bloqueos = copia.bloqueos
+            estado.hash = copia.hash
+            estado.carcel = copia.carcel
+            estado.llegada = copia.llegada
+            jugador.movimientos_extra = extra
+            jugador.ultima_ficha_movida = ultima
+        def mover_y_restaurar():
+            for _ in range(vueltas):
+                juego.mover_ficha(jugador, ficha_id, avance)
+                restaurar()
+        def solo_restaurar():
+            for _ in range(vueltas):
+                restaurar()
+        agregar("micro.Juego.mover_ficha",
+                _tiempos_por_operacion(mover_y_restaurar, vueltas, repeticiones, solo_restaurar), "ns/op")
+
+    dados = Dados(semilla=semilla)
+    def lanzar():
+        for _ in range(vueltas):
+            dados.lanzar()
+    agregar("micro.Dados.lanzar", _tiempos_por_operacion(lanzar, vueltas, repeticiones), "ns/op")
+
+    # Partidas completas con semillas fijas, tras unas de calentamiento; cada repetición
+    # juega las mismas partidas
+    for nombre, crear, jugadores in (
+            ("aleatoria", lambda i: PoliticaAleatoria(random.Random(f"{semilla}/{i}")), len(COLORES)),
+            ("avance", lambda i: PoliticaAvance(), len(COLORES)),
+            ("avance_2_jugadores", lambda i: PoliticaAvance(), 2)):
+        for i in range(max(1, partidas // 10)):
+            simular_partida([crear(i) for _ in range(jugadores)], semilla=f"calentamiento/{i}")
+        por_partidas, por_turnos = [], []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            turnos = 0
+            for i in range(partidas):
+                turnos += simular_partida([crear(i) for _ in range(jugadores)], semilla=f"{semilla}/{i}")["turnos"]
+            duracion = time.perf_counter() - inicio
+            por_partidas.append(partidas / duracion)
+            por_turnos.append(turnos / duracion)
+        agregar(f"partidas.{nombre}.partidas_por_s", por_partidas, "partidas/s", True)
+        agregar(f"partidas.{nombre}.turnos_por_s", por_turnos, "turnos/s", True)
+
+    # Memoria por estado de partida
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    juegos = [_juego_de_prueba(semilla, 0) for _ in range(50)]
+    por_juego = (tracemalloc.get_traced_memory()[0] - antes) / len(juegos)
+    antes = tracemalloc.get_traced_memory()[0]
+    estados = [estado.copiar() for _ in range(500)]
+    por_estado = (tracemalloc.get_traced_memory()[0] - antes) / len(estados)
+    tracemalloc.stop()
+    del juegos, estados
+    agregar("memoria.Juego", [por_juego], "bytes")
+    agregar("memoria.EstadoTablero", [por_estado], "bytes")
+
+    return {
+        "version": 2,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {"partidas": partidas, "repeticiones": repeticiones, "vueltas": vueltas, "semilla": semilla},
+        "resultados": resultados,
+    }
+
+def comparar_benchmarks(actual, base, tolerancia=0.10, sigmas=3.0):
+    """
+    Compara dos resultados de ejecutar_benchmarks por sus medianas. Retorna una lista
+    de (nombre, valor base, valor actual, cambio relativo) con los resultados que
+    empeoraron más que el umbral; el cambio es positivo cuando empeora. El umbral es
+    la tolerancia o, si es mayor, "sigmas" veces el ruido combinado de las dos
+    mediciones, para no tomar por regresión la variación entre repeticiones.
+    """
+    regresiones = []
+    for nombre, medida in actual["resultados"].items():
+        anterior = base["resultados"].get(nombre)
+        if anterior is None or not anterior["valor"]:
+            continue
+        cambio = (medida["valor"] - anterior["valor"]) / anterior["valor"]
+        if medida["mayor_es_mejor"]:
+            cambio = -cambio
+        # Los resultados sin muestras (versión 1) no tienen ruido estimado
+        ruido = math.hypot(medida.get("ruido", 0.0), anterior.get("ruido", 0.0))
+        if cambio > max(tolerancia, sigmas * ruido):
+            regresiones.append((nombre, anterior["valor"], medida["valor"], cambio))
+    return regresiones
+
+def main(argv=None):
     """Función principal para iniciar el juego."""
+    parser = argparse.ArgumentParser(description="Juego de Parchís.")
+    parser.add_argument("--benchmark", metavar="ARCHIVO",
+                        help="ejecuta los benchmarks y guarda los resultados en ARCHIVO (JSON)")
+    parser.add_argument("--comparar", nargs="+", metavar="ARCHIVO",
+                        help="compara con los benchmarks de BASE una ejecución nueva (--comparar BASE) "
+                             "u otro archivo guardado (--comparar BASE ACTUAL) y falla si hay regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="empeoramiento relativo permitido al comparar (por defecto 0.10)")
+    parser.add_argument("--partidas", type=int, default=200,
+                        help="partidas por política en los benchmarks (por defecto 200)")
+    parser.add_argument("--perfil", type=int, metavar="PARTIDAS",
+                        help="juega PARTIDAS partidas voraces instrumentadas y muestra los datos en JSON")
+    parser.add_argument("--simular", type=int, metavar="PARTIDAS",
+                        help="juega PARTIDAS partidas sin consola y escribe una línea JSON por partida")
+    parser.add_argument("--politicas", nargs="+", default=["avance"], choices=sorted(POLITICAS_POR_NOMBRE),
+                        help="política de cada jugador al simular; si es una sola, la usan todos")
+    parser.add_argument("--jugadores", type=int,
+                        help="número de jugadores al simular (por defecto, uno por política o 2)")
+    parser.add_argument("--colores", nargs="+", metavar="COLOR",
+                        help="colores de los jugadores al simular, en orden de asiento")
+    parser.add_argument("--procesos", type=int,
+                        help="procesos para simular (por defecto, uno por núcleo)")
+    parser.add_argument("--semilla",
+                        help="semilla base al simular o servir; la partida i usa SEMILLA/i (al simular, por defecto 0)")
+    parser.add_argument("--max-turnos", type=int, default=10000,
+                        help="turnos máximos por partida al simular (por defecto 10000)")
+    parser.add_argument("--reglas", metavar="ARCHIVO",
+                        help="reglas de la variante, en JSON con los parámetros de Reglas")
+    parser.add_argument("--salida", metavar="ARCHIVO",
+                        help="archivo para las líneas JSON al simular (por defecto, la salida estándar)")
+    parser.add_argument("--finales", metavar="ARCHIVO",
+                        help="construye la tabla de carreras finales y la guarda en ARCHIVO (.npy)")
+    parser.add_argument("--horizonte", type=int, default=8,
+                        help="casillas antes de la zona interna que cubre la tabla de finales (por defecto 8)")
+    parser.add_argument("--con-finales", metavar="ARCHIVO",
+                        help="al simular, todas las políticas juegan los finales con la tabla de ARCHIVO (ver --finales)")
+    parser.add_argument("--servir", type=int, metavar="PUERTO",
+                        help="atiende mesas en línea en PUERTO hasta que se interrumpa (Ctrl+C)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="dirección en la que escucha el servidor (por defecto 127.0.0.1)")
+    parser.add_argument("--tiempo-turno", type=float, default=30.0,
+                        help="segundos que el servidor espera a un jugador antes de usar el bot (por defecto 30)")
+    parser.add_argument("--torneo", action="store_true",
+                        help="juega un torneo de todos contra todos entre --politicas y muestra la clasificación")
+    parser.add_argument("--tamanos", nargs="+", type=int, metavar="JUGADORES",
+                        help="tamaños de mesa del torneo (por defecto, de 2 hasta 4 o el número de políticas)")
+    parser.add_argument("--partidas-por-mesa", type=int, default=20,
+                        help="partidas del torneo en cada mesa (por defecto 20)")
+    parser.add_argument("--avance", metavar="ARCHIVO",
+                        help="archivo JSON por línea con las tandas terminadas, para continuar un torneo")
+    parser.add_argument("--capacidad", type=float, metavar="P99_MS",
+                        help="mide cuántas mesas sostiene un núcleo con el percentil 99 del turno bajo P99_MS")
+    args = parser.parse_args(argv)
+
+    if args.torneo:
+        nombres = list(dict.fromkeys(args.politicas))
+        if len(nombres) < 2:
+            parser.error("--torneo necesita al menos dos --politicas distintas")
+        try:
+            torneo = Torneo({nombre: POLITICAS_POR_NOMBRE[nombre]() for nombre in nombres}, args.tamanos,
+                            args.partidas_por_mesa, procesos=args.procesos,
+                            semilla=args.semilla if args.semilla is not None else "0",
+                            max_turnos=args.max_turnos, archivo=args.avance)
+            clasificacion = torneo.jugar()
+        except ValueError as error:
+            parser.error(str(error))
+        print(json.dumps(clasificacion, indent=2, ensure_ascii=False))
+        return
+
+    if args.servir is not None:
+        opciones = {"tiempo_turno": args.tiempo_turno, "max_turnos": args.max_turnos, "semilla": args.semilla}
+        if args.colores:
+            opciones["colores"] = tuple(args.colores)
+        print(f"Sirviendo mesas en {args.host}:{args.servir}", file=sys.stderr)
+        try:
+            servir(args.host, args.servir, **opciones)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.capacidad is not None:
+        colores = tuple(args.colores) if args.colores else ("rojo", "azul")
+        mejor, mediciones = medir_capacidad(args.capacidad, colores)
+        for mesas, p99, turnos_por_s in mediciones:
+            print(f"{mesas} mesas: p99 {p99:.2f} ms, {turnos_por_s:.0f} turnos/s")
+        print(f"Capacidad: {mejor} mesas por núcleo con p99 <= {args.capacidad:g} ms")
+        return
+
+    if args.simular is not None:
+        reglas = None
+        if args.reglas:
+            try:
+                with open(args.reglas) as f:
+                    reglas = Reglas(**json.load(f)).compilar()
+            except (OSError, TypeError, ValueError) as error:
+                parser.error(f"reglas inválidas: {error}")
+        jugadores = args.jugadores or (len(args.politicas) if len(args.politicas) > 1 else 2)
+        politicas = args.politicas * jugadores if len(args.politicas) == 1 else args.politicas
+        if len(politicas) != jugadores:
+            parser.error("--politicas debe tener una política o una por jugador")
+        # Se valida todo antes de abrir (y vaciar) el archivo de salida
+        try:
+            partidas = simular_partidas(args.simular, politicas, args.colores, args.procesos,
+                                        semilla=args.semilla if args.semilla is not None else "0",
+                                        max_turnos=args.max_turnos, reglas=reglas, finales=args.con_finales)
+        except ValueError as error:
+            parser.error(str(error))
+        try:
+            salida = open(args.salida, "w") if args.salida else sys.stdout
+        except OSError as error:
+            parser.error(f"no se pudo abrir --salida: {error}")
+        try:
+            for resultado in partidas:
+                salida.write(json.dumps(resultado, ensure_ascii=False, separators=(",", ":")) + "\n")
+                salida.flush()
+        except KeyboardInterrupt:
+            partidas.close()
+            print("Simulación interrumpida.", file=sys.stderr)
+            sys.exit(130)
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        return
+
+    if args.finales:
+        tabla = TablaFinales.construir(args.finales, args.horizonte)
+        valores = tabla.cargar()
+        print(f"{int(np.count_nonzero(~np.isnan(valores)))} de {valores.size} posiciones exactas guardadas en {args.finales}")
+        return
+
+    if args.perfil:
+        instrumentacion = Instrumentacion()
+        for i in range(args.perfil):
+            juego = Juego(silencioso=True, semilla=i)
+            juego.instrumentar(instrumentacion)
+            for color in COLORES:
+                juego.agregarjugador(color, color, PoliticaAvance())
+            juego.simular()
+        print(json.dumps(instrumentacion.exportar(), indent=2))
+        return
+
+    if args.comparar is not None and len(args.comparar) > 2:
+        parser.error("--comparar recibe BASE y, opcionalmente, ACTUAL")
+    if args.benchmark or args.comparar:
+        if args.comparar is not None and len(args.comparar) == 2:
+            with open(args.comparar[1]) as f:
+                resultados = json.load(f)
+        else:
+            resultados = ejecutar_benchmarks(partidas=args.partidas)
+        for nombre, medida in resultados["resultados"].items():
+            ruido = f" (±{medida['ruido']:.0%})" if "ruido" in medida else ""
+            print(f"{nombre}: {medida['valor']:.1f} {medida['unidad']}{ruido}")
+        if args.benchmark:
+            with open(args.benchmark, "w") as f:
+                json.dump(resultados, f, indent=2)
+        if args.comparar:
+            with open(args.comparar[0]) as f:
+                base = json.load(f)
+            regresiones = comparar_benchmarks(resultados, base, args.tolerancia)
+            for nombre, anterior, valor, cambio in regresiones:
+                print(f"REGRESIÓN {nombre}: {anterior:.1f} -> {valor:.1f} ({cambio:+.0%})")
+            if regresiones:
+                sys.exit(1)
+            print("Sin regresiones.")
+        return
+
     juego = Juego()
     juego.jugar()
 
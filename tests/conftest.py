@@ -0,0 +1,37 @@
+"""
+El juego es un solo archivo con espacios y tilde en el nombre, así que no se puede
+importar con import: se carga una vez por ruta y se registra como "parchis".
+"""
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+RUTA = pathlib.Path(__file__).resolve().parent.parent / "angarzonba Código Proyecto Final.py"
+
+if "parchis" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location("parchis", RUTA)
+    _modulo = importlib.util.module_from_spec(_spec)
+    sys.modules["parchis"] = _modulo
+    _spec.loader.exec_module(_modulo)
+
+
+@pytest.fixture
+def partida():
+    """
+    Fábrica de partidas silenciosas: sienta un jugador "J<i>" en cada color (los de
+    las reglas, salvo que se den otros) y juega los turnos pedidos. politicas da la
+    política de los primeros asientos; los demás juegan con PoliticaAvance.
+    """
+    parchis = sys.modules["parchis"]
+
+    def crear(semilla=0, turnos=0, politicas=(), colores=None, reglas=None, eventos=None):
+        juego = parchis.Juego(silencioso=True, semilla=semilla, eventos=eventos, reglas=reglas)
+        for i, color in enumerate(colores or juego.reglas.colores):
+            politica = politicas[i] if i < len(politicas) else parchis.PoliticaAvance()
+            juego.agregarjugador(f"J{i}", color, politica)
+        juego.simular(turnos)
+        return juego
+
+    return crear
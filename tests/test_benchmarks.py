@@ -0,0 +1,38 @@
+import parchis
+
+
+def resultado(muestras, mayor_es_mejor=False):
+    valor = sorted(muestras)[len(muestras) // 2]
+    return {"resultados": {"x": {"valor": valor, "unidad": "ns/op", "mayor_es_mejor": mayor_es_mejor,
+                                 "muestras": muestras, "ruido": parchis._ruido_relativo(muestras, valor)}}}
+
+
+def test_el_ruido_entre_repeticiones_no_es_regresion():
+    base = resultado([100, 130, 95, 125, 100])
+    actual = resultado([130, 100, 135, 98, 128])
+    assert parchis.comparar_benchmarks(actual, base) == []
+
+
+def test_un_cambio_mayor_que_el_ruido_es_regresion():
+    base = resultado([100, 101, 99, 100, 102])
+    actual = resultado([130, 131, 129, 130, 132])
+    (nombre, anterior, valor, cambio), = parchis.comparar_benchmarks(actual, base)
+    assert (nombre, anterior, valor) == ("x", 100, 130)
+    assert abs(cambio - 0.30) < 1e-9
+
+
+def test_en_las_tasas_empeorar_es_bajar():
+    base = resultado([500, 501, 499, 500, 500], mayor_es_mejor=True)
+    assert parchis.comparar_benchmarks(resultado([400, 401, 399, 400, 400], True), base)
+    assert not parchis.comparar_benchmarks(resultado([600, 601, 599, 600, 600], True), base)
+
+
+def test_ejecutar_benchmarks_guarda_muestras_y_ruido():
+    resultados = parchis.ejecutar_benchmarks(partidas=2, repeticiones=3, vueltas=50)
+    assert resultados["version"] == 2
+    for nombre in ("aleatoria", "avance", "avance_2_jugadores"):
+        assert resultados["resultados"][f"partidas.{nombre}.partidas_por_s"]["mayor_es_mejor"]
+    for medida in resultados["resultados"].values():
+        assert medida["valor"] == sorted(medida["muestras"])[len(medida["muestras"]) // 2]
+        assert medida["ruido"] >= 0
+    assert parchis.comparar_benchmarks(resultados, resultados) == []
@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import parchis
+
+
+def test_consejo_calculado_en_segundo_plano(partida):
+    juego = partida(turnos=30)
+    jugador = juego.jugadores[juego.turnoact]
+    consejero = parchis.Consejero(tiempo_ms=10, procesos=1, semilla=1)
+    try:
+        consejero.anticipar(juego)
+        assert isinstance(consejero.grupo, ProcessPoolExecutor)
+        assert len(consejero.futuros) == 21
+        juego.manejar_pares_consecutivos(jugador, 3, 4)
+        jugada = consejero.consejo(juego, jugador, 3, 4, esperar=True)
+        assert jugada in juego.generar_movimientos(jugador, 3, 4)
+        # La tirada en el otro orden sale del mismo cálculo
+        assert consejero.consejo(juego, jugador, 4, 3) in juego.generar_movimientos(jugador, 4, 3)
+        # Cuando la posición cambia, el consejo calculado ya no sirve
+        juego.jugarturno()
+        assert consejero.consejo(juego, jugador, 3, 4) is None
+    finally:
+        consejero.cerrar()
+
+
+def test_sin_procesos_calcula_en_un_hilo(monkeypatch, partida):
+    monkeypatch.setattr(parchis, "_procesos_pueden_importar", lambda: False)
+    juego = partida(turnos=30)
+    jugador = juego.jugadores[juego.turnoact]
+    consejero = parchis.Consejero(tiempo_ms=10, procesos=4, semilla=1)
+    try:
+        consejero.anticipar(juego)
+        assert isinstance(consejero.grupo, ThreadPoolExecutor)
+        juego.manejar_pares_consecutivos(jugador, 3, 4)
+        assert consejero.consejo(juego, jugador, 3, 4, esperar=True) in juego.generar_movimientos(jugador, 3, 4)
+    finally:
+        consejero.cerrar()
+
+
+def test_cambiar_la_posicion_cancela_los_calculos(partida):
+    juego = partida(turnos=30)
+    consejero = parchis.Consejero(tiempo_ms=50, procesos=1, semilla=1)
+    try:
+        consejero.anticipar(juego)
+        viejos = consejero.futuros
+        # La misma posición no vuelve a empezar
+        consejero.anticipar(juego)
+        assert consejero.futuros is viejos
+        juego.jugarturno()
+        consejero.anticipar(juego)
+        assert consejero.futuros is not viejos
+        # Con un proceso, las tiradas que no empezaron se cancelan
+        assert sum(futuro.cancelled() for futuro in viejos.values()) > 10
+        siguiente = juego.jugadores[juego.turnoact]
+        # Como en pasos_turno, la regla de pares se aplica antes de pedir el consejo
+        juego.manejar_pares_consecutivos(siguiente, 3, 4)
+        assert consejero.consejo(juego, siguiente, 3, 4, esperar=True) in juego.generar_movimientos(siguiente, 3, 4)
+    finally:
+        consejero.cerrar()
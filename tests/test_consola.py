@@ -0,0 +1,58 @@
+import io
+import re
+
+import parchis
+
+CELDA = re.compile(r"\[[^\]]*\]")
+CAMBIOS = "Cambios en el tablero: "
+
+
+def salida_de_partida(semilla, diferencial):
+    salida = io.StringIO()
+    juego = parchis.Juego(semilla=semilla, eventos=parchis.ConsolaEventos(salida, diferencial=diferencial))
+    for i, color in enumerate(parchis.COLORES):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    juego.simular(300)
+    return salida.getvalue()
+
+
+def redibujar(texto):
+    """Reemplaza cada dibujo diferencial por el tablero completo que representa."""
+    lineas = []
+    tablero = None
+    for linea in texto.split("\n"):
+        if linea.startswith(CAMBIOS):
+            cambios = {int(i): celda for i, celda in re.findall(r"(\d+)(\[[^\]]*\])", linea[len(CAMBIOS):])}
+            posiciones = iter(range(len(CELDA.findall(tablero))))
+            tablero = CELDA.sub(lambda celda: cambios.get(next(posiciones), celda.group()), tablero)
+            lineas.append(tablero)
+        elif linea == "Tablero sin cambios.":
+            lineas.append(tablero)
+        else:
+            lineas.append(linea)
+            if linea == "Fin del Tablero":
+                # El primer dibujo siempre es completo
+                inicio = max(i for i, previa in enumerate(lineas) if previa == "Tablero:")
+                tablero = "\n".join(lineas[inicio:])
+    return "\n".join(lineas)
+
+
+def test_el_dibujo_diferencial_equivale_al_completo():
+    for semilla in range(3):
+        completo = salida_de_partida(semilla, diferencial=False)
+        diferencial = salida_de_partida(semilla, diferencial=True)
+        assert CAMBIOS in diferencial
+        assert len(diferencial) < len(completo)
+        assert redibujar(diferencial) == completo
+
+
+def test_el_dibujo_completo_es_el_de_vertablero(capsys):
+    juego = parchis.Juego(silencioso=True, semilla=4)
+    for i, color in enumerate(parchis.COLORES):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    vista = parchis.VistaTablero(juego.tablero)
+    for _ in range(30):
+        juego.jugarturno()
+        vista.dibujar_cambios()
+        juego.tablero.vertablero()
+        assert vista.dibujar() == capsys.readouterr().out
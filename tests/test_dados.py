@@ -0,0 +1,43 @@
+import parchis
+
+
+def tiradas(dados, n=300):
+    return [dados.lanzar() for _ in range(n)]
+
+
+def test_la_misma_semilla_da_las_mismas_tiradas():
+    assert tiradas(parchis.Dados(semilla=11)) == tiradas(parchis.Dados(semilla=11))
+    assert tiradas(parchis.Dados(semilla=11)) != tiradas(parchis.Dados(semilla=12))
+
+
+def test_reproducir_repite_las_tiradas_grabadas():
+    grabados = parchis.Dados(semilla=3, grabar=True)
+    hechas = tiradas(grabados)
+    assert grabados.historial == hechas
+    assert tiradas(parchis.Dados(secuencia=grabados.historial)) == hechas
+
+
+def test_la_misma_semilla_juega_la_misma_partida():
+    politicas = lambda: [parchis.PoliticaAvance() for _ in range(4)]
+    for semilla in range(3):
+        primera = parchis.simular_partida(politicas(), semilla=semilla, grabar=True)
+        assert parchis.simular_partida(politicas(), semilla=semilla, grabar=True) == primera
+
+
+def test_entrada_invalida_va_al_receptor_de_eventos(monkeypatch, capsys):
+    class Mensajes(parchis.Eventos):
+        def __init__(self):
+            self.mensajes = []
+
+        def emitir(self, evento, *datos):
+            if evento == "mensaje":
+                self.mensajes.append(" ".join(datos[0]))
+
+    eventos = Mensajes()
+    juego = parchis.Juego(modo_desarrollador=True, semilla=1, eventos=eventos)
+    juego.dados.forzar_manual = True
+    monkeypatch.setattr("builtins.input", lambda mensaje: "x")
+    d1, d2 = juego.dados.lanzar()
+    assert 1 <= d1 <= 6 and 1 <= d2 <= 6
+    assert eventos.mensajes == ["Entrada inválida. Usando valores aleatorios."]
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+import parchis
+
+np = pytest.importorskip("numpy")
+
+
+def test_fragmentos_recortados_a_las_filas_escritas(tmp_path):
+    politicas = [parchis.PoliticaAvance(), parchis.PoliticaAleatoria()]
+    indice = parchis.exportar_ejemplos(str(tmp_path), politicas, 5, procesos=1, tanda=2, capacidad=300,
+                                       max_turnos=200)
+    assert indice["filas"] == sum(datos["filas"] for datos in indice["fragmentos"])
+    for datos in indice["fragmentos"]:
+        assert 0 < datos["filas"] <= 300
+        x = np.load(os.path.join(tmp_path, f"{datos['fragmento']}.x.npy"))
+        assert x.shape == (datos["filas"], parchis.NUM_CARACTERISTICAS)
+    lector = parchis.LectorEjemplos(str(tmp_path))
+    assert sum(len(lote["resultado"]) for lote in lector.lotes(128)) == len(lector) == indice["filas"]
+
+
+def test_colores_de_las_reglas(tmp_path):
+    with pytest.raises(ValueError):
+        parchis.exportar_ejemplos(str(tmp_path), [parchis.PoliticaAvance()] * 2, 1, colores=["rojo", "negro"])
+
+
+def test_el_indice_ignora_fragmentos_de_exportaciones_anteriores(tmp_path):
+    politicas = [parchis.PoliticaAvance(), parchis.PoliticaAvance()]
+    anterior = parchis.exportar_ejemplos(str(tmp_path), politicas, 6, procesos=1, tanda=2, capacidad=200,
+                                         max_turnos=200)
+    # Una exportación más chica deja fragmentos viejos de tandas que ya no existen
+    indice = parchis.exportar_ejemplos(str(tmp_path), politicas, 2, procesos=1, tanda=2, capacidad=200,
+                                       max_turnos=200)
+    assert len(indice["fragmentos"]) < len(anterior["fragmentos"])
+    assert all(datos["fragmento"].startswith("tanda00000000-") for datos in indice["fragmentos"])
+    assert len(parchis.LectorEjemplos(str(tmp_path))) == indice["filas"]
+    assert parchis.construir_indice(str(tmp_path))["filas"] == anterior["filas"]
@@ -0,0 +1,89 @@
+import math
+import statistics
+
+import pytest
+
+import parchis
+
+VALORES = [1e9 + x for x in (4, 7, 13, 16, 2, 9, 11)]
+
+
+def estadistica(valores):
+    resultado = parchis.EstadisticaEnLinea()
+    for valor in valores:
+        resultado.agregar(valor)
+    return resultado
+
+
+def test_welford_coincide_con_statistics():
+    resultado = estadistica(VALORES)
+    assert resultado.n == len(VALORES)
+    assert resultado.media == pytest.approx(statistics.mean(VALORES), abs=1e-6)
+    # Con un desplazamiento grande la suma de cuadrados perdería la varianza
+    assert resultado.varianza == pytest.approx(statistics.variance(VALORES), rel=1e-9)
+    assert (resultado.minimo, resultado.maximo) == (min(VALORES), max(VALORES))
+
+
+def test_combinar_equivale_a_agregar_todo():
+    total = estadistica(VALORES[:3])
+    total.combinar(estadistica(VALORES[3:]))
+    total.combinar(parchis.EstadisticaEnLinea())
+    directo = estadistica(VALORES)
+    assert total.n == directo.n
+    assert total.media == pytest.approx(directo.media)
+    assert total.varianza == pytest.approx(directo.varianza)
+    lote = parchis.EstadisticaEnLinea()
+    lote.agregar_lote(VALORES)
+    assert lote.varianza == pytest.approx(directo.varianza)
+
+
+def test_semiancho_de_la_media():
+    assert estadistica([5]).semiancho() == math.inf
+    resultado = estadistica(VALORES)
+    esperado = 1.959964 * statistics.stdev(VALORES) / math.sqrt(len(VALORES))
+    assert resultado.semiancho() == pytest.approx(esperado, rel=1e-6)
+
+
+@pytest.mark.parametrize("exitos, total, bajo, alto", [
+    (5, 10, 0.2366, 0.7634),
+    (0, 10, 0.0, 0.2775),
+    (10, 10, 0.7225, 1.0),
+    (81, 263, 0.2553, 0.3662),
+])
+def test_intervalo_de_wilson(exitos, total, bajo, alto):
+    proporcion = parchis.Proporcion()
+    proporcion.agregar(exitos, total)
+    intervalo = proporcion.intervalo()
+    assert intervalo == pytest.approx((bajo, alto), abs=1e-4)
+    assert proporcion.semiancho() == pytest.approx((alto - bajo) / 2, abs=1e-4)
+
+
+def test_proporcion_vacia():
+    assert parchis.Proporcion().intervalo() == (0.0, 1.0)
+
+
+def test_se_detiene_al_alcanzar_la_precision():
+    pytest.importorskip("numpy")
+    opciones = dict(precision=0.05, minimo=100, cada=100, semilla=3)
+    agregador = parchis.simular_hasta_precision(["avance", "avance"], **opciones)
+    assert agregador.precision_alcanzada(0.05)
+    assert agregador.partidas % 100 == 0 and agregador.partidas < 1000000
+    # Con la misma semilla, una tanda menos todavía no alcanzaba la precisión
+    anterior = parchis.simular_hasta_precision(["avance", "avance"], maximo=agregador.partidas - 100, **opciones)
+    assert anterior.partidas == agregador.partidas - 100
+    assert not anterior.precision_alcanzada(0.05)
+
+
+def test_juega_al_menos_el_minimo():
+    pytest.importorskip("numpy")
+    agregador = parchis.simular_hasta_precision(["avance", "avance"], precision=1.0, minimo=300, cada=100,
+                                                semilla=1)
+    assert agregador.partidas == 300
+
+
+def test_se_detiene_con_politicas_objeto():
+    politicas = [parchis.PoliticaAvance(), parchis.PoliticaAvance()]
+    agregador = parchis.simular_hasta_precision(politicas, precision=0.2, minimo=10, cada=10, semilla=0)
+    assert agregador.precision_alcanzada(0.2)
+    assert agregador.partidas % 10 == 0
+    assert agregador.turnos.n == agregador.partidas
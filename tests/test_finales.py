@@ -0,0 +1,152 @@
+import math
+
+import pytest
+
+import parchis
+
+
+@pytest.fixture(scope="module")
+def tabla(tmp_path_factory):
+    pytest.importorskip("numpy")
+    archivo = str(tmp_path_factory.mktemp("finales") / "finales.npy")
+    parchis.TablaFinales.construir(archivo, horizonte=3)
+    return parchis.TablaFinales.abrir(archivo)
+
+
+@pytest.fixture
+def final(partida):
+    def crear(distancias, politicas=(), semilla=0):
+        """Partida de rojo contra azul con sus fichas a esas distancias de entrar y las demás ya en la zona interna."""
+        juego = partida(semilla=semilla, politicas=politicas, colores=("rojo", "azul"))
+        casillas = juego.tablero.num_casillas
+        for jugador, propias in zip(juego.jugadores, distancias):
+            for k, ficha in enumerate(jugador.fichas):
+                if k < len(propias):
+                    ficha.mover(casillas - propias[k])
+                    juego.tablero.agregar_ficha(ficha, casillas - propias[k])
+                else:
+                    ficha.mover(juego.reglas.llegadas[jugador.color][k])
+        return juego
+    return crear
+
+
+def test_no_pasa_ni_cae_en_un_bloqueo_propio():
+    # Dos fichas a 3 casillas de entrar forman un bloqueo que la de 5 no puede cruzar
+    assert parchis._avanzar_carrera((3, 3, 5), 3) == [((3, 5), True, 0b110, 0)]
+    assert all(estado != (2, 2, 2) for estado, *_ in parchis._avanzar_carrera((2, 2, 4), 2))
+    assert parchis._mascaras_carrera((1, 1, 3)) == (0b1010, 0b10)
+    assert all(estado.count(distancia) <= 2 for estado in parchis._estados_carrera(4) for distancia in estado)
+
+
+def test_construir_tabla_solo_guarda_valores_exactos(tabla):
+    valores = tabla.cargar()
+    indices = tabla.indices
+    assert valores.shape == (len(tabla.estados), len(tabla.estados), parchis.TablaFinales.PARES_CASTIGO)
+    # Cada posición vale NaN o una probabilidad, y hay posiciones de los dos tipos
+    conocidos = [valor for valor in valores.flat if not math.isnan(valor)]
+    assert 0 < len(conocidos) < valores.size
+    assert all(0.0 <= valor <= 1.0 for valor in conocidos)
+    # Con una sola ficha a 1 casilla, quien tira entra con cualquier dado...
+    uno, rival = indices[(1,)], indices[(3, 3)]
+    assert valores[uno, rival, :2].tolist() == [1.0, 1.0]
+    # ...salvo con el tercer par, que saca la partida de la tabla
+    assert math.isnan(valores[uno, rival, 2])
+    # Una ficha sola del rival en el tramo se puede capturar: lo que sigue no está en la tabla
+    assert math.isnan(valores[indices[(3,)], indices[(1,)], 0])
+    # Fichas de los dos en la misma casilla no son una posición posible
+    assert math.isnan(valores[indices[(2,)], indices[(2,)], 0])
+
+
+def test_estado_y_valor_en_el_tablero(tabla, final):
+    juego = final([(3,), (1,)])
+    rojo, azul = juego.jugadores
+    assert tabla.estado(juego, rojo) == (3,)
+    assert tabla.valor(juego, rojo) is None
+    juego = final([(1,), (3, 3)])
+    assert tabla.valor(juego, juego.jugadores[0]) == 1.0
+    assert tabla.valor(juego, juego.jugadores[1]) is None
+    # Una ficha más allá del horizonte o en la cárcel saca la posición de la tabla
+    juego = final([(3, 10), (1,)])
+    assert tabla.estado(juego, juego.jugadores[0]) is None
+    juego = final([(3,), (1,)])
+    rojo = juego.jugadores[0]
+    juego.tablero.quitar_ficha(rojo.fichas[0])
+    rojo.fichas[0].mover(parchis.VACIO)
+    assert tabla.estado(juego, rojo) is None
+    # Solo con dos jugadores
+    juego = final([(1,), (3, 3)])
+    juego.agregarjugador("verde", "verde", parchis.PoliticaAvance())
+    assert tabla.valor(juego, juego.jugadores[0]) is None
+
+
+def test_mejor_opcion_solo_si_es_segura(tabla, final):
+    juego = final([(1, 2), (3, 3)])
+    rojo = juego.jugadores[0]
+    # Con 1 y 2 entra con las dos fichas y gana
+    mejor = tabla.mejor_opcion(juego, rojo, juego.generar_movimientos(rojo, 1, 2))
+    for movimiento in mejor:
+        juego.hacer(rojo, movimiento)
+    assert rojo.ganador()
+    # Si puede capturar y nada gana seguro, la tabla no sabe qué es mejor
+    juego = final([(3, 3), (1,)])
+    rojo = juego.jugadores[0]
+    assert tabla.mejor_opcion(juego, rojo, juego.generar_movimientos(rojo, 2, 4)) is None
+
+
+def test_los_valores_exactos_se_cumplen(tabla, final):
+    # Las posiciones que la tabla da por ganadas se ganan siempre jugando con ella
+    indices = tabla.indices
+    valores = tabla.cargar()
+    probadas = 0
+    for propio, i in indices.items():
+        for rival, j in indices.items():
+            if propio and rival and valores[i, j, 0] == 1.0:
+                for semilla in range(3):
+                    juego = final([propio, rival], (parchis.PoliticaFinales(tabla),), semilla)
+                    assert juego.simular(3000)[1] is juego.jugadores[0]
+                probadas += 1
+    assert probadas > 10
+
+
+def test_se_consulta_en_partidas_reales(partida):
+    # Sin fichas en la cárcel ni lejos, pocas partidas llegan a la tabla: basta con que alguna llegue
+    tabla = parchis.TablaFinales("sin-construir.npy")
+    consultas = 0
+
+    class Contar(parchis.PoliticaAvance):
+        def preparar_tirada(self, juego, jugador, d1, d2):
+            nonlocal consultas
+            consultas += tabla._estados(juego, jugador) is not None
+            super().preparar_tirada(juego, jugador, d1, d2)
+
+    for semilla in range(200):
+        partida(semilla=semilla, politicas=(Contar(), Contar()), colores=("rojo", "azul")).simular()
+        if consultas:
+            break
+    assert consultas > 0
+
+
+def test_mcts_solo_corta_las_simulaciones_con_la_tabla(tabla, final):
+    juego = final([(1, 2), (3, 3)])
+    rojo = juego.jugadores[0]
+    mcts = parchis.PoliticaMCTS(tiempo_ms=50, finales=tabla, semilla=1)
+    # Decide buscando, aunque la tabla sepa la mejor jugada
+    llamadas = []
+    buscar = mcts.buscar
+    mcts.buscar = lambda *argumentos: llamadas.append(argumentos) or buscar(*argumentos)
+    mcts.preparar_tirada(juego, rojo, 1, 2)
+    assert len(llamadas) == 1
+    assert tuple(mcts.plan) in juego.generar_movimientos(rojo, 1, 2)
+    # Las simulaciones se cortan en la primera posición con valor exacto
+    juego = final([(1,), (3, 3)])
+    assert parchis._terminar_simulacion(juego, 30, tabla) == [1.0, 0.0]
+
+
+def test_simular_partidas_con_finales(tabla):
+    politicas = [parchis._con_finales(politica(), tabla) for politica in (parchis.PoliticaAvance, parchis.PoliticaMCTS)]
+    assert isinstance(politicas[0], parchis.PoliticaFinales)
+    assert politicas[1].finales is tabla
+    resultados = list(parchis.simular_partidas(4, ["avance", "avance"], procesos=1, finales=tabla.archivo))
+    assert sorted(resultado["partida"] for resultado in resultados) == [0, 1, 2, 3]
+    with pytest.raises(ValueError):
+        list(parchis.simular_partidas(1, ["avance", "avance"], procesos=1, finales="no-existe.npy"))
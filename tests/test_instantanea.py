@@ -0,0 +1,92 @@
+import pytest
+
+import parchis
+
+
+def test_restaurar_vuelve_al_mismo_estado(partida):
+    juego = partida(turnos=60)
+    datos = juego.instantanea()
+    otro = parchis.Juego(silencioso=True)
+    otro.restaurar(datos)
+    assert otro.instantanea() == datos
+    assert otro.hash_estado() == juego.hash_estado()
+    assert [j.nombre for j in otro.jugadores] == [j.nombre for j in juego.jugadores]
+
+
+def test_bifurcar_no_cambia_la_partida_original(partida):
+    juego = partida(semilla=5, turnos=60)
+    datos = juego.instantanea()
+    copia = juego.bifurcar(semilla=1)
+    copia.simular(50)
+    assert juego.instantanea() == datos
+
+
+def test_restaurar_rechaza_datos_invalidos(partida):
+    juego = parchis.Juego(silencioso=True)
+    with pytest.raises(ValueError):
+        juego.restaurar(b"no es una instantanea")
+    datos = bytearray(partida(turnos=60).instantanea())
+    datos[4] ^= 0xFF
+    with pytest.raises(ValueError):
+        juego.restaurar(bytes(datos))
+
+
+def test_restaurar_rechaza_instantaneas_cortadas(partida):
+    juego = partida(turnos=60)
+    datos = juego.instantanea()
+    otro = partida(semilla=4, turnos=60)
+    antes = otro.instantanea()
+    for largo in (len(datos) // 2, len(datos) - 1, 20):
+        with pytest.raises(ValueError):
+            otro.restaurar(datos[:largo])
+        with pytest.raises(ValueError):
+            parchis.Juego(silencioso=True).restaurar(datos[:largo])
+    with pytest.raises(ValueError):
+        otro.restaurar(datos + b"\0")
+    # Los datos cortados no tocan la partida
+    assert otro.instantanea() == antes
+
+
+def test_movimientos_extra_mayores_que_un_byte(partida):
+    reglas = parchis.Reglas(extra_captura=300).compilar()
+    juego = partida(semilla=2, reglas=reglas)
+    juego.jugadores[0].movimientos_extra = 300
+    otro = parchis.Juego(silencioso=True, reglas=reglas)
+    otro.restaurar(juego.instantanea())
+    assert otro.jugadores[0].movimientos_extra == 300
+    assert otro.hash_estado() == juego.hash_estado()
+
+
+def test_reglas_con_demasiados_movimientos_extra():
+    with pytest.raises(ValueError):
+        parchis.Reglas(extra_captura=70000).compilar()
+
+
+@pytest.fixture
+def partida_variante(partida):
+    """Partida de 6 jugadores con las reglas de la variante."""
+    def crear(semilla=0, turnos=40):
+        return partida(semilla, turnos, reglas=parchis.Reglas.para_jugadores(6).compilar())
+    return crear
+
+
+def test_instantanea_guarda_las_reglas(partida_variante):
+    juego = partida_variante()
+    datos = juego.instantanea()
+    assert parchis.Juego.reglas_de_instantanea(datos).configuracion() == juego.reglas.configuracion()
+    with pytest.raises(ValueError):
+        parchis.Juego(silencioso=True).restaurar(datos)
+
+
+def test_simulaciones_con_las_reglas_de_la_variante(partida_variante):
+    juego = partida_variante(semilla=3)
+    datos = juego.instantanea()
+    copia = parchis._juego_para_rollouts(datos)
+    assert copia.reglas.configuracion() == juego.reglas.configuracion()
+    assert copia.instantanea() == datos
+    consejos = parchis._aconsejar(datos, juego.turnoact, 3, 4, 20, 10, 1)
+    assert set(consejos) == {(3, 4), (4, 3)}
+    jugador = juego.jugadores[juego.turnoact]
+    mcts = parchis.PoliticaMCTS(tiempo_ms=20, procesos=1, max_turnos=10, semilla=1)
+    opciones = juego.generar_movimientos(jugador, 3, 4)
+    assert mcts.buscar(juego, jugador, opciones) in opciones
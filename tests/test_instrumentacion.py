@@ -0,0 +1,63 @@
+import parchis
+
+
+class ConteoCompleto(parchis.ConteoEventos):
+    """ConteoEventos que además cuenta todos los eventos por nombre."""
+    def __init__(self):
+        super().__init__()
+        self.eventos = {}
+
+    def emitir(self, evento, *datos):
+        super().emitir(evento, *datos)
+        self.eventos[evento] = self.eventos.get(evento, 0) + 1
+
+
+def partida_instrumentada(partida, semilla):
+    conteo = ConteoCompleto()
+    juego = partida(semilla=semilla, eventos=conteo)
+    instrumentacion = parchis.Instrumentacion()
+    juego.instrumentar(instrumentacion)
+    turnos, ganador = juego.simular()
+    assert ganador is not None
+    return instrumentacion, conteo, turnos
+
+
+def test_contadores_de_una_partida(partida):
+    for semilla in range(3):
+        instrumentacion, conteo, turnos = partida_instrumentada(partida, semilla)
+        contadores = instrumentacion.contadores
+        assert contadores.get("captura", 0) == sum(conteo.capturas.values())
+        assert contadores.get("llegada", 0) == sum(conteo.llegadas.values())
+        assert contadores.get("castigo_triple_par", 0) == conteo.eventos.get("castigo", 0)
+        assert conteo.eventos["turno"] == turnos
+
+
+def test_histogramas_de_una_partida(partida):
+    instrumentacion, conteo, turnos = partida_instrumentada(partida, 4)
+    llamadas = instrumentacion.llamadas
+    for fase in ("turno", "pares", "carcel", "extra", "tablero"):
+        assert llamadas[fase] == turnos
+    # Se elige una ficha por dado en cada tirada con fichas activas
+    assert llamadas["seleccion"] == 2 * conteo.eventos["fichas"]
+    assert llamadas["mover_ficha"] <= llamadas["seleccion"]
+    for fase, histograma in instrumentacion.histogramas.items():
+        assert sum(histograma.values()) == llamadas[fase]
+        # Cada cubeta b guarda duraciones de 2**(b-1) a 2**b - 1 ns
+        minimo = sum((1 << cubeta >> 1) * cantidad for cubeta, cantidad in histograma.items())
+        maximo = sum(((1 << cubeta) - 1) * cantidad for cubeta, cantidad in histograma.items())
+        assert minimo <= instrumentacion.total_ns[fase] <= maximo
+    exportado = instrumentacion.exportar()["fases"]["turno"]
+    assert sum(exportado["histograma_ns"].values()) == turnos
+
+
+def test_combinar_suma_las_partidas(partida):
+    primera, _, _ = partida_instrumentada(partida, 0)
+    segunda, _, _ = partida_instrumentada(partida, 1)
+    total = parchis.Instrumentacion()
+    total.combinar(primera)
+    total.combinar(segunda)
+    for fase in total.llamadas:
+        assert total.llamadas[fase] == primera.llamadas.get(fase, 0) + segunda.llamadas.get(fase, 0)
+        assert sum(total.histogramas[fase].values()) == total.llamadas[fase]
+    for evento in total.contadores:
+        assert total.contadores[evento] == primera.contadores.get(evento, 0) + segunda.contadores.get(evento, 0)
@@ -0,0 +1,59 @@
+import time
+
+import parchis
+
+
+def test_la_busqueda_agrega_nodos_mas_alla_de_la_raiz(partida):
+    juego = partida(turnos=40)
+    jugador = juego.jugadores[juego.turnoact]
+    opciones = juego.generar_movimientos(jugador, 3, 4)
+    mcts = parchis.PoliticaMCTS(tiempo_ms=50, semilla=1)
+    assert mcts.buscar(juego, jugador, opciones) in opciones
+    nodos = [valor for valor in mcts.tabla.valores if isinstance(valor, parchis._NodoDecision)]
+    assert len(nodos) > 1
+    assert sum(sum(nodo.visitas) for nodo in nodos) > 0
+
+
+def test_el_presupuesto_es_por_turno(partida):
+    mcts = parchis.PoliticaMCTS(tiempo_ms=5, semilla=1)
+    juego = partida(politicas=[mcts])
+    decisiones = []
+    calcular = mcts.limite_decision
+
+    def anotar(juego, ultima=False):
+        limite = calcular(juego, ultima)
+        # Si el turno ya no tiene tiempo, el límite es el momento de la llamada
+        decisiones.append((juego.turnos, limite, max(mcts.limite_turno, time.perf_counter()), mcts.limite_turno))
+        return limite
+
+    mcts.limite_decision = anotar
+    juego.simular(120)
+    por_turno = {}
+    for turno, limite, tope, limite_turno in decisiones:
+        por_turno.setdefault(turno, []).append((limite, tope, limite_turno))
+    # Los movimientos extra no reciben cada uno el presupuesto completo: todas las
+    # decisiones de un turno caben en el límite que se fijó al empezarlo
+    assert any(len(limites) > 1 for limites in por_turno.values())
+    for limites in por_turno.values():
+        assert len({limite_turno for _, _, limite_turno in limites}) == 1
+        assert all(limite <= tope for limite, tope, _ in limites)
+
+
+def test_limite_de_las_decisiones_de_un_turno(partida):
+    mcts = parchis.PoliticaMCTS(tiempo_ms=1000)
+    juego = partida(turnos=3)
+    primera = mcts.limite_decision(juego)
+    segunda = mcts.limite_decision(juego)
+    ultima = mcts.limite_decision(juego, ultima=True)
+    assert primera < segunda < ultima <= mcts.limite_turno
+    juego.turnos += 1
+    assert mcts.limite_decision(juego, ultima=True) > mcts.limite_turno - 0.01
+
+
+def test_el_administrador_de_contexto_cierra_los_procesos(partida):
+    juego = partida(turnos=40)
+    jugador = juego.jugadores[juego.turnoact]
+    opciones = juego.generar_movimientos(jugador, 5, 6)
+    with parchis.PoliticaMCTS(tiempo_ms=20, procesos=2, max_turnos=10, semilla=1) as mcts:
+        assert mcts.buscar(juego, jugador, opciones) in opciones
+    assert mcts.grupo is None
@@ -0,0 +1,82 @@
+import hashlib
+import random
+
+import pytest
+
+import parchis
+
+# Resumen de las trayectorias del motor original de objetos (el de la simulación
+# sin consola, antes del estado compacto) con las mismas tiradas y políticas.
+# Si una optimización cambia alguna jugada, estos resúmenes dejan de coincidir.
+TRAYECTORIAS = {
+    2: "fb5b480301f2db1e4b8913e771458c1c43510ef3a042018ea2068fbfd378975a",
+    3: "54c504d1136f145331c6dd8f45e1432ed2ba34f839e303d36acee8b08958e4c7",
+    4: "3aac251b77ef92bbdf1dc8cda38425a9bf4e0168077fb870a3b6270801a8cc0d",
+}
+
+
+def trayectoria(semilla, jugadores):
+    juego = parchis.Juego(silencioso=True)
+    rd = random.Random(semilla * 7 + 1)
+
+    def lanzar():
+        juego.dados.d1, juego.dados.d2 = rd.randint(1, 6), rd.randint(1, 6)
+        return juego.dados.d1, juego.dados.d2
+
+    juego.dados.lanzar = lanzar
+    politicas = [parchis.PoliticaAleatoria(random.Random(semilla)), parchis.PoliticaAvance()] * 2
+    for i, color in enumerate(parchis.COLORES[:jugadores]):
+        juego.agregarjugador(f"J{i}", color, politicas[i])
+    resumen = hashlib.sha256()
+    for _ in range(3000):
+        fin = juego.jugarturno()
+        fila = (juego.turnoact,
+                tuple((f.posicion, bool(f.llegada), bool(f.carcel)) for j in juego.jugadores for f in j.fichas),
+                tuple((j.movimientos_extra, j.pares_consecutivos) for j in juego.jugadores))
+        resumen.update(repr(fila).encode())
+        if fin:
+            break
+    return resumen.hexdigest()
+
+
+def test_trayectorias_iguales_al_motor_original():
+    for jugadores, esperado in TRAYECTORIAS.items():
+        total = hashlib.sha256()
+        for semilla in range(10):
+            total.update(trayectoria(semilla, jugadores).encode())
+        assert total.hexdigest() == esperado, f"{jugadores} jugadores"
+
+
+def test_copiar_estado_es_independiente():
+    juego = parchis.Juego(silencioso=True, semilla=1)
+    for i, color in enumerate(parchis.COLORES[:2]):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    juego.simular(30)
+    estado = juego.tablero.estado
+    copia = estado.copiar()
+    juego.simular(30)
+    assert copia.posiciones is not estado.posiciones
+    otra = copia.copiar()
+    assert bytes(otra.posiciones) == bytes(copia.posiciones) and otra.hash == copia.hash
+
+
+def test_casillas_como_la_lista_de_antes():
+    juego = parchis.Juego(silencioso=True, semilla=4)
+    for i, color in enumerate(parchis.COLORES):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    juego.simular(40)
+    tablero = juego.tablero
+    assert len(tablero.casillas) == tablero.num_casillas == parchis.CASILLAS
+    assert tablero.casillas[12]["tipo"] == "seguro"
+    assert tablero.casillas[5] == {"tipo": "salida", "color": "rojo", "ocupantes": tablero.ocupantes(5)}
+    assert tablero.casillas[-1] == tablero.casillas[parchis.CASILLAS - 1]
+    en_tablero = sorted(ficha.indice for casilla in tablero.casillas for ficha in casilla["ocupantes"])
+    assert en_tablero == sorted(ficha.indice for jugador in juego.jugadores for ficha in jugador.fichas
+                                if not ficha.carcel and not ficha.llegada)
+    # Es una vista de solo lectura: los diccionarios se arman de nuevo en cada lectura
+    tablero.casillas[0]["ocupantes"].append(None)
+    assert None not in tablero.casillas[0]["ocupantes"]
+    with pytest.raises(TypeError):
+        tablero.casillas[0] = {"tipo": "normal", "ocupantes": []}
+    with pytest.raises(IndexError):
+        tablero.casillas[parchis.CASILLAS]
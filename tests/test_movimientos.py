@@ -0,0 +1,37 @@
+import random
+
+import parchis
+
+
+def comprobar_grupos(juego):
+    estado = juego.tablero.estado
+    copia = estado.copiar()
+    copia.recalcular_grupos()
+    assert (estado.carcel, estado.llegada) == (copia.carcel, copia.llegada)
+    for jugador in juego.jugadores:
+        assert jugador.fichasactivas() == tuple(f for f in jugador.fichas if not f.carcel)
+        assert jugador.fichas_carcel() == tuple(f for f in jugador.fichas if f.carcel)
+        assert jugador.ganador() == all(f.llegada for f in jugador.fichas)
+
+
+def test_hacer_y_deshacer_dejan_el_estado_igual():
+    for semilla in range(4):
+        juego = parchis.Juego(silencioso=True, semilla=semilla)
+        for i, color in enumerate(parchis.COLORES):
+            juego.agregarjugador(f"J{i}", color, parchis.PoliticaAleatoria(random.Random(semilla * 4 + i)))
+        rng = random.Random(semilla)
+        for _ in range(150):
+            jugador = juego.jugadores[juego.turnoact]
+            antes = juego.instantanea()
+            hash_antes = juego.hash_estado()
+            for jugada in juego.generar_movimientos(jugador, rng.randint(1, 6), rng.randint(1, 6)):
+                for movimiento in jugada:
+                    juego.hacer(jugador, movimiento)
+                comprobar_grupos(juego)
+                for _ in jugada:
+                    juego.deshacer()
+                assert juego.instantanea() == antes
+                assert juego.hash_estado() == hash_antes
+            if juego.jugarturno():
+                break
+            comprobar_grupos(juego)
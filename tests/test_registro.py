@@ -0,0 +1,69 @@
+import pytest
+
+import parchis
+
+
+def grabar(semilla, jugadores=4):
+    politicas = [parchis.PoliticaAleatoria(), parchis.PoliticaAvance()] * 2
+    for politica in politicas:
+        politica.sembrar(semilla)
+    return parchis.simular_partida(politicas[:jugadores], semilla=semilla, grabar=True)
+
+
+def test_la_reproduccion_coincide_con_la_partida():
+    for semilla in range(5):
+        resultado = grabar(semilla)
+        reproductor = parchis.ReproductorPartida(resultado["registro"])
+        juego = reproductor.verificar()
+        assert reproductor.resultado == (resultado["ganador"], resultado["turnos"])
+        assert juego.jugadores[resultado["ganador"]].ganador()
+
+
+def test_juego_en_un_turno_intermedio():
+    reproductor = parchis.ReproductorPartida(grabar(7)["registro"])
+    mitad = len(reproductor) // 2
+    assert reproductor.juego_en(mitad).turnos == mitad
+
+
+def test_detecta_una_grabacion_alterada():
+    datos = bytearray(grabar(2)["registro"])
+    reproductor = parchis.ReproductorPartida(bytes(datos))
+    # Cambia la casilla grabada del primer movimiento con un dado
+    for i in range(reproductor.fin - 4, 0, -4):
+        if datos[i] == parchis.RegistroPartida.MOVIMIENTO and datos[i + 1] < parchis.FICHAS_POR_COLOR:
+            datos[i + 2] = (datos[i + 2] + 1) % parchis.CASILLAS
+            break
+    with pytest.raises(ValueError):
+        parchis.ReproductorPartida(bytes(datos)).verificar()
+
+
+def test_fin_con_mas_turnos_que_16_bits():
+    juego = parchis.Juego(silencioso=True)
+    for i, color in enumerate(parchis.COLORES[:2]):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    registro = parchis.RegistroPartida(juego)
+    registro.fin(None, 70000)
+    datos = registro.datos() + grabar(1)["registro"]
+    primera = parchis.ReproductorPartida(datos)
+    assert primera.resultado == (None, 70000)
+    # La siguiente partida concatenada empieza justo después del fin de 8 bytes
+    parchis.ReproductorPartida(datos, primera.fin).verificar()
+
+
+def test_rechaza_otras_versiones():
+    datos = bytearray(grabar(3)["registro"])
+    datos[4] = parchis.RegistroPartida.VERSION + 1
+    with pytest.raises(ValueError):
+        parchis.ReproductorPartida(bytes(datos))
+
+
+def test_la_reproduccion_llega_al_mismo_estado_final():
+    for semilla in range(3):
+        juego = parchis.Juego(silencioso=True, semilla=semilla)
+        for i, color in enumerate(parchis.COLORES):
+            juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+        juego.registro = parchis.RegistroPartida(juego)
+        juego.simular()
+        repetido = parchis.ReproductorPartida(juego.registro.datos()).verificar()
+        assert repetido.hash_estado() == juego.hash_estado()
+        assert repetido.instantanea() == juego.instantanea()
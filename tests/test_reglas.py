@@ -0,0 +1,78 @@
+import pytest
+
+import parchis
+
+
+def test_reglas_por_defecto_juegan_igual_que_las_clasicas():
+    for semilla in range(5):
+        politicas = [parchis.PoliticaAvance() for _ in range(4)]
+        clasica = parchis.simular_partida(politicas, semilla=semilla, grabar=True)
+        variante = parchis.simular_partida(politicas, semilla=semilla, grabar=True, reglas=parchis.Reglas())
+        assert clasica == variante
+
+
+def test_para_jugadores_con_cuatro_es_el_clasico():
+    assert parchis.Reglas.para_jugadores(4).configuracion() == parchis.Reglas().configuracion()
+
+
+@pytest.mark.parametrize("jugadores", [2, 3, 6, 8])
+def test_variantes_terminan_y_se_reproducen(jugadores):
+    reglas = parchis.Reglas.para_jugadores(jugadores).compilar()
+    for semilla in range(3):
+        politicas = [parchis.PoliticaAvance() for _ in range(jugadores)]
+        resultado = parchis.simular_partida(politicas, semilla=semilla, grabar=True, reglas=reglas)
+        assert resultado["ganador"] is not None
+        parchis.ReproductorPartida(resultado["registro"], reglas=reglas).verificar()
+
+
+def test_reglas_invalidas():
+    with pytest.raises(ValueError):
+        parchis.Reglas.para_jugadores(9)
+    with pytest.raises(ValueError):
+        parchis.Reglas(casillas=300).compilar()
+    with pytest.raises(ValueError):
+        parchis.Reglas(seguros=[70]).compilar()
+
+
+def test_simulador_lotes_con_variante():
+    pytest.importorskip("numpy")
+    reglas = parchis.Reglas.para_jugadores(6).compilar()
+    simulador = parchis.SimuladorLotes(reglas.colores, "avance", semilla=1, reglas=reglas)
+    resultado = simulador.simular(20)
+    assert (resultado["ganador"] >= 0).all()
+
+
+def jugar_como_lote(reglas, colores, semilla):
+    """Juega en Juego la partida de SimuladorLotes.simular(1) con la misma semilla y los mismos dados."""
+    np = pytest.importorskip("numpy")
+    simulador = parchis.SimuladorLotes(colores, "avance", semilla=semilla, reglas=reglas)
+    lote = simulador.simular(1)
+    # Una partida sola pide una tirada por turno al generador del simulador
+    rng = np.random.default_rng(semilla)
+    tiradas = [tuple(int(d) for d in rng.integers(1, 7, size=(1, 2), dtype=np.int16)[0])
+               for _ in range(int(lote["turnos"][0]))]
+    conteo = parchis.ConteoEventos()
+    juego = parchis.Juego(silencioso=True, eventos=conteo, reglas=reglas)
+    juego.dados = parchis.Dados(secuencia=tiradas)
+    for i, color in enumerate(colores):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    turnos, ganador = juego.simular(len(tiradas))
+    assert turnos == lote["turnos"][0]
+    assert juego.jugadores.index(ganador) == lote["ganador"][0]
+    assert [conteo.capturas[color] for color in colores] == list(lote["capturas"][0])
+    assert [conteo.llegadas[color] for color in colores] == list(lote["llegadas"][0])
+    posiciones = [[-1 if ficha.carcel else ficha.posicion for ficha in jugador.fichas] for jugador in juego.jugadores]
+    assert posiciones == simulador.posiciones[0].tolist()
+
+
+@pytest.mark.parametrize("jugadores", [2, 3, 4])
+def test_simulador_lotes_juega_igual_que_juego(jugadores):
+    colores = parchis.COLORES[:jugadores]
+    for semilla in range(10):
+        jugar_como_lote(parchis.REGLAS_CLASICAS, colores, semilla)
+
+
+def test_simulador_lotes_juega_igual_que_juego_con_variante():
+    reglas = parchis.Reglas.para_jugadores(6).compilar()
+    for semilla in range(10):
+        jugar_como_lote(reglas, reglas.colores, semilla)
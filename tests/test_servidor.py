@@ -0,0 +1,169 @@
+import asyncio
+import json
+
+import parchis
+
+
+async def conectar(servidor):
+    puerto = servidor.servidor.sockets[0].getsockname()[1]
+    return await asyncio.open_connection("127.0.0.1", puerto)
+
+
+def enviar(escritor, **datos):
+    escritor.write((json.dumps(datos) + "\n").encode("utf-8"))
+
+
+async def recibir(lector):
+    return json.loads(await asyncio.wait_for(lector.readline(), 10))
+
+
+async def unirse(servidor, nombre="m1", color="rojo"):
+    lector, escritor = await conectar(servidor)
+    enviar(escritor, accion="unirse", mesa=nombre, nombre="Ana", color=color)
+    assert await recibir(lector) == {"evento": "asiento", "mesa": nombre, "color": color}
+    return lector, escritor
+
+
+async def iniciar(**opciones):
+    servidor = parchis.ServidorMesas(colores=("rojo", "azul"), semilla=1, **opciones)
+    await servidor.iniciar()
+    return servidor
+
+
+def test_jugar_una_mesa_por_la_red():
+    async def probar():
+        servidor = await iniciar(max_turnos=40)
+        lector, escritor = await unirse(servidor)
+        mesa = servidor.mesas["m1"]
+        enviar(escritor, accion="empezar")
+        eventos = []
+        while True:
+            datos = await recibir(lector)
+            eventos.append(datos["evento"])
+            if datos["evento"] == "elegir":
+                enviar(escritor, accion="mover", pedido=datos["pedido"], ficha=datos["fichas"][-1])
+            elif datos["evento"] == "fin":
+                break
+        await asyncio.gather(*servidor.tareas)
+        conectado = mesa.asientos["rojo"].conectado
+        escritor.close()
+        servidor.servidor.close()
+        return eventos, conectado, servidor.mesas
+
+    eventos, conectado, mesas = asyncio.run(probar())
+    assert {"tirada", "elegir", "movimiento"} <= set(eventos)
+    assert conectado
+    # La mesa terminada sale del servidor
+    assert mesas == {}
+
+
+def test_el_tiempo_limite_es_por_turno(monkeypatch):
+    ventanas = []
+    elegir = parchis.AsientoRemoto.elegir
+    mesas = {}
+
+    def anotar(asiento, datos, tiempo):
+        # Turno en curso, límite del turno y tiempo dado a este pedido
+        mesa = mesas["m1"]
+        ventanas.append((len(mesa.latencias), mesa.limite_turno, tiempo))
+        return elegir(asiento, datos, tiempo)
+
+    monkeypatch.setattr(parchis.AsientoRemoto, "elegir", anotar)
+
+    async def probar():
+        servidor = await iniciar(tiempo_turno=0.1, max_turnos=60)
+        lector, escritor = await unirse(servidor)
+        mesas.update(servidor.mesas)
+        enviar(escritor, accion="empezar")
+        pedidos = 0
+        # Nunca responde: el bot juega por el asiento al vencer el tiempo del turno
+        while (datos := await recibir(lector))["evento"] != "fin":
+            pedidos += datos["evento"] == "elegir"
+        escritor.close()
+        servidor.servidor.close()
+        return pedidos
+
+    pedidos = asyncio.run(probar())
+    assert pedidos == len(ventanas) > 0
+    por_turno = {}
+    for turno, limite, tiempo in ventanas:
+        por_turno.setdefault(turno, []).append((limite, tiempo))
+    # Los pedidos de un mismo turno comparten su límite y el tiempo que les queda
+    # solo baja: con un límite por decisión, cada pedido volvería a tener 0.1 s
+    assert any(len(decisiones) > 1 for decisiones in por_turno.values())
+    for decisiones in por_turno.values():
+        assert len({limite for limite, _ in decisiones}) == 1
+        tiempos = [tiempo for _, tiempo in decisiones]
+        assert tiempos[0] <= 0.1
+        assert all(antes > despues for antes, despues in zip(tiempos, tiempos[1:]))
+
+
+def test_desconexion_durante_la_partida():
+    async def probar():
+        servidor = await iniciar(max_turnos=30)
+        lector, escritor = await unirse(servidor)
+        mesa = servidor.mesas["m1"]
+        enviar(escritor, accion="empezar")
+        while (await recibir(lector))["evento"] != "elegir":
+            pass
+        escritor.close()
+        await asyncio.gather(*servidor.tareas)
+        servidor.servidor.close()
+        return mesa
+
+    mesa = asyncio.run(probar())
+    assert not mesa.asientos["rojo"].conectado
+    assert len(mesa.latencias) == 30 or mesa.juego.jugadores[mesa.juego.turnoact].ganador()
+
+
+def test_una_mesa_sin_empezar_se_cierra_cuando_todos_salen():
+    async def probar():
+        servidor = await iniciar()
+        _, primero = await unirse(servidor, color="rojo")
+        _, segundo = await unirse(servidor, "m2", color="azul")
+        assert set(servidor.mesas) == {"m1", "m2"}
+        primero.close()
+        await primero.wait_closed()
+        # Espera a que el servidor atienda el cierre
+        for _ in range(100):
+            if "m1" not in servidor.mesas:
+                break
+            await asyncio.sleep(0.01)
+        mesas = set(servidor.mesas)
+        segundo.close()
+        servidor.servidor.close()
+        return mesas
+
+    assert asyncio.run(probar()) == {"m2"}
+
+
+def test_unirse_sin_lugar_no_deja_una_mesa_vacia():
+    async def probar():
+        servidor = await iniciar()
+        lector, escritor = await conectar(servidor)
+        enviar(escritor, accion="unirse", mesa="m3", nombre="Ana", color="morado")
+        respuesta = await recibir(lector)
+        mesas = set(servidor.mesas)
+        escritor.close()
+        servidor.servidor.close()
+        return respuesta, mesas
+
+    respuesta, mesas = asyncio.run(probar())
+    assert respuesta["evento"] == "error"
+    assert mesas == set()
+
+
+def test_conexion_cortada_al_enviar_un_pedido():
+    async def drenar():
+        raise ConnectionResetError()
+
+    async def probar():
+        mesa = parchis.MesaAsincrona("m1", ("rojo", "azul"), semilla=2, max_turnos=30)
+        asiento = parchis.AsientoRemoto("Ana", lambda datos: None, drenar)
+        mesa.sentar(asiento, "rojo")
+        await mesa.jugar()
+        return mesa, asiento
+
+    mesa, asiento = asyncio.run(probar())
+    assert not asiento.conectado
+    assert mesa.latencias
@@ -0,0 +1,101 @@
+import json
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+import parchis
+
+
+def simular(*argumentos, **opciones):
+    return subprocess.run([sys.executable, parchis.__file__, *argumentos], capture_output=True, text=True,
+                          timeout=120, **opciones)
+
+
+def test_simular_partidas_reparte_por_tandas():
+    resultados = list(parchis.simular_partidas(7, ["avance", "aleatoria"], procesos=1, tanda=3, semilla="s"))
+    assert sorted(resultado["partida"] for resultado in resultados) == list(range(7))
+    for resultado in resultados:
+        assert resultado["semilla"] == f"s/{resultado['partida']}"
+        assert resultado["ganador"] in (0, 1, None)
+        assert resultado["color"] == (None if resultado["ganador"] is None else ("rojo", "azul")[resultado["ganador"]])
+    # El resultado no depende de las tandas ni de los procesos
+    por_partida = sorted(resultados, key=lambda resultado: resultado["partida"])
+    for procesos, tanda in ((1, 50), (2, 2)):
+        otros = parchis.simular_partidas(7, ["avance", "aleatoria"], procesos=procesos, tanda=tanda, semilla="s")
+        assert sorted(otros, key=lambda resultado: resultado["partida"]) == por_partida
+
+
+def test_simular_partidas_valida_al_llamarla():
+    for argumentos, opciones in [
+        ((2, ["avance", "nadie"]), {}),
+        ((2, ["avance"]), {}),
+        ((2, ["avance", "avance"]), {"colores": ["rojo"]}),
+        ((2, ["avance", "avance"]), {"colores": ["rojo", "rojo"]}),
+        ((2, ["avance", "avance"]), {"colores": ["rojo", "morado"]}),
+        ((-1, ["avance", "avance"]), {}),
+        ((2, ["avance", "avance"]), {"tanda": 0}),
+    ]:
+        # Falla antes de pedir la primera partida
+        with pytest.raises(ValueError):
+            parchis.simular_partidas(*argumentos, procesos=1, **opciones)
+
+
+def test_cerrar_cancela_las_tandas_pendientes():
+    partidas = parchis.simular_partidas(100000, ["avance", "avance"], procesos=2, tanda=5)
+    assert "partida" in next(partidas)
+    inicio = time.perf_counter()
+    partidas.close()
+    # Solo espera a las tandas en curso, no a las 100000 partidas
+    assert time.perf_counter() - inicio < 10
+
+
+def test_cli_escribe_una_linea_por_partida(tmp_path):
+    salida = tmp_path / "partidas.jsonl"
+    proceso = simular("--simular", "5", "--politicas", "avance", "aleatoria", "--procesos", "1",
+                      "--semilla", "s", "--salida", str(salida))
+    assert proceso.returncode == 0, proceso.stderr
+    lineas = [json.loads(linea) for linea in salida.read_text().splitlines()]
+    esperados = parchis.simular_partidas(5, ["avance", "aleatoria"], procesos=1, semilla="s")
+    assert sorted(lineas, key=lambda linea: linea["partida"]) == sorted(esperados, key=lambda r: r["partida"])
+    # Sin --salida, a la salida estándar
+    proceso = simular("--simular", "2", "--procesos", "1")
+    assert proceso.returncode == 0, proceso.stderr
+    assert len(proceso.stdout.splitlines()) == 2
+
+
+def test_cli_valida_antes_de_abrir_la_salida(tmp_path):
+    salida = tmp_path / "partidas.jsonl"
+    salida.write_text("datos anteriores\n")
+    for argumentos in [
+        ["--colores", "rojo", "rojo"],
+        ["--politicas", "avance", "aleatoria", "--jugadores", "3"],
+        ["--jugadores", "1"],
+        ["--politicas", "ninguna"],
+    ]:
+        proceso = simular("--simular", "2", "--procesos", "1", "--salida", str(salida), *argumentos)
+        assert proceso.returncode == 2
+        assert "error" in proceso.stderr
+        assert salida.read_text() == "datos anteriores\n"
+    reglas = tmp_path / "reglas.json"
+    reglas.write_text('{"casillas": -1}')
+    proceso = simular("--simular", "2", "--reglas", str(reglas), "--salida", str(salida))
+    assert proceso.returncode == 2 and "reglas inválidas" in proceso.stderr
+    assert salida.read_text() == "datos anteriores\n"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="necesita enviar SIGINT")
+def test_cli_interrumpida(tmp_path):
+    proceso = subprocess.Popen([sys.executable, parchis.__file__, "--simular", "100000", "--procesos", "2"],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        # Espera a la primera partida y simula un Ctrl+C
+        assert json.loads(proceso.stdout.readline())["partida"] >= 0
+        proceso.send_signal(signal.SIGINT)
+        _, errores = proceso.communicate(timeout=60)
+    finally:
+        proceso.kill()
+    assert proceso.returncode == 130
+    assert "Simulación interrumpida." in errores
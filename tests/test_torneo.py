@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import parchis
+
+
+def politicas():
+    return {"aleatoria": parchis.PoliticaAleatoria(), "avance": parchis.PoliticaAvance()}
+
+
+def test_tamanos_que_no_se_pueden_llenar():
+    with pytest.raises(ValueError):
+        parchis.Torneo(politicas(), tamanos=(2, 3))
+    assert parchis.Torneo(politicas()).tamanos == [2]
+
+
+def test_sin_modulo_importable_juega_en_el_mismo_proceso(monkeypatch):
+    # Las pruebas cargan el juego desde su ruta: con spawn los trabajadores no lo encontrarían
+    monkeypatch.setattr(parchis.multiprocessing, "get_start_method", lambda: "spawn")
+    assert not parchis._procesos_pueden_importar()
+    en_grupo = parchis.Torneo(politicas(), partidas_por_mesa=4, tanda=2, procesos=2, semilla=3).jugar()
+    en_proceso = parchis.Torneo(politicas(), partidas_por_mesa=4, tanda=2, procesos=1, semilla=3).jugar()
+    assert en_grupo == en_proceso
+    # 2 órdenes de políticas × 6 pares de colores × 4 partidas, con 2 jugadores cada una
+    assert sum(fila["partidas"] for fila in en_grupo) == 2 * (2 * 6 * 4)
+
+
+def test_continua_un_torneo_interrumpido(tmp_path):
+    archivo = tmp_path / "torneo.jsonl"
+    completo = parchis.Torneo(politicas(), partidas_por_mesa=4, tanda=2, procesos=1, semilla=1).jugar()
+    torneo = parchis.Torneo(politicas(), partidas_por_mesa=4, tanda=2, procesos=1, semilla=1, archivo=str(archivo))
+    torneo.jugar()
+    lineas = archivo.read_text().splitlines()
+    archivo.write_text("\n".join(lineas[:2]) + "\n")
+    assert parchis.Torneo(politicas(), partidas_por_mesa=4, tanda=2, procesos=1, semilla=1,
+                          archivo=str(archivo)).jugar() == completo
+
+
+def test_continua_con_la_ultima_linea_cortada(tmp_path):
+    archivo = tmp_path / "torneo.jsonl"
+    opciones = dict(partidas_por_mesa=4, tanda=2, procesos=1, semilla=2)
+    completo = parchis.Torneo(politicas(), **opciones).jugar()
+    parchis.Torneo(politicas(), archivo=str(archivo), **opciones).jugar()
+    lineas = archivo.read_text().splitlines()
+    # Tres tandas terminadas y la cuarta cortada a la mitad de su línea
+    archivo.write_text("\n".join(lineas[:4]) + "\n" + lineas[4][:len(lineas[4]) // 2])
+    assert parchis.Torneo(politicas(), archivo=str(archivo), **opciones).jugar() == completo
+    # La tanda que siguió a la línea cortada quedó en su propia línea
+    tandas = [json.loads(linea)["tanda"] for linea in archivo.read_text().splitlines()[1:] if linea.endswith("}}")]
+    assert len(tandas) == len(set(tandas)) == 2 * 6 * 2
+    assert parchis.Torneo(politicas(), archivo=str(archivo), **opciones).cargar_avance() == set(tandas)
+
+
+def test_rechaza_un_archivo_sin_la_configuracion(tmp_path):
+    archivo = tmp_path / "torneo.jsonl"
+    opciones = dict(partidas_por_mesa=4, tanda=2, procesos=1, semilla=2)
+    parchis.Torneo(politicas(), archivo=str(archivo), **opciones).jugar()
+    lineas = archivo.read_text().splitlines()
+    for cabecera in (lineas[0][:len(lineas[0]) // 2], "[]", json.dumps({"torneo": {"semilla": 9}})):
+        archivo.write_text("\n".join([cabecera] + lineas[1:]) + "\n")
+        with pytest.raises(ValueError):
+            parchis.Torneo(politicas(), archivo=str(archivo), **opciones).jugar()
+        # El archivo queda como estaba
+        assert archivo.read_text().splitlines()[1:] == lineas[1:]
@@ -0,0 +1,12 @@
+import parchis
+
+
+def test_hash_incremental_igual_al_de_una_copia_reconstruida():
+    juego = parchis.Juego(silencioso=True, semilla=3)
+    for i, color in enumerate(parchis.COLORES):
+        juego.agregarjugador(f"J{i}", color, parchis.PoliticaAvance())
+    for _ in range(120):
+        if juego.jugarturno():
+            break
+        copia = juego.bifurcar()
+        assert copia.hash_estado() == juego.hash_estado()